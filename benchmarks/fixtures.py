@@ -0,0 +1,37 @@
+"""
+Synthetic payloads used by the benchmarks.
+"""
+
+from typing import Any, Dict
+
+from bods_client.testing import (
+    fares_datasets,
+    gtfs_rt_feed,
+    siri_vm_packet,
+    timetable_datasets,
+    zip_archive,
+)
+
+__all__ = [
+    "fares_response",
+    "gtfs_rt_feed",
+    "siri_vm_packet",
+    "timetable_response",
+    "zip_archive",
+]
+
+
+def timetable_response(count: int) -> Dict[str, Any]:
+    """
+    Returns the JSON of a page of count timetable data sets.
+    """
+    results = timetable_datasets(count)
+    return {"count": count, "next": None, "previous": None, "results": results}
+
+
+def fares_response(count: int) -> Dict[str, Any]:
+    """
+    Returns the JSON of a page of count fares data sets.
+    """
+    results = fares_datasets(count)
+    return {"count": count, "next": None, "previous": None, "results": results}
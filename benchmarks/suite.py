@@ -0,0 +1,373 @@
+"""
+The benchmark suite for the parsing and request building hot paths.
+
+Every benchmark runs offline against the synthetic payloads in
+``benchmarks.fixtures``. Results are written as JSON tagged with the commit they
+were run on, so runs from different commits can be compared.
+
+Run with ``python -m benchmarks run [-k PATTERN] [--output PATH]`` and compare two
+results files with ``python -m benchmarks compare BASE HEAD``.
+"""
+
+import argparse
+import io
+import json
+import platform
+import re
+import statistics
+import subprocess
+import sys
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, NamedTuple, Optional
+
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from benchmarks.fixtures import (
+    fares_response,
+    gtfs_rt_feed,
+    siri_vm_packet,
+    timetable_response,
+    zip_archive,
+)
+from bods_client.archive import ArchiveMember, download_archive
+from bods_client.client import BaseBODSClient
+from bods_client.models import (
+    BoundingBox,
+    FaresResponse,
+    GTFSRTParams,
+    Siri,
+    SIRIVMParams,
+    TimetableParams,
+    TimetableResponse,
+)
+from bods_client.models.siri import iter_vehicle_activity_records
+from bods_client.query import PreparedQuery, to_query_params
+
+RESULTS_DIR = Path(__file__).parent / "results"
+SIRI_VM_SIZES = (100, 10_000, 100_000)
+FEED_SIZE = 10_000
+PAGE_SIZE = 100
+
+Setup = Callable[[], Callable[[], Any]]
+
+
+class Benchmark(NamedTuple):
+    name: str
+    setup: Setup
+
+
+class _Response:
+    """
+    Stands in for a streamed requests response of a bulk archive.
+    """
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def iter_content(self, chunk_size: int) -> Iterator[bytes]:
+        stream = io.BytesIO(self.content)
+        return iter(lambda: stream.read(chunk_size), b"")
+
+
+def _siri_vm_from_bytes(vehicles: int) -> Setup:
+    def setup() -> Callable[[], Any]:
+        packet = siri_vm_packet(vehicles)
+        return lambda: Siri.from_bytes(packet)
+
+    return setup
+
+
+def _siri_vm_records(vehicles: int) -> Setup:
+    def setup() -> Callable[[], Any]:
+        packet = siri_vm_packet(vehicles)
+        return lambda: list(iter_vehicle_activity_records(packet))
+
+    return setup
+
+
+def _siri_vm_archive(vehicles: int) -> Setup:
+    def setup() -> Callable[[], Any]:
+        content = zip_archive("siri.xml", siri_vm_packet(vehicles))
+
+        def run() -> Any:
+            archive = download_archive(_Response(content))
+            with ArchiveMember(archive, "siri.xml") as member:
+                return sum(1 for _ in Siri.iter_vehicle_activities(member.file))
+
+        return run
+
+    return setup
+
+
+def _gtfs_rt_parse(vehicles: int) -> Setup:
+    def setup() -> Callable[[], Any]:
+        content = gtfs_rt_feed(vehicles)
+
+        def run() -> Any:
+            message = FeedMessage()
+            message.ParseFromString(content)
+            return message
+
+        return run
+
+    return setup
+
+
+def _gtfs_rt_archive(vehicles: int) -> Setup:
+    def setup() -> Callable[[], Any]:
+        content = zip_archive("gtfsrt.bin", gtfs_rt_feed(vehicles))
+
+        def run() -> Any:
+            archive = download_archive(_Response(content))
+            with ArchiveMember(archive, "gtfsrt.bin") as member:
+                message = FeedMessage()
+                message.ParseFromString(member.read())
+                return message
+
+        return run
+
+    return setup
+
+
+def _query_params(make_params: Callable[[], Any]) -> Setup:
+    def setup() -> Callable[[], Any]:
+        return lambda: to_query_params(make_params())
+
+    return setup
+
+
+_BOUNDING_BOX = BoundingBox(
+    min_longitude=-0.54, min_latitude=51.26, max_longitude=0.27, max_latitude=51.7
+)
+
+
+def _prepared_query() -> Setup:
+    """
+    Times what a poll costs with a PreparedQuery, finding the url to request.
+    """
+
+    def setup() -> Callable[[], Any]:
+        client = BaseBODSClient(api_key="key")
+        query = PreparedQuery(_siri_vm_params())
+        endpoint = client.siri_vm_endpoint
+        return lambda: client._prepare(query, SIRIVMParams).url(endpoint)
+
+    return setup
+
+
+def _siri_vm_params() -> SIRIVMParams:
+    return SIRIVMParams(
+        bounding_box=_BOUNDING_BOX, operator_refs=["AKSS", "AMTM"], line_ref="9"
+    )
+
+
+def _gtfs_rt_params() -> GTFSRTParams:
+    return GTFSRTParams(
+        bounding_box=_BOUNDING_BOX,
+        route_id="45",
+        start_time_after=datetime(2022, 1, 29, tzinfo=timezone.utc),
+    )
+
+
+def _timetable_params() -> TimetableParams:
+    return TimetableParams(
+        nocs=["AKSS", "AMTM"],
+        admin_areas=["040", "021"],
+        search="Maidstone",
+        modified_date=datetime(2021, 9, 15, tzinfo=timezone.utc),
+        limit=100,
+    )
+
+
+def _import(module: Optional[str]) -> Setup:
+    """
+    Times a fresh interpreter importing module, or just starting up if it is None,
+    as a short lived script or serverless function would.
+    """
+
+    def setup() -> Callable[[], Any]:
+        code = "pass" if module is None else f"import {module}"
+        command = [sys.executable, "-c", code]
+        return lambda: subprocess.run(command, check=True)
+
+    return setup
+
+
+def _response(model: Any, make_payload: Callable[[int], Dict[str, Any]]) -> Setup:
+    def setup() -> Callable[[], Any]:
+        payload = make_payload(PAGE_SIZE)
+        return lambda: model(**payload)
+
+    return setup
+
+
+def benchmarks() -> List[Benchmark]:
+    """
+    Returns every benchmark in the suite.
+    """
+    suite = [
+        Benchmark(f"siri_vm.from_bytes[{vehicles}]", _siri_vm_from_bytes(vehicles))
+        for vehicles in SIRI_VM_SIZES
+    ]
+    suite += [
+        Benchmark(f"siri_vm.records[{vehicles}]", _siri_vm_records(vehicles))
+        for vehicles in SIRI_VM_SIZES
+    ]
+    suite += [
+        Benchmark(f"siri_vm.archive[{FEED_SIZE}]", _siri_vm_archive(FEED_SIZE)),
+        Benchmark(f"gtfs_rt.parse[{FEED_SIZE}]", _gtfs_rt_parse(FEED_SIZE)),
+        Benchmark(f"gtfs_rt.archive[{FEED_SIZE}]", _gtfs_rt_archive(FEED_SIZE)),
+        Benchmark("params.siri_vm", _query_params(_siri_vm_params)),
+        Benchmark("params.gtfs_rt", _query_params(_gtfs_rt_params)),
+        Benchmark("params.timetable", _query_params(_timetable_params)),
+        Benchmark("params.siri_vm.prepared", _prepared_query()),
+        Benchmark(
+            f"response.timetable[{PAGE_SIZE}]",
+            _response(TimetableResponse, timetable_response),
+        ),
+        Benchmark(
+            f"response.fares[{PAGE_SIZE}]", _response(FaresResponse, fares_response)
+        ),
+        Benchmark("import.python", _import(None)),
+        Benchmark("import.bods_client.client", _import("bods_client.client")),
+        Benchmark("import.bods_client.models", _import("bods_client.models")),
+    ]
+    return suite
+
+
+def time_benchmark(
+    benchmark: Benchmark, repeat: int = 5, min_time: float = 0.2
+) -> Dict[str, Any]:
+    """
+    Times a benchmark, returning the time per call of each repeat in seconds.
+
+    Each repeat makes enough calls to take at least min_time, as timeit's
+    autorange does, so quick benchmarks aren't dominated by timer resolution.
+    """
+    timer = timeit.Timer(benchmark.setup())
+    number = 1
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+
+    times = [elapsed / number for elapsed in timer.repeat(repeat, number)]
+    return {
+        "number": number,
+        "repeat": repeat,
+        "min": min(times),
+        "median": statistics.median(times),
+        "max": max(times),
+    }
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        result = subprocess.run(
+            ["git", *args],
+            cwd=Path(__file__).parent,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def run(
+    pattern: Optional[str] = None,
+    repeat: int = 5,
+    min_time: float = 0.2,
+    output: Optional[Path] = None,
+) -> Dict[str, Any]:
+    """
+    Runs the benchmarks whose names match pattern and writes the results.
+
+    Args:
+        pattern: A regular expression to select benchmarks by name.
+        repeat: The number of times each benchmark is repeated.
+        min_time: The least time in seconds each repeat should take.
+        output: Where to write the results, by default
+        ``benchmarks/results/<commit>.json``.
+    """
+    commit = _git("rev-parse", "HEAD")
+    dirty = bool(_git("status", "--porcelain", "--untracked-files=no"))
+    results: Dict[str, Any] = {
+        "commit": commit,
+        "dirty": dirty,
+        "created": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "benchmarks": {},
+    }
+
+    for benchmark in benchmarks():
+        if pattern is not None and not re.search(pattern, benchmark.name):
+            continue
+        timings = time_benchmark(benchmark, repeat=repeat, min_time=min_time)
+        results["benchmarks"][benchmark.name] = timings
+        print(f"{benchmark.name:45} {_format_time(timings['min']):>12}", flush=True)
+
+    if output is None:
+        name = (commit or "unknown")[:12] + ("-dirty" if dirty else "")
+        output = RESULTS_DIR / f"{name}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2) + "\n")
+    print(f"Results written to {output}")
+    return results
+
+
+def _format_time(seconds: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:.2f} {unit}"
+    return f"{seconds / 1e-9:.0f} ns"
+
+
+def compare(base: Path, head: Path) -> None:
+    """
+    Prints the best time of each benchmark in two results files and their ratio.
+    """
+    base_results = json.loads(base.read_text())
+    head_results = json.loads(head.read_text())
+    print(f"{'benchmark':45} {'base':>12} {'head':>12} {'head/base':>10}")
+    for name, timings in head_results["benchmarks"].items():
+        base_timings = base_results["benchmarks"].get(name)
+        head_time = _format_time(timings["min"])
+        if base_timings is None:
+            print(f"{name:45} {'-':>12} {head_time:>12}")
+            continue
+        ratio = timings["min"] / base_timings["min"]
+        base_time = _format_time(base_timings["min"])
+        print(f"{name:45} {base_time:>12} {head_time:>12} {ratio:>9.2f}x")
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="run the benchmarks")
+    run_parser.add_argument("-k", dest="pattern", help="only run matching benchmarks")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--min-time", type=float, default=0.2)
+    run_parser.add_argument("--output", type=Path)
+    compare_parser = commands.add_parser("compare", help="compare two results files")
+    compare_parser.add_argument("base", type=Path)
+    compare_parser.add_argument("head", type=Path)
+    commands.add_parser("list", help="list the benchmarks")
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        run(args.pattern, args.repeat, args.min_time, args.output)
+    elif args.command == "compare":
+        compare(args.base, args.head)
+    else:
+        for benchmark in benchmarks():
+            print(benchmark.name)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+archive.py a module for streaming the BODS bulk download archives.
+"""
+
+import os
+import shutil
+import tempfile
+import zipfile
+from types import TracebackType
+from typing import IO, Optional, Type, Union
+
+from bods_client.constants import DEFAULT_CHUNK_SIZE, DEFAULT_SPOOL_SIZE
+
+PathType = Union[str, "os.PathLike[str]"]
+
+
+class _SpooledFile(tempfile.SpooledTemporaryFile):
+    # zipfile needs seekable(), which SpooledTemporaryFile lacks before Python 3.11.
+    def seekable(self) -> bool:
+        return True
+
+
+def download_archive(
+    response,
+    archive_path: Optional[PathType] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    spool_size: int = DEFAULT_SPOOL_SIZE,
+) -> IO[bytes]:
+    """
+    Writes a streamed response body to a file in chunks.
+
+    Args:
+        response: A response opened with ``stream=True``.
+        archive_path: Where to keep the downloaded archive, by default it is written
+        to a temporary file that only rolls over to disk beyond spool_size bytes.
+        chunk_size: The number of bytes to read from the response at a time.
+        spool_size: The size a temporary archive can reach before it is written
+        to disk.
+
+    Returns:
+        file: The downloaded archive, open for reading from the start.
+    """
+    archive = _open_archive_file(archive_path, spool_size)
+    try:
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            archive.write(chunk)
+    except BaseException:
+        _discard_archive(archive, archive_path)
+        raise
+    archive.seek(0)
+    return archive
+
+
+async def adownload_archive(
+    response,
+    archive_path: Optional[PathType] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    spool_size: int = DEFAULT_SPOOL_SIZE,
+) -> IO[bytes]:
+    """
+    Writes a streamed ``httpx`` response body to a file in chunks.
+
+    See ``download_archive``.
+    """
+    archive = _open_archive_file(archive_path, spool_size)
+    try:
+        async for chunk in response.aiter_bytes(chunk_size=chunk_size):
+            archive.write(chunk)
+    except BaseException:
+        _discard_archive(archive, archive_path)
+        raise
+    archive.seek(0)
+    return archive
+
+
+def spool_stream(
+    stream: IO[bytes],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    spool_size: int = DEFAULT_SPOOL_SIZE,
+) -> IO[bytes]:
+    """
+    Copies the rest of a forward-only binary stream to a temporary file, so that
+    an archive in it can be opened with zipfile.
+
+    Returns:
+        file: The copy, open for reading from the start. It only rolls over to
+        disk beyond spool_size bytes.
+    """
+    spooled = _SpooledFile(max_size=spool_size)
+    try:
+        shutil.copyfileobj(stream, spooled, chunk_size)
+    except BaseException:
+        spooled.close()
+        raise
+    spooled.seek(0)
+    return spooled
+
+
+def _open_archive_file(archive_path: Optional[PathType], spool_size: int) -> IO[bytes]:
+    if archive_path is None:
+        return _SpooledFile(max_size=spool_size)
+    return open(archive_path, "w+b")
+
+
+def _discard_archive(archive: IO[bytes], archive_path: Optional[PathType]) -> None:
+    # A truncated archive left at archive_path would look like a finished download.
+    archive.close()
+    if archive_path is not None:
+        os.unlink(archive_path)
+
+
+class ArchiveMember:
+    """
+    A file inside a downloaded bulk archive, opened for streaming.
+
+    The member is decompressed incrementally as it is read, so it can be passed
+    straight to a parser such as ``Siri.iter_vehicle_activities``.
+
+    Args:
+        archive: The downloaded zip archive.
+        name: The name of the file in the archive to open.
+    """
+
+    def __init__(self, archive: IO[bytes], name: str):
+        self._archive = archive
+        self.name = name
+        try:
+            self._zipfile = zipfile.ZipFile(archive)
+            self.file = self._zipfile.open(name)
+        except Exception:
+            archive.close()
+            raise
+
+    def read(self, size: int = -1) -> bytes:
+        return self.file.read(size)
+
+    def close(self) -> None:
+        self.file.close()
+        self._zipfile.close()
+        self._archive.close()
+
+    def __enter__(self) -> "ArchiveMember":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
@@ -0,0 +1,470 @@
+# -*- coding: utf-8 -*-
+"""
+async_client.py a module containing an asyncio client for the BODS API.
+"""
+
+import asyncio
+import time
+from collections import deque
+from http import HTTPStatus
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Optional,
+    Type,
+    Union,
+)
+
+try:
+    import httpx
+except ImportError as exc:  # pragma: no cover
+    raise ImportError(
+        "AsyncBODSClient requires httpx, install it with "
+        "`pip install bods-client[async]`."
+    ) from exc
+
+from bods_client.archive import ArchiveMember, PathType, adownload_archive
+from bods_client.cache import BaseCache
+from bods_client.client import BaseBODSClient, _feed_message
+from bods_client.constants import (
+    BODS_API_URL,
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PAGE_WORKERS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+)
+from bods_client.models import (
+    APIError,
+    APIRequestError,
+    Fares,
+    FaresResponse,
+    Timetable,
+    TimetableParams,
+    TimetableResponse,
+)
+from bods_client.models.avl import GTFSRTParams, SIRIVMParams
+from bods_client.models.base import BaseAPIParams, BaseDataset
+from bods_client.models.fares import FaresParams
+from bods_client.query import PreparedQuery
+from bods_client.throttle import RateLimiter, RetryPolicy
+
+if TYPE_CHECKING:  # pragma: no cover
+    from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+    from bods_client.models.siri import ActivityFilterType, VehicleActivity
+
+
+class AsyncBODSClient(BaseBODSClient):
+    """
+    Asyncio client for requesting data from the BODS API.
+
+    Mirrors the request methods of ``BODSClient`` as coroutines, and
+    ``iter_siri_vm_from_archive`` and the ``iter_*_datasets`` methods as async
+    iterators. All requests share one ``httpx.AsyncClient`` connection pool and at
+    most ``max_concurrency`` requests are in flight at once, so many calls can be
+    gathered on a single event loop. Instrumentation hooks are only supported by
+    ``BODSClient``.
+
+    Args:
+        api_key: The BODS API key.
+        base_url: The base url of the BODS API.
+        version: The version of the BODS API.
+        client: A pre-built ``httpx.AsyncClient`` to send requests with, the client
+        will not close an ``httpx.AsyncClient`` it did not create.
+        max_concurrency: The maximum number of requests in flight at once.
+        max_connections: The maximum number of connections in the pool.
+        max_keepalive_connections: The maximum number of idle connections to keep.
+        max_retries: The number of times to retry a failed connection.
+        timeout: The default request timeout in seconds.
+        conditional_requests: Send If-None-Match and If-Modified-Since headers and
+        reuse the previous result when BODS responds 304 Not Modified.
+        cache: A cache for response bodies, such as a ``MemoryCache`` or a
+        ``SQLiteCache``, the bulk archives are never cached.
+        cache_ttls: Seconds to cache responses for by endpoint, overriding
+        ``DEFAULT_CACHE_TTLS``.
+        rate_limiter: Throttles requests by endpoint family, a RateLimiter can be
+        shared between clients.
+        retry: Retries failed requests with backoff, see ``RetryPolicy``.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = BODS_API_URL,
+        version: str = "v1",
+        client: Optional[httpx.AsyncClient] = None,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        max_connections: int = DEFAULT_POOL_MAXSIZE,
+        max_keepalive_connections: int = DEFAULT_POOL_MAXSIZE,
+        max_retries: int = 0,
+        timeout: float = DEFAULT_TIMEOUT,
+        conditional_requests: bool = False,
+        cache: Optional[BaseCache] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            base_url=base_url,
+            version=version,
+            timeout=timeout,
+            conditional_requests=conditional_requests,
+            cache=cache,
+            cache_ttls=cache_ttls,
+            rate_limiter=rate_limiter,
+            retry=retry,
+        )
+        self.max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._owns_client = client is None
+        if client is None:
+            limits = httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+            )
+            transport = httpx.AsyncHTTPTransport(limits=limits, retries=max_retries)
+            client = httpx.AsyncClient(transport=transport)
+        self.client = client
+
+    @property
+    def _limiter(self) -> asyncio.Semaphore:
+        # Created lazily so the semaphore binds to the loop that uses it.
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def aclose(self) -> None:
+        """
+        Closes the connection pool if the httpx client was created by the client.
+        """
+        if self._owns_client:
+            await self.client.aclose()
+
+    async def __aenter__(self) -> "AsyncBODSClient":
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        await self.aclose()
+
+    async def _make_request(self, path: str, *args, **kwargs) -> httpx.Response:
+        kwargs = self._request_kwargs(kwargs)
+        stream = kwargs.pop("stream", False)
+        family = self._endpoint_family(path)
+        if "?" in path:
+            # httpx replaces the query of a url with params rather than adding to it.
+            path = httpx.URL(path).copy_merge_params(kwargs.pop("params"))
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            delay = self._throttle_delay(family)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                async with self._limiter:
+                    request = self.client.build_request("GET", path, *args, **kwargs)
+                    response = await self.client.send(request, stream=stream)
+            except httpx.TransportError:
+                delay = self._retry_delay(attempt, started)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, started, response)
+                if delay is None:
+                    return response
+                await response.aclose()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def _get(
+        self,
+        url: str,
+        parse: Callable[[Any], Any],
+        query: Optional[PreparedQuery] = None,
+    ) -> Any:
+        if query is not None:
+            url = query.url(url)
+        cached = self._cache_lookup(url)
+        if cached is not None:
+            return parse(cached)
+        kwargs = self._prepare_get(url)
+        response = await self._make_request(url, **kwargs)
+        self._cache_store(url, response)
+        return self._finish_get(url, response, parse)
+
+    async def get_timetable_datasets(
+        self, params: Union[TimetableParams, PreparedQuery, None] = None
+    ) -> Union[TimetableResponse, APIError]:
+        """
+        Fetches the data sets currently available in the BODS database.
+
+        See ``BODSClient.get_timetable_datasets``.
+        """
+        query = self._prepare(params, TimetableParams)
+        return await self._get(
+            self.timetable_endpoint, self._parse_timetable_datasets, query
+        )
+
+    async def get_timetable_dataset(
+        self, dataset_id: int
+    ) -> Union[TimetableResponse, APIError]:
+        """
+        Get a single timetable dataset.
+
+        Args:
+            dataset_id: The id of the timetable data set.
+        """
+        url = self.timetable_endpoint + f"{dataset_id}/"
+        return await self._get(url, self._parse_timetable_dataset)
+
+    async def iter_timetable_datasets(
+        self,
+        params: Optional[TimetableParams] = None,
+        max_workers: int = DEFAULT_PAGE_WORKERS,
+    ) -> AsyncIterator[Timetable]:
+        """
+        Iterates over every timetable data set matching params.
+
+        See ``BODSClient.iter_timetable_datasets``.
+
+        Raises:
+            APIRequestError: If any page could not be fetched.
+        """
+        if params is None:
+            params = TimetableParams()
+        pages = self._iter_datasets(self.get_timetable_datasets, params, max_workers)
+        try:
+            async for dataset in pages:
+                yield dataset
+        finally:
+            # Cancels the pages still being fetched if iteration stops early.
+            await pages.aclose()
+
+    async def get_fares_datasets(
+        self, params: Union[FaresParams, PreparedQuery, None] = None
+    ) -> Union[FaresResponse, APIError]:
+        """
+        Fetches the fares data sets currently available in the BODS database.
+
+        See ``BODSClient.get_fares_datasets``.
+        """
+        query = self._prepare(params, FaresParams)
+        return await self._get(self.fares_endpoint, self._parse_fares_datasets, query)
+
+    async def get_fares_dataset(
+        self, dataset_id: int
+    ) -> Union[FaresResponse, APIError]:
+        """
+        Fetches a single fares data sets currently available in the BODS database.
+        """
+        url = self.fares_endpoint + f"{dataset_id}/"
+        return await self._get(url, self._parse_fares_dataset)
+
+    async def iter_fares_datasets(
+        self,
+        params: Optional[FaresParams] = None,
+        max_workers: int = DEFAULT_PAGE_WORKERS,
+    ) -> AsyncIterator[Fares]:
+        """
+        Iterates over every fares data set matching params.
+
+        See ``BODSClient.iter_timetable_datasets``.
+
+        Raises:
+            APIRequestError: If any page could not be fetched.
+        """
+        if params is None:
+            params = FaresParams()
+        pages = self._iter_datasets(self.get_fares_datasets, params, max_workers)
+        try:
+            async for dataset in pages:
+                yield dataset
+        finally:
+            # Cancels the pages still being fetched if iteration stops early.
+            await pages.aclose()
+
+    async def _iter_datasets(
+        self,
+        fetch: Callable[[Any], Awaitable[Any]],
+        params: BaseAPIParams,
+        max_workers: int,
+    ) -> AsyncIterator[Any]:
+        page = await fetch(params)
+        if isinstance(page, APIError):
+            raise APIRequestError(page)
+        for dataset in page.results:
+            yield dataset
+
+        offsets = iter(self._page_offsets(params, page.count))
+        pending: Deque[asyncio.Task] = deque()
+
+        def submit_next() -> None:
+            offset = next(offsets, None)
+            if offset is not None:
+                page_params = params.model_copy(update={"offset": offset})
+                pending.append(asyncio.ensure_future(fetch(page_params)))
+
+        try:
+            for _ in range(max_workers):
+                submit_next()
+            while pending:
+                page = await pending.popleft()
+                submit_next()
+                if isinstance(page, APIError):
+                    raise APIRequestError(page)
+                for dataset in page.results:
+                    yield dataset
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+    async def get_siri_vm_data_feed(
+        self, params: Union[SIRIVMParams, PreparedQuery, None] = None
+    ) -> Union[bytes, APIError]:
+        """
+        Returns a SIRI-VM byte string representation of vehicles currently providing an
+        Automatic Vehicle Locations in BODS.
+
+        See ``BODSClient.get_siri_vm_data_feed``.
+        """
+        query = self._prepare(params, SIRIVMParams)
+        return await self._get(self.siri_vm_endpoint, self._parse_siri_vm, query)
+
+    async def get_siri_vm_data_feed_by_id(self, feed_id: int) -> Union[bytes, APIError]:
+        """
+        Returns a SIRI-VM byte string representation of a single data feed.
+        """
+        url = self.siri_vm_endpoint + f"{feed_id}/"
+        return await self._get(url, self._parse_siri_vm)
+
+    async def get_siri_vm_from_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union[bytes, APIError]:
+        """
+        Returns a SIRI-VM byte string representation of vehicles currently providing an
+        Automatic Vehicle Location from the bulk download file in BODS.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
+        """
+        member = await self.open_siri_vm_archive(archive_path)
+        if isinstance(member, APIError):
+            return member
+        with member:
+            return member.read()
+
+    async def open_siri_vm_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union[ArchiveMember, APIError]:
+        """
+        Downloads the SIRI-VM bulk archive and opens siri.xml for streaming.
+
+        See ``BODSClient.open_siri_vm_archive``.
+        """
+        return await self._open_archive(
+            self.siri_vm_zip_endpoint, "siri.xml", archive_path
+        )
+
+    async def iter_siri_vm_from_archive(
+        self,
+        archive_path: Optional[PathType] = None,
+        params: Optional["ActivityFilterType"] = None,
+    ) -> AsyncIterator["VehicleActivity"]:
+        """
+        Yields each VehicleActivity in the SIRI-VM bulk archive as it is parsed.
+
+        The archive is downloaded without blocking the event loop, siri.xml is then
+        decompressed and parsed between the activities yielded.
+
+        See ``BODSClient.iter_siri_vm_from_archive``.
+
+        Raises:
+            APIRequestError: If the archive could not be downloaded.
+        """
+        member = await self.open_siri_vm_archive(archive_path)
+        if isinstance(member, APIError):
+            raise APIRequestError(member)
+        from bods_client.models.siri import Siri
+
+        with member:
+            for activity in Siri.iter_vehicle_activities(member.file, params=params):
+                yield activity
+
+    async def _open_archive(
+        self, url: str, name: str, archive_path: Optional[PathType]
+    ) -> Union[ArchiveMember, APIError]:
+        response = await self._make_request(url, stream=True)
+        try:
+            if response.status_code != HTTPStatus.OK:
+                await response.aread()
+                return self._api_error(response)
+            archive = await adownload_archive(response, archive_path)
+        finally:
+            await response.aclose()
+        return ArchiveMember(archive, name)
+
+    async def get_gtfs_rt_data_feed(
+        self, params: Union[GTFSRTParams, PreparedQuery, None] = None
+    ) -> Union["FeedMessage", APIError]:
+        """
+        Returns a FeedMessage of vehicles currently providing Automatic Vehicle
+        Locations in BODS.
+
+        See ``BODSClient.get_gtfs_rt_data_feed``.
+        """
+        query = self._prepare(params, GTFSRTParams)
+        return await self._get(self.gtfs_rt_endpoint, self._parse_gtfs_rt, query)
+
+    async def get_gtfs_rt_from_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union["FeedMessage", APIError]:
+        """
+        Returns a FeedMessage of vehicles currently providing Automatic Vehicle
+        Locations bulk download URL in BODS.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
+        """
+        member = await self.open_gtfs_rt_archive(archive_path)
+        if isinstance(member, APIError):
+            return member
+        with member:
+            return _feed_message(member.read())
+
+    async def open_gtfs_rt_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union[ArchiveMember, APIError]:
+        """
+        Downloads the GTFS-RT bulk archive and opens gtfsrt.bin for streaming.
+
+        See ``BODSClient.open_siri_vm_archive``.
+        """
+        return await self._open_archive(
+            self.gtfs_rt_zip_endpoint, "gtfsrt.bin", archive_path
+        )
+
+    async def open_dataset_file(
+        self, dataset: BaseDataset, offset: int = 0
+    ) -> httpx.Response:
+        """
+        Requests the TransXChange or NeTEx file of a data set, at its url, for
+        streaming. The response should be closed with ``aclose`` when done.
+
+        See ``BODSClient.open_dataset_file``.
+        """
+        kwargs: Dict[str, Any] = {"stream": True}
+        if offset:
+            kwargs["headers"] = {"Range": f"bytes={offset}-"}
+        return await self._make_request(dataset.url, **kwargs)
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+cache.py a module containing response caches for the BODS clients.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple, Union
+
+from bods_client.constants import DEFAULT_CACHE_MAX_ENTRIES
+
+Clock = Callable[[], float]
+
+
+class CacheStats:
+    """
+    Hit, miss and eviction counts for a cache.
+    """
+
+    __slots__ = ("hits", "misses", "evictions")
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"CacheStats(hits={self.hits}, misses={self.misses}, "
+            f"evictions={self.evictions})"
+        )
+
+
+class BaseCache(ABC):
+    """
+    A size-bounded, least recently used cache of response bodies with a time to
+    live per entry.
+
+    Args:
+        max_entries: The number of entries kept before the least recently used
+        entry is evicted.
+        clock: The time function used for expiry, ``time.time`` by default.
+    """
+
+    def __init__(
+        self, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, clock: Clock = time.time
+    ):
+        self.max_entries = max_entries
+        self.clock = clock
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Returns the cached value for key or None if it is missing or expired.
+        """
+        with self._lock:
+            value = self._get(key, self.clock())
+            if value is None:
+                self.stats.misses += 1
+            else:
+                self.stats.hits += 1
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        """
+        Caches value under key for ttl seconds.
+        """
+        if ttl <= 0:
+            return
+        with self._lock:
+            self.stats.evictions += self._set(key, value, self.clock() + ttl)
+
+    @abstractmethod
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        """
+        Returns the value for key, removing it if it expired before now.
+        """
+
+    @abstractmethod
+    def _set(self, key: str, value: bytes, expires: float) -> int:
+        """
+        Stores value and returns the number of entries evicted to make room.
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """
+        Removes key from the cache.
+        """
+
+    @abstractmethod
+    def clear(self) -> None:
+        """
+        Removes every entry from the cache.
+        """
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """
+        Returns the number of entries, including any that have expired.
+        """
+
+
+class MemoryCache(BaseCache):
+    """
+    An in-process cache backed by an ordered dictionary.
+    """
+
+    def __init__(
+        self, max_entries: int = DEFAULT_CACHE_MAX_ENTRIES, clock: Clock = time.time
+    ):
+        super().__init__(max_entries=max_entries, clock=clock)
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires, value = entry
+        if expires <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def _set(self, key: str, value: bytes, expires: float) -> int:
+        self._entries[key] = (expires, value)
+        self._entries.move_to_end(key)
+        evicted = 0
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            evicted += 1
+        return evicted
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# A counter orders accesses even when the clock does not move. It is read in the
+# statement that writes it, under SQLite's write lock.
+_NEXT_ACCESS = "(SELECT COALESCE(MAX(accessed), 0) + 1 FROM responses)"
+
+
+class SQLiteCache(BaseCache):
+    """
+    A persistent cache stored in a SQLite database, so cached responses survive
+    restarts and can be shared between processes.
+
+    Entries are ordered by an access stamp taken from the database in the same
+    statement that writes it, so processes sharing the file evict in one order.
+
+    Args:
+        path: The database file, created if it does not exist.
+        max_entries: The number of entries kept before the least recently used
+        entry is evicted.
+        clock: The time function used for expiry, ``time.time`` by default.
+    """
+
+    def __init__(
+        self,
+        path: Union[str, "os.PathLike[str]"],
+        max_entries: int = DEFAULT_CACHE_MAX_ENTRIES,
+        clock: Clock = time.time,
+    ):
+        super().__init__(max_entries=max_entries, clock=clock)
+        self.path = path
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        with self._connection:
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                "expires REAL NOT NULL, accessed INTEGER NOT NULL)"
+            )
+            self._connection.execute(
+                "CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)"
+            )
+
+    def _get(self, key: str, now: float) -> Optional[bytes]:
+        row = self._connection.execute(
+            "SELECT value, expires FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        value, expires = row
+        with self._connection:
+            if expires <= now:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+            self._connection.execute(
+                f"UPDATE responses SET accessed = {_NEXT_ACCESS} WHERE key = ?", (key,)
+            )
+        return value
+
+    def _set(self, key: str, value: bytes, expires: float) -> int:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, value, expires, accessed) "
+                f"SELECT ?, ?, ?, {_NEXT_ACCESS}",
+                (key, sqlite3.Binary(value), expires),
+            )
+            cursor = self._connection.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses "
+                "ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+        return cursor.rowcount
+
+    def delete(self, key: str) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __len__(self) -> int:
+        return self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class CachedResponse:
+    """
+    A cached response body that can be handed to the clients' response parsers.
+    """
+
+    status_code = 200
+
+    def __init__(self, content: bytes):
+        self.content = content
+        self.headers: Dict[str, str] = {}
+
+    def json(self) -> Any:
+        return json.loads(self.content)
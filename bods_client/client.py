@@ -1,26 +1,62 @@
+# -*- coding: utf-8 -*-
 """
 client.py a module containing a client for requesting data from the BODS API.
 """
 
 import io
-import json
-import zipfile
+import logging
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextvars import ContextVar
 from http import HTTPStatus
-from typing import Optional, Union
+from types import TracebackType
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import urlparse
 
 import requests
-from google.transit.gtfs_realtime_pb2 import FeedMessage
+from pydantic import BaseModel
+from requests.adapters import HTTPAdapter
 
+from bods_client.archive import ArchiveMember, PathType, download_archive
+from bods_client.cache import BaseCache, CachedResponse
+from bods_client.conditional import ValidatorCache
 from bods_client.constants import (
+    ARCHIVE,
     BODS_API_URL,
+    DEFAULT_CACHE_TTLS,
+    DEFAULT_PAGE_WORKERS,
+    DEFAULT_POOL_CONNECTIONS,
+    DEFAULT_POOL_MAXSIZE,
+    DEFAULT_TIMEOUT,
+    FARES,
     FARES_PATH,
+    GTFS_RT,
+    GTFS_RT_ARCHIVE,
     GTFS_RT_PATH,
+    SIRI_VM,
+    SIRI_VM_ARCHIVE,
     SIRI_VM_PATH,
+    TIMETABLES,
     TIMETABLES_PATH,
 )
+from bods_client.instrumentation import CallHook, CallMetrics, TimedReader
 from bods_client.models import (
     APIError,
+    APIRequestError,
     Fares,
     FaresResponse,
     Timetable,
@@ -28,32 +64,300 @@ from bods_client.models import (
     TimetableResponse,
 )
 from bods_client.models.avl import GTFSRTParams, SIRIVMParams
+from bods_client.models.base import BaseAPIParams, BaseAPIResponse, BaseDataset
 from bods_client.models.fares import FaresParams
+from bods_client.query import PreparedQuery
+from bods_client.throttle import RateLimiter, RequestStats, RetryPolicy
+
+# protobuf and lxml are slow to import, so the GTFS-RT and SIRI-VM models are only
+# imported once a method needing them is called.
+if TYPE_CHECKING:  # pragma: no cover
+    from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+    from bods_client.models.siri import ActivityFilterType, VehicleActivity
+
+logger = logging.getLogger(__name__)
+
+
+def _count_objects(result: Any) -> Optional[int]:
+    if isinstance(result, BaseAPIResponse):
+        return len(result.results)
+    entity = getattr(result, "entity", None)
+    if entity is not None:
+        return len(entity)
+    return None
 
 
-class BODSClient:
+def _feed_message(content: bytes) -> "FeedMessage":
+    from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+    message = FeedMessage()
+    message.ParseFromString(content)
+    return message
+
+
+class BaseBODSClient:
     """
-    Client for requesting data from the BODS API.
+    Endpoints and response handling shared by the sync and async BODS clients.
     """
 
-    def __init__(self, api_key: str, base_url: str = BODS_API_URL, version: str = "v1"):
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = BODS_API_URL,
+        version: str = "v1",
+        timeout: float = DEFAULT_TIMEOUT,
+        conditional_requests: bool = False,
+        cache: Optional[BaseCache] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        hooks: Optional[Sequence[CallHook]] = None,
+    ):
         self.api_key = api_key
         if base_url.endswith("/"):
             self.base_url = base_url[:-1]
         else:
             self.base_url = base_url
         self.version = version
+        self.timeout = timeout
+        self.validators: Optional[ValidatorCache] = None
+        if conditional_requests:
+            self.validators = ValidatorCache()
+        self._not_modified: ContextVar[bool] = ContextVar(
+            f"bods_client_not_modified_{id(self)}", default=False
+        )
+        self.cache = cache
+        self.cache_ttls = {**DEFAULT_CACHE_TTLS, **(cache_ttls or {})}
+        self.rate_limiter = rate_limiter
+        self.retry = retry
+        self.request_stats = RequestStats()
+        self.hooks: Tuple[CallHook, ...] = tuple(hooks or ())
+        self._call: ContextVar[Optional[CallMetrics]] = ContextVar(
+            f"bods_client_call_{id(self)}", default=None
+        )
 
-    def _make_request(self, path: str, *args, **kwargs):
+    @property
+    def not_modified(self) -> bool:
+        """
+        True if the last request made in the current thread or task was answered
+        with 304 Not Modified and the previously parsed result was returned.
+        """
+        return self._not_modified.get()
+
+    def _cache_lookup(self, url: str) -> Optional[CachedResponse]:
+        # Responses are keyed by their url, which includes the query string but
+        # not the api_key.
+        if self.cache is None:
+            return None
+        content = self.cache.get(url)
+        if content is None:
+            return None
+        self._not_modified.set(False)
+        call = self._call.get() if self.hooks else None
+        if call is not None:
+            call.cached = True
+        return CachedResponse(content)
+
+    def _cache_store(self, url: str, response) -> None:
+        if self.cache is None:
+            return
+        if response.status_code == HTTPStatus.OK:
+            content = response.content
+            self.cache.set(url, content, self._cache_ttl(url, content))
+
+    def _cache_ttl(self, url: str, content: bytes) -> float:
+        """
+        Returns how long to cache a response from url for, SIRI-VM responses are
+        cached for their ShortestPossibleCycle if they have one.
+        """
+        family = self._endpoint_family(url)
+        if family == SIRI_VM:
+            from bods_client.models.siri import read_shortest_possible_cycle
+
+            cycle = read_shortest_possible_cycle(content)
+            if cycle is not None:
+                return cycle
+        return self.cache_ttls.get(family, 0.0) if family is not None else 0.0
+
+    def _endpoint_family(self, url: str) -> Optional[str]:
+        families = (
+            (self.siri_vm_endpoint, SIRI_VM),
+            (self.gtfs_rt_endpoint, GTFS_RT),
+            (self.timetable_endpoint, TIMETABLES),
+            (self.fares_endpoint, FARES),
+            (self.siri_vm_zip_endpoint, ARCHIVE),
+            (self.gtfs_rt_zip_endpoint, ARCHIVE),
+        )
+        for endpoint, family in families:
+            if url.startswith(endpoint):
+                return family
+        return None
+
+    def _endpoint_name(self, url: str) -> str:
+        if url.startswith(self.siri_vm_zip_endpoint):
+            return SIRI_VM_ARCHIVE
+        if url.startswith(self.gtfs_rt_zip_endpoint):
+            return GTFS_RT_ARCHIVE
+        return self._endpoint_family(url) or "other"
+
+    def _start_call(
+        self, url: str, params: Optional[Dict[str, Any]] = None
+    ) -> Optional[CallMetrics]:
+        """
+        Returns the metrics of a new call to url, or None if there are no hooks or
+        the call is made within another call, which measures it instead.
+        """
+        if not self.hooks or self._call.get() is not None:
+            return None
+        return CallMetrics(
+            self._endpoint_name(url), url, None if params is None else dict(params)
+        )
+
+    def _end_call(
+        self,
+        call: CallMetrics,
+        result: Any = None,
+        error: Optional[BaseException] = None,
+    ) -> None:
+        call.error = error
+        if call.objects is None:
+            call.objects = _count_objects(result)
+        call.finish()
+        for hook in self.hooks:
+            try:
+                hook(call)
+            except Exception:
+                logger.exception("Instrumentation hook %r failed", hook)
+
+    def _measured(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]],
+        function: Callable[..., Any],
+        *args: Any,
+    ) -> Any:
+        """
+        Calls function with args, measuring it as a call to url if there are hooks.
+        """
+        call = self._start_call(url, params)
+        if call is None:
+            return function(*args)
+        token = self._call.set(call)
+        try:
+            result = function(*args)
+        except BaseException as error:
+            self._end_call(call, error=error)
+            raise
+        finally:
+            self._call.reset(token)
+        self._end_call(call, result)
+        return result
+
+    def _timed(self, phase: str, function: Callable[..., Any], *args: Any) -> Any:
+        """
+        Calls function with args, recording the time it took as phase of the call
+        being measured.
+        """
+        call = self._call.get() if self.hooks else None
+        if call is None:
+            return function(*args)
+        started = time.perf_counter()
+        try:
+            return function(*args)
+        finally:
+            setattr(call, phase, time.perf_counter() - started)
+
+    def _throttle_delay(self, family: Optional[str]) -> float:
+        """
+        Returns the number of seconds to wait before sending a request.
+        """
+        delay = 0.0
+        if self.rate_limiter is not None:
+            delay = self.rate_limiter.reserve(family)
+        self.request_stats.record_request(delay)
+        return delay
+
+    def _retry_delay(
+        self, attempt: int, started: float, response: Optional[Any] = None
+    ) -> Optional[float]:
+        """
+        Returns the number of seconds to wait before retrying a failed attempt, or
+        None if it should not be retried.
+
+        Args:
+            attempt: The number of the failed attempt, the first being 0.
+            started: When the first attempt was made, by ``time.monotonic``.
+            response: The response to the attempt, None if it raised an error.
+        """
+        retry = self.retry
+        if retry is None or attempt >= retry.max_retries:
+            return None
+        retry_after = None
+        if response is not None:
+            if response.status_code not in retry.statuses:
+                return None
+            retry_after = response.headers.get("Retry-After")
+        delay = retry.delay(attempt, retry_after)
+        if time.monotonic() + delay - started > retry.deadline:
+            return None
+        self.request_stats.record_retry(delay)
+        return delay
+
+    def _prepare_get(self, url: str) -> Dict[str, Any]:
+        kwargs: Dict[str, Any] = {}
+        if self.validators is not None:
+            headers = self.validators.headers(url)
+            if headers:
+                kwargs["headers"] = headers
+        return kwargs
+
+    def _finish_get(self, url: str, response, parse: Callable[[Any], Any]) -> Any:
+        validators = self.validators
+        if validators is not None:
+            if response.status_code == HTTPStatus.NOT_MODIFIED:
+                entry = validators.get(url)
+                if entry is not None:
+                    self._not_modified.set(True)
+                    return entry.result
+
+        self._not_modified.set(False)
+        result = self._timed("parse_time", parse, response)
+        if validators is not None:
+            if response.status_code == HTTPStatus.OK:
+                validators.store(url, response, result)
+        return result
+
+    def _request_kwargs(self, kwargs: Dict[str, Any]) -> Dict[str, Any]:
         if "timeout" not in kwargs:
-            kwargs["timeout"] = 60
+            kwargs["timeout"] = self.timeout
 
         if "params" in kwargs:
             kwargs["params"]["api_key"] = self.api_key
         else:
             kwargs["params"] = {"api_key": self.api_key}
+        return kwargs
+
+    @staticmethod
+    def _prepare(
+        params: Union[BaseModel, PreparedQuery, None], params_type: Type[BaseModel]
+    ) -> PreparedQuery:
+        """
+        Returns params as a PreparedQuery, preparing them if they aren't already.
 
-        return requests.get(path, *args, **kwargs)
+        Raises:
+            TypeError: If params are not params_type.
+        """
+        if params is None:
+            return PreparedQuery(params_type())
+        if isinstance(params, PreparedQuery):
+            if not isinstance(params.params, params_type):
+                raise TypeError(
+                    f"Expected a query prepared from {params_type.__name__}, "
+                    f"not {type(params.params).__name__}."
+                )
+            return params
+        return PreparedQuery(params)
 
     @property
     def timetable_endpoint(self):
@@ -74,15 +378,234 @@ class BODSClient:
     @property
     def siri_vm_zip_endpoint(self) -> str:
         parsed_url = urlparse(self.base_url)
-        return f"{parsed_url.scheme}://{parsed_url.hostname}/avl/download/bulk_archive"
+        return f"{parsed_url.scheme}://{parsed_url.netloc}/avl/download/bulk_archive"
 
     @property
     def gtfs_rt_zip_endpoint(self) -> str:
         parsed_url = urlparse(self.base_url)
-        return f"{parsed_url.scheme}://{parsed_url.hostname}/avl/download/gtfsrt"
+        return f"{parsed_url.scheme}://{parsed_url.netloc}/avl/download/gtfsrt"
+
+    @staticmethod
+    def _page_offsets(params: BaseAPIParams, count: int) -> List[int]:
+        """
+        Returns the offsets of the pages after the first page of a result set.
+        """
+        return list(range(params.offset + params.limit, count, params.limit))
+
+    @staticmethod
+    def _api_error(response) -> APIError:
+        return APIError(status_code=response.status_code, reason=response.content)
+
+    def _parse_timetable_datasets(self, response) -> Union[TimetableResponse, APIError]:
+        if response.status_code == HTTPStatus.OK:
+            return TimetableResponse(**response.json())
+        return self._api_error(response)
+
+    def _parse_timetable_dataset(self, response) -> Union[TimetableResponse, APIError]:
+        if response.status_code == HTTPStatus.OK:
+            results = [Timetable(**response.json())]
+            return TimetableResponse(count=1, results=results)
+        return self._api_error(response)
+
+    def _parse_fares_datasets(self, response) -> Union[FaresResponse, APIError]:
+        if response.status_code == HTTPStatus.OK:
+            return FaresResponse(**response.json())
+        return self._api_error(response)
+
+    def _parse_fares_dataset(self, response) -> Union[FaresResponse, APIError]:
+        if response.status_code == HTTPStatus.OK:
+            results = [Fares(**response.json())]
+            return FaresResponse(count=1, results=results)
+        return self._api_error(response)
+
+    def _parse_siri_vm(self, response) -> Union[bytes, APIError]:
+        if response.status_code == HTTPStatus.OK:
+            return response.content
+        return self._api_error(response)
+
+    def _parse_gtfs_rt(self, response) -> Union["FeedMessage", APIError]:
+        if response.status_code == HTTPStatus.OK:
+            return _feed_message(response.content)
+        return self._api_error(response)
+
+
+class BODSClient(BaseBODSClient):
+    """
+    Client for requesting data from the BODS API.
+
+    All requests are sent through a single ``requests.Session`` so connections to
+    BODS are pooled and kept alive between calls. Use the client as a context
+    manager, or call ``close``, to release the connection pool.
+
+    Args:
+        api_key: The BODS API key.
+        base_url: The base url of the BODS API.
+        version: The version of the BODS API.
+        session: A pre-built session to send requests with, the client will not
+        close a session it did not create.
+        pool_connections: The number of host connection pools to cache.
+        pool_maxsize: The maximum number of connections to keep in each pool.
+        max_retries: The number of times to retry a failed connection.
+        keep_alive: Keep connections open between requests.
+        timeout: The default request timeout in seconds.
+        conditional_requests: Send If-None-Match and If-Modified-Since headers and
+        reuse the previous result when BODS responds 304 Not Modified.
+        cache: A cache for response bodies, such as a ``MemoryCache`` or a
+        ``SQLiteCache``, the bulk archives are never cached.
+        cache_ttls: Seconds to cache responses for by endpoint, overriding
+        ``DEFAULT_CACHE_TTLS``.
+        rate_limiter: Throttles requests by endpoint family, a RateLimiter can be
+        shared between clients.
+        retry: Retries failed requests with backoff, see ``RetryPolicy``.
+        hooks: Called with the ``CallMetrics`` of every call once it has finished,
+        such as a ``LoggingHook`` or a ``PrometheusHook``.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = BODS_API_URL,
+        version: str = "v1",
+        session: Optional[requests.Session] = None,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_retries: int = 0,
+        keep_alive: bool = True,
+        timeout: float = DEFAULT_TIMEOUT,
+        conditional_requests: bool = False,
+        cache: Optional[BaseCache] = None,
+        cache_ttls: Optional[Dict[str, float]] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        retry: Optional[RetryPolicy] = None,
+        hooks: Optional[Sequence[CallHook]] = None,
+    ):
+        super().__init__(
+            api_key=api_key,
+            base_url=base_url,
+            version=version,
+            timeout=timeout,
+            conditional_requests=conditional_requests,
+            cache=cache,
+            cache_ttls=cache_ttls,
+            rate_limiter=rate_limiter,
+            retry=retry,
+            hooks=hooks,
+        )
+        self._owns_session = session is None
+        if session is None:
+            session = self._create_session(
+                pool_connections=pool_connections,
+                pool_maxsize=pool_maxsize,
+                max_retries=max_retries,
+                keep_alive=keep_alive,
+            )
+        self.session = session
+
+    @staticmethod
+    def _create_session(
+        pool_connections: int, pool_maxsize: int, max_retries: int, keep_alive: bool
+    ) -> requests.Session:
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=max_retries,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        if not keep_alive:
+            session.headers["Connection"] = "close"
+        return session
+
+    def close(self) -> None:
+        """
+        Closes the connection pool if the session was created by the client.
+        """
+        if self._owns_session:
+            self.session.close()
+
+    def __enter__(self) -> "BODSClient":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+    def _make_request(self, path: str, *args, **kwargs):
+        kwargs = self._request_kwargs(kwargs)
+        family = self._endpoint_family(path)
+        call = self._call.get() if self.hooks else None
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            delay = self._throttle_delay(family)
+            if delay > 0:
+                time.sleep(delay)
+            try:
+                sent = time.perf_counter()
+                response = self.session.get(path, *args, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                delay = self._retry_delay(attempt, started)
+                if delay is None:
+                    raise
+            else:
+                delay = self._retry_delay(attempt, started, response)
+                if delay is None:
+                    if call is not None:
+                        self._record_response(call, response, sent, kwargs)
+                    return response
+                response.close()
+            attempt += 1
+            if call is not None:
+                call.retries = attempt
+            time.sleep(delay)
+
+    @staticmethod
+    def _record_response(
+        call: CallMetrics, response, sent: float, kwargs: Dict[str, Any]
+    ) -> None:
+        """
+        Records the status and timings of a response, a streamed response's body
+        is measured as it is downloaded instead.
+        """
+        call.status = response.status_code
+        call.time_to_first_byte = response.elapsed.total_seconds()
+        if not kwargs.get("stream"):
+            elapsed = time.perf_counter() - sent
+            call.download_time = max(elapsed - call.time_to_first_byte, 0.0)
+            call.bytes_received = len(response.content)
+
+    def _get(
+        self,
+        url: str,
+        parse: Callable[[Any], Any],
+        query: Optional[PreparedQuery] = None,
+    ) -> Any:
+        params = None if query is None else query.query
+        return self._measured(url, params, self._fetch, url, parse, query)
+
+    def _fetch(
+        self,
+        url: str,
+        parse: Callable[[Any], Any],
+        query: Optional[PreparedQuery],
+    ) -> Any:
+        if query is not None:
+            url = query.url(url)
+        cached = self._cache_lookup(url)
+        if cached is not None:
+            return self._timed("parse_time", parse, cached)
+        kwargs = self._prepare_get(url)
+        response = self._make_request(url, **kwargs)
+        self._cache_store(url, response)
+        return self._finish_get(url, response, parse)
 
     def get_timetable_datasets(
-        self, params: Optional[TimetableParams] = None
+        self, params: Union[TimetableParams, PreparedQuery, None] = None
     ) -> Union[TimetableResponse, APIError]:
         """
         Fetches the data sets currently available in the BODS database.
@@ -104,17 +627,11 @@ class BODSClient:
             end_date_end: Get data sets with end dates before this date.
             limit: Maximum number of results to return per page.
             offset: Number to offset results by.
-        """
-
-        if params is None:
-            params = TimetableParams()
-
-        params = json.loads(params.model_dump_json(by_alias=True, exclude_none=True))
-        response = self._make_request(self.timetable_endpoint, params=params)
 
-        if response.status_code == HTTPStatus.OK:
-            return TimetableResponse(**response.json())
-        return APIError(status_code=response.status_code, reason=response.content)
+        params can also be a PreparedQuery of TimetableParams.
+        """
+        query = self._prepare(params, TimetableParams)
+        return self._get(self.timetable_endpoint, self._parse_timetable_datasets, query)
 
     def get_timetable_dataset(
         self, dataset_id: int
@@ -130,17 +647,34 @@ class BODSClient:
         """
 
         url = self.timetable_endpoint + f"{dataset_id}/"
-        response = self._make_request(url)
+        return self._get(url, self._parse_timetable_dataset)
 
-        if response.status_code == HTTPStatus.OK:
-            results = [Timetable(**response.json())]
-            return TimetableResponse(count=1, results=results)
+    def iter_timetable_datasets(
+        self,
+        params: Optional[TimetableParams] = None,
+        max_workers: int = DEFAULT_PAGE_WORKERS,
+    ) -> Iterator[Timetable]:
+        """
+        Iterates over every timetable data set matching params.
 
-        return APIError(status_code=response.status_code, reason=response.content)
+        The first page is fetched to find the total count, the remaining pages are
+        then fetched concurrently while data sets are yielded in order. At most
+        max_workers pages are requested or held in memory at once.
+
+        Args:
+            params: The filters to apply, limit sets the page size.
+            max_workers: The maximum number of pages to fetch concurrently.
+
+        Raises:
+            APIRequestError: If any page could not be fetched.
+        """
+        if params is None:
+            params = TimetableParams()
+        yield from self._iter_datasets(self.get_timetable_datasets, params, max_workers)
 
     def get_fares_datasets(
         self,
-        params: Optional[FaresParams] = None,
+        params: Union[FaresParams, PreparedQuery, None] = None,
     ) -> Union[FaresResponse, APIError]:
         """
         Fetches the fares data sets currently available in the BODS database.
@@ -156,30 +690,71 @@ class BODSClient:
             limit: Maximum number of results to return per page.
             offset: Number to offset results by.
 
+        params can also be a PreparedQuery of FaresParams.
         """
-        if params is None:
-            params = FaresParams()
-
-        params = json.loads(params.model_dump_json(by_alias=True, exclude_none=True))
-        response = self._make_request(self.fares_endpoint, params=params)
-        if response.status_code == 200:
-            return FaresResponse(**response.json())
-        return APIError(status_code=response.status_code, reason=response.content)
+        query = self._prepare(params, FaresParams)
+        return self._get(self.fares_endpoint, self._parse_fares_datasets, query)
 
     def get_fares_dataset(self, dataset_id: int) -> Union[FaresResponse, APIError]:
         """
         Fetches a single fares data sets currently available in the BODS database.
         """
         url = self.fares_endpoint + f"{dataset_id}/"
-        response = self._make_request(url)
-        if response.status_code == 200:
-            results = [Fares(**response.json())]
-            return FaresResponse(count=1, results=results)
-        return APIError(status_code=response.status_code, reason=response.content)
+        return self._get(url, self._parse_fares_dataset)
+
+    def iter_fares_datasets(
+        self,
+        params: Optional[FaresParams] = None,
+        max_workers: int = DEFAULT_PAGE_WORKERS,
+    ) -> Iterator[Fares]:
+        """
+        Iterates over every fares data set matching params.
+
+        See ``iter_timetable_datasets``.
+
+        Raises:
+            APIRequestError: If any page could not be fetched.
+        """
+        if params is None:
+            params = FaresParams()
+        yield from self._iter_datasets(self.get_fares_datasets, params, max_workers)
+
+    def _iter_datasets(
+        self,
+        fetch: Callable[[Any], Any],
+        params: BaseAPIParams,
+        max_workers: int,
+    ) -> Iterator[Any]:
+        page = fetch(params)
+        if isinstance(page, APIError):
+            raise APIRequestError(page)
+        yield from page.results
+
+        offsets = iter(self._page_offsets(params, page.count))
+        pending: Deque[Future] = deque()
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+
+        def submit_next() -> None:
+            offset = next(offsets, None)
+            if offset is not None:
+                page_params = params.model_copy(update={"offset": offset})
+                pending.append(executor.submit(fetch, page_params))
+
+        try:
+            for _ in range(max_workers):
+                submit_next()
+            while pending:
+                page = pending.popleft().result()
+                submit_next()
+                if isinstance(page, APIError):
+                    raise APIRequestError(page)
+                yield from page.results
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
 
     def get_siri_vm_data_feed(
         self,
-        params: Optional[SIRIVMParams] = None,
+        params: Union[SIRIVMParams, PreparedQuery, None] = None,
     ) -> Union[bytes, APIError]:
         """
         Returns a SIRI-VM byte string representation of vehicles currently providing an
@@ -192,16 +767,12 @@ class BODSClient:
             producer_ref: Limit vehicles to created by a certain producer.
             origin_ref: Limit vehicles to those with a certain origin.
             destinaton_ref: Limit vehicles to those heading for a certain destination.
-        """
-
-        if params is None:
-            params = SIRIVMParams()
 
-        params = json.loads(params.model_dump_json(by_alias=True, exclude_none=True))
-        response = self._make_request(self.siri_vm_endpoint, params=params)
-        if response.status_code == HTTPStatus.OK:
-            return response.content
-        return APIError(status_code=response.status_code, reason=response.content)
+        params can also be a PreparedQuery of SIRIVMParams, to poll without
+        serializing the params each time.
+        """
+        query = self._prepare(params, SIRIVMParams)
+        return self._get(self.siri_vm_endpoint, self._parse_siri_vm, query)
 
     def get_siri_vm_data_feed_by_id(self, feed_id: int) -> Union[bytes, APIError]:
         """
@@ -217,26 +788,148 @@ class BODSClient:
             destinaton_ref: Limit vehicles to those heading for a certain destination.
         """
         url = self.siri_vm_endpoint + f"{feed_id}/"
-        response = self._make_request(url)
-        if response.status_code == HTTPStatus.OK:
-            return response.content
-        return APIError(status_code=response.status_code, reason=response.content)
+        return self._get(url, self._parse_siri_vm)
 
-    def get_siri_vm_from_archive(self) -> Union[bytes, APIError]:
+    def get_siri_vm_from_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union[bytes, APIError]:
         """
         Returns a SIRI-VM byte string representation of vehicles currently providing an
         Automatic Vehicle Location from the bulk download file in BODS.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
         """
-        response = self._make_request(self.siri_vm_zip_endpoint)
-        if response.status_code == HTTPStatus.OK:
-            with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
-                with zf.open("siri.xml") as f:
-                    return f.read()
-        return APIError(status_code=response.status_code, reason=response.content)
+        url = self.siri_vm_zip_endpoint
+        return self._measured(
+            url, None, self._read_archive, url, "siri.xml", archive_path, None
+        )
+
+    def open_siri_vm_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union[ArchiveMember, APIError]:
+        """
+        Downloads the SIRI-VM bulk archive and opens siri.xml for streaming.
+
+        The archive is written to a spooled temporary file in chunks, or to
+        archive_path, and siri.xml is decompressed as it is read so neither is ever
+        held in memory as a whole. The returned member should be closed when done.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
+        """
+        url = self.siri_vm_zip_endpoint
+        return self._measured(
+            url, None, self._open_archive, url, "siri.xml", archive_path
+        )
+
+    def iter_siri_vm_from_archive(
+        self,
+        archive_path: Optional[PathType] = None,
+        params: Optional["ActivityFilterType"] = None,
+    ) -> Iterator["VehicleActivity"]:
+        """
+        Yields each VehicleActivity in the SIRI-VM bulk archive as it is parsed.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
+            params: Only yield the activities matching these SIRIVMParams, or for
+            which this predicate is true. Other activities are skipped without
+            building their models.
+
+        Raises:
+            APIRequestError: If the archive could not be downloaded.
+        """
+        url = self.siri_vm_zip_endpoint
+        call = self._start_call(url)
+        if call is not None:
+            yield from self._iter_measured_activities(call, archive_path, params)
+            return
+        member = self._open_archive(url, "siri.xml", archive_path)
+        if isinstance(member, APIError):
+            raise APIRequestError(member)
+        from bods_client.models.siri import Siri
+
+        with member:
+            yield from Siri.iter_vehicle_activities(member.file, params=params)
+
+    def _iter_measured_activities(
+        self,
+        call: CallMetrics,
+        archive_path: Optional[PathType],
+        params: Optional["ActivityFilterType"],
+    ) -> Iterator["VehicleActivity"]:
+        """
+        Yields each VehicleActivity in the SIRI-VM bulk archive, measuring the
+        time spent decompressing and parsing between the activities yielded.
+        """
+        error = None
+        try:
+            token = self._call.set(call)
+            try:
+                member = self._open_archive(call.url, "siri.xml", archive_path)
+            finally:
+                # Calls made by the consumer between activities are their own.
+                self._call.reset(token)
+            if isinstance(member, APIError):
+                raise APIRequestError(member)
+            from bods_client.models.siri import Siri
+
+            with member:
+                reader = TimedReader(member.file, call)
+                activities = Siri.iter_vehicle_activities(reader, params=params)
+                call.objects = 0
+                parse_time = 0.0
+                while True:
+                    started = time.perf_counter()
+                    activity = next(activities, None)
+                    parse_time += time.perf_counter() - started
+                    call.parse_time = parse_time - call.decompress_time
+                    if activity is None:
+                        break
+                    call.objects += 1
+                    yield activity
+        except Exception as exc:
+            error = exc
+            raise
+        finally:
+            self._end_call(call, error=error)
+
+    def _open_archive(
+        self, url: str, name: str, archive_path: Optional[PathType]
+    ) -> Union[ArchiveMember, APIError]:
+        response = self._make_request(url, stream=True)
+        with response:
+            if response.status_code != HTTPStatus.OK:
+                return self._api_error(response)
+            archive = self._timed(
+                "download_time", download_archive, response, archive_path
+            )
+        call = self._call.get() if self.hooks else None
+        if call is not None:
+            call.bytes_received = archive.seek(0, io.SEEK_END)
+            archive.seek(0)
+        return ArchiveMember(archive, name)
+
+    def _read_archive(
+        self,
+        url: str,
+        name: str,
+        archive_path: Optional[PathType],
+        parse: Optional[Callable[[bytes], Any]],
+    ) -> Any:
+        member = self._open_archive(url, name, archive_path)
+        if isinstance(member, APIError):
+            return member
+        with member:
+            content = self._timed("decompress_time", member.read)
+        if parse is None:
+            return content
+        return self._timed("parse_time", parse, content)
 
     def get_gtfs_rt_data_feed(
-        self, params: Optional[GTFSRTParams] = None
-    ) -> Union[FeedMessage, APIError]:
+        self, params: Union[GTFSRTParams, PreparedQuery, None] = None
+    ) -> Union["FeedMessage", APIError]:
         """
         Returns a FeedMessage of vehicles currently providing Automatic Vehicle
         Locations in BODS.
@@ -248,28 +941,63 @@ class BODSClient:
             datetime.
             start_time_before: Limit vehicles to with the start time before this
             datetime.
-        """
-        if params is None:
-            params = GTFSRTParams()
 
-        params = json.loads(params.model_dump_json(by_alias=True, exclude_none=True))
-        response = self._make_request(self.gtfs_rt_endpoint, params=params)
-        if response.status_code == HTTPStatus.OK:
-            message = FeedMessage()
-            message.ParseFromString(response.content)
-            return message
-        return APIError(status_code=response.status_code, reason=response.content)
+        params can also be a PreparedQuery of GTFSRTParams, to poll without
+        serializing the params each time.
+        """
+        query = self._prepare(params, GTFSRTParams)
+        return self._get(self.gtfs_rt_endpoint, self._parse_gtfs_rt, query)
 
-    def get_gtfs_rt_from_archive(self) -> Union[FeedMessage, APIError]:
+    def get_gtfs_rt_from_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union["FeedMessage", APIError]:
         """
         Returns a FeedMessage of vehicles currently providing Automatic Vehicle
         Locations bulk download URL in BODS.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
         """
-        response = self._make_request(self.gtfs_rt_zip_endpoint)
-        if response.status_code == HTTPStatus.OK:
-            with zipfile.ZipFile(io.BytesIO(response.content)) as zf:
-                with zf.open("gtfsrt.bin") as f:
-                    message = FeedMessage()
-                    message.ParseFromString(f.read())
-                    return message
-        return APIError(status_code=response.status_code, reason=response.content)
+        url = self.gtfs_rt_zip_endpoint
+        return self._measured(
+            url,
+            None,
+            self._read_archive,
+            url,
+            "gtfsrt.bin",
+            archive_path,
+            _feed_message,
+        )
+
+    def open_gtfs_rt_archive(
+        self, archive_path: Optional[PathType] = None
+    ) -> Union[ArchiveMember, APIError]:
+        """
+        Downloads the GTFS-RT bulk archive and opens gtfsrt.bin for streaming.
+
+        See ``open_siri_vm_archive``.
+
+        Args:
+            archive_path: Keep the downloaded zip archive at this path.
+        """
+        url = self.gtfs_rt_zip_endpoint
+        return self._measured(
+            url, None, self._open_archive, url, "gtfsrt.bin", archive_path
+        )
+
+    def open_dataset_file(
+        self, dataset: BaseDataset, offset: int = 0
+    ) -> requests.Response:
+        """
+        Requests the TransXChange or NeTEx file of a data set, at its url, for
+        streaming. The response should be closed when done.
+
+        Args:
+            dataset: The Timetable or Fares data set to download.
+            offset: Request the file from this byte onwards with a Range header,
+            servers that ignore it respond with the whole file.
+        """
+        kwargs: Dict[str, Any] = {"stream": True}
+        if offset:
+            kwargs["headers"] = {"Range": f"bytes={offset}-"}
+        return self._make_request(dataset.url, **kwargs)
@@ -0,0 +1,372 @@
+# -*- coding: utf-8 -*-
+"""
+columnar.py a module for storing vehicle positions column by column.
+"""
+
+import importlib
+from array import array
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from bods_client.models._xml import child_elements, child_text
+from bods_client.models.siri import (
+    SIRI_NAMESPACE,
+    ActivityFilterType,
+    SiriParsingError,
+    SiriSource,
+    VehicleActivity,
+    _parse_datetime,
+    iter_vehicle_activity_elements,
+)
+
+_NS_PREFIX = f"{{{SIRI_NAMESPACE}}}"
+
+# The smallest int64, which numpy and arrow both read as a missing timestamp.
+NAT = -(2**63)
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NAN = float("nan")
+
+
+def _import_optional(module: str, extra: str) -> Any:
+    try:
+        return importlib.import_module(module)
+    except ImportError as exc:
+        raise ImportError(
+            f"{module} is required for this conversion, install it with "
+            f"`pip install bods-client[{extra}]`."
+        ) from exc
+
+
+# Empty elements, such as <Bearing/>, are read as missing like absent ones.
+def _to_float(text: Optional[str]) -> float:
+    return float(text) if text else _NAN
+
+
+def _to_epoch_us(value: Optional[datetime]) -> int:
+    """
+    Returns the microseconds since the epoch, naive datetimes are taken as UTC.
+    """
+    if value is None:
+        return NAT
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    delta = value - _EPOCH
+    return (delta.days * 86_400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _text_to_epoch_us(text: Optional[str]) -> int:
+    return _to_epoch_us(_parse_datetime(text)) if text else NAT
+
+
+class DictionaryColumn:
+    """
+    A column of strings stored as int32 codes into a list of unique values.
+
+    Missing values are stored with the code -1.
+    """
+
+    __slots__ = ("codes", "values", "_lookup")
+
+    def __init__(self):
+        self.codes = array("i")
+        self.values: List[str] = []
+        self._lookup: Dict[str, int] = {}
+
+    def _code(self, value: str) -> int:
+        code = self._lookup.get(value)
+        if code is None:
+            code = len(self.values)
+            self._lookup[value] = code
+            self.values.append(value)
+        return code
+
+    def append(self, value: Optional[str]) -> None:
+        self.codes.append(-1 if value is None else self._code(value))
+
+    def extend(self, other: "DictionaryColumn") -> None:
+        """
+        Appends the values of another column, giving the same codes as appending
+        them one at a time.
+        """
+        remap = [self._code(value) for value in other.values]
+        self.codes.extend(-1 if code < 0 else remap[code] for code in other.codes)
+
+    def __len__(self) -> int:
+        return len(self.codes)
+
+    def __getitem__(self, index: int) -> Optional[str]:
+        code = self.codes[index]
+        return None if code < 0 else self.values[code]
+
+    def to_list(self) -> List[Optional[str]]:
+        values = self.values
+        return [None if code < 0 else values[code] for code in self.codes]
+
+
+class VehiclePositions:
+    """
+    Vehicle positions stored as a struct of arrays.
+
+    Longitude, latitude and bearing are float64 arrays with NaN for missing
+    values. Times are int64 arrays of microseconds since the epoch in UTC with
+    ``NAT`` for missing values. References are ``DictionaryColumn``s.
+
+    Every column is an ``array.array`` so the container needs nothing beyond the
+    standard library, ``to_numpy``, ``to_arrow`` and ``to_pandas`` convert it.
+    """
+
+    FLOAT_COLUMNS = ("longitude", "latitude", "bearing")
+    TIME_COLUMNS = ("recorded_at_time", "valid_until_time")
+    REF_COLUMNS = (
+        "item_identifier",
+        "vehicle_ref",
+        "operator_ref",
+        "line_ref",
+        "published_line_name",
+        "direction_ref",
+        "vehicle_journey_ref",
+        "block_ref",
+        "origin_ref",
+        "destination_ref",
+    )
+
+    def __init__(self):
+        self.longitude = array("d")
+        self.latitude = array("d")
+        self.bearing = array("d")
+        self.recorded_at_time = array("q")
+        self.valid_until_time = array("q")
+        self.item_identifier = DictionaryColumn()
+        self.vehicle_ref = DictionaryColumn()
+        self.operator_ref = DictionaryColumn()
+        self.line_ref = DictionaryColumn()
+        self.published_line_name = DictionaryColumn()
+        self.direction_ref = DictionaryColumn()
+        self.vehicle_journey_ref = DictionaryColumn()
+        self.block_ref = DictionaryColumn()
+        self.origin_ref = DictionaryColumn()
+        self.destination_ref = DictionaryColumn()
+
+    def __len__(self) -> int:
+        return len(self.longitude)
+
+    @property
+    def columns(self) -> Dict[str, Any]:
+        names = self.FLOAT_COLUMNS + self.TIME_COLUMNS + self.REF_COLUMNS
+        return {name: getattr(self, name) for name in names}
+
+    def extend(self, other: "VehiclePositions") -> None:
+        """
+        Appends the rows of another VehiclePositions.
+        """
+        for name in self.FLOAT_COLUMNS + self.TIME_COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+        for name in self.REF_COLUMNS:
+            getattr(self, name).extend(getattr(other, name))
+
+    @classmethod
+    def from_siri(
+        cls, source: SiriSource, params: Optional[ActivityFilterType] = None
+    ) -> "VehiclePositions":
+        """
+        Parses a SIRI-VM document straight into columns.
+
+        No pydantic models are created, the document is read incrementally as in
+        ``Siri.iter_vehicle_activities``.
+
+        Args:
+            source: The SIRI-VM document as bytes, a binary file object or a path.
+            params: Only keep the activities matching these SIRIVMParams, or for
+            which this predicate is true, see ``iter_vehicle_activity_elements``.
+        """
+        positions = cls()
+        for element in iter_vehicle_activity_elements(source, params=params):
+            positions._append_element(element)
+        return positions
+
+    def _append_element(self, element) -> None:
+        activity = child_elements(element, _NS_PREFIX)
+        mvj_element = activity.get("MonitoredVehicleJourney")
+        if mvj_element is None:
+            raise SiriParsingError("missing 'MonitoredVehicleJourney'.")
+        journey = child_elements(mvj_element, _NS_PREFIX)
+        location_element = journey.get("VehicleLocation")
+        if location_element is None:
+            raise SiriParsingError("missing 'VehicleLocation'.")
+        location = child_elements(location_element, _NS_PREFIX)
+
+        self.longitude.append(_to_float(child_text(location, "Longitude")))
+        self.latitude.append(_to_float(child_text(location, "Latitude")))
+        self.bearing.append(_to_float(child_text(journey, "Bearing")))
+        self.recorded_at_time.append(
+            _text_to_epoch_us(child_text(activity, "RecordedAtTime"))
+        )
+        self.valid_until_time.append(
+            _text_to_epoch_us(child_text(activity, "ValidUntilTime"))
+        )
+        self.item_identifier.append(child_text(activity, "ItemIdentifier"))
+        self.vehicle_ref.append(child_text(journey, "VehicleRef"))
+        self.operator_ref.append(child_text(journey, "OperatorRef"))
+        self.line_ref.append(child_text(journey, "LineRef"))
+        self.published_line_name.append(child_text(journey, "PublishedLineName"))
+        self.direction_ref.append(child_text(journey, "DirectionRef"))
+        self.vehicle_journey_ref.append(child_text(journey, "VehicleJourneyRef"))
+        self.block_ref.append(child_text(journey, "BlockRef"))
+        self.origin_ref.append(child_text(journey, "OriginRef"))
+        self.destination_ref.append(child_text(journey, "DestinationRef"))
+
+    @classmethod
+    def from_gtfs_rt(cls, message: Union[FeedMessage, bytes]) -> "VehiclePositions":
+        """
+        Converts the vehicle positions in a GTFS-RT feed into columns in one pass.
+
+        Entities without a vehicle position are skipped. The entity id becomes the
+        item_identifier, the vehicle id the vehicle_ref, the trip's route_id,
+        trip_id and direction_id the line_ref, vehicle_journey_ref and
+        direction_ref, and the vehicle timestamp the recorded_at_time.
+
+        Args:
+            message: A FeedMessage or its serialized bytes.
+        """
+        if isinstance(message, bytes):
+            feed = FeedMessage()
+            feed.ParseFromString(message)
+            message = feed
+
+        positions = cls()
+        append_longitude = positions.longitude.append
+        append_latitude = positions.latitude.append
+        append_bearing = positions.bearing.append
+        append_recorded_at = positions.recorded_at_time.append
+        append_valid_until = positions.valid_until_time.append
+        untouched = [
+            positions.operator_ref,
+            positions.published_line_name,
+            positions.block_ref,
+            positions.origin_ref,
+            positions.destination_ref,
+        ]
+
+        for entity in message.entity:
+            vehicle = entity.vehicle
+            if not entity.HasField("vehicle") or not vehicle.HasField("position"):
+                continue
+            position = vehicle.position
+            trip = vehicle.trip
+            has_trip = vehicle.HasField("trip")
+
+            append_longitude(position.longitude)
+            append_latitude(position.latitude)
+            append_bearing(position.bearing if position.HasField("bearing") else _NAN)
+            append_recorded_at(
+                vehicle.timestamp * 1_000_000 if vehicle.HasField("timestamp") else NAT
+            )
+            append_valid_until(NAT)
+            positions.item_identifier.append(entity.id)
+            positions.vehicle_ref.append(
+                vehicle.vehicle.id if vehicle.vehicle.HasField("id") else None
+            )
+            positions.line_ref.append(
+                trip.route_id if has_trip and trip.HasField("route_id") else None
+            )
+            positions.vehicle_journey_ref.append(
+                trip.trip_id if has_trip and trip.HasField("trip_id") else None
+            )
+            positions.direction_ref.append(
+                str(trip.direction_id)
+                if has_trip and trip.HasField("direction_id")
+                else None
+            )
+            for column in untouched:
+                column.append(None)
+        return positions
+
+    @classmethod
+    def from_vehicle_activities(
+        cls, activities: Iterable[VehicleActivity]
+    ) -> "VehiclePositions":
+        """
+        Builds the columns from already parsed VehicleActivity objects.
+        """
+        positions = cls()
+        for activity in activities:
+            mvj = activity.monitored_vehicle_journey
+            location = mvj.vehicle_location
+            positions.longitude.append(_NAN if location is None else location.longitude)
+            positions.latitude.append(_NAN if location is None else location.latitude)
+            positions.bearing.append(_NAN if mvj.bearing is None else mvj.bearing)
+            positions.recorded_at_time.append(_to_epoch_us(activity.recorded_at_time))
+            positions.valid_until_time.append(_to_epoch_us(activity.valid_until_time))
+            positions.item_identifier.append(activity.item_identifier)
+            positions.vehicle_ref.append(mvj.vehicle_ref)
+            positions.operator_ref.append(mvj.operator_ref)
+            positions.line_ref.append(mvj.line_ref)
+            positions.published_line_name.append(mvj.published_line_name)
+            positions.direction_ref.append(mvj.direction_ref)
+            positions.vehicle_journey_ref.append(mvj.vehicle_journey_ref)
+            positions.block_ref.append(mvj.block_ref)
+            positions.origin_ref.append(mvj.origin_ref)
+            positions.destination_ref.append(mvj.destination_ref)
+        return positions
+
+    def to_numpy(self) -> Dict[str, Any]:
+        """
+        Returns the columns as NumPy arrays without copying them.
+
+        Floats are float64, times are datetime64[us] and references are their int32
+        codes, the decoded values are in each column's ``values`` list.
+        """
+        np = _import_optional("numpy", "numpy")
+        arrays = {}
+        for name in self.FLOAT_COLUMNS:
+            arrays[name] = np.frombuffer(getattr(self, name), dtype=np.float64)
+        for name in self.TIME_COLUMNS:
+            times = np.frombuffer(getattr(self, name), dtype=np.int64)
+            arrays[name] = times.view("datetime64[us]")
+        for name in self.REF_COLUMNS:
+            arrays[name] = np.frombuffer(getattr(self, name).codes, dtype=np.int32)
+        return arrays
+
+    def to_arrow(self) -> Any:
+        """
+        Returns the columns as a ``pyarrow.Table``, references become dictionary
+        arrays and times UTC timestamps.
+        """
+        pa = _import_optional("pyarrow", "arrow")
+        arrays = self.to_numpy()
+        columns = {}
+        for name in self.FLOAT_COLUMNS:
+            columns[name] = pa.array(arrays[name])
+        for name in self.TIME_COLUMNS:
+            times = arrays[name].view("int64")
+            columns[name] = pa.array(
+                times, type=pa.timestamp("us", tz="UTC"), mask=times == NAT
+            )
+        for name in self.REF_COLUMNS:
+            codes = arrays[name]
+            columns[name] = pa.DictionaryArray.from_arrays(
+                pa.array(codes, mask=codes < 0),
+                pa.array(getattr(self, name).values, type=pa.string()),
+            )
+        return pa.table(columns)
+
+    def to_pandas(self) -> Any:
+        """
+        Returns the columns as a ``pandas.DataFrame``, references become
+        categoricals and times UTC timestamps.
+        """
+        pd = _import_optional("pandas", "pandas")
+        arrays = self.to_numpy()
+        columns = {}
+        for name in self.FLOAT_COLUMNS:
+            columns[name] = arrays[name]
+        for name in self.TIME_COLUMNS:
+            columns[name] = pd.DatetimeIndex(arrays[name]).tz_localize("UTC")
+        for name in self.REF_COLUMNS:
+            columns[name] = pd.Categorical.from_codes(
+                arrays[name], categories=getattr(self, name).values
+            )
+        return pd.DataFrame(columns)
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+conditional.py a module for tracking HTTP validators for conditional requests.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, NamedTuple, Optional
+
+from bods_client.constants import DEFAULT_VALIDATOR_MAX_ENTRIES
+
+
+class ValidatedResult(NamedTuple):
+    etag: Optional[str]
+    last_modified: Optional[str]
+    result: Any
+
+
+class ValidatorCache:
+    """
+    Stores the ETag and Last-Modified validators, and the parsed result, of the
+    last successful response for each url. Urls include their query string, but
+    not the api_key which is added to each request separately.
+
+    The cache is safe to share between threads.
+
+    Args:
+        max_entries: The number of urls kept before the least recently used one
+        is evicted, as each entry holds a parsed result.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_VALIDATOR_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, ValidatedResult]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def headers(self, url: str) -> Dict[str, str]:
+        """
+        Returns the conditional headers to send for a request.
+        """
+        entry = self.get(url)
+        headers: Dict[str, str] = {}
+        if entry is not None:
+            if entry.etag is not None:
+                headers["If-None-Match"] = entry.etag
+            if entry.last_modified is not None:
+                headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def get(self, url: str) -> Optional[ValidatedResult]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    def store(self, url: str, response, result: Any) -> None:
+        """
+        Stores the validators of response with its parsed result, responses
+        without validators are not stored.
+        """
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        with self._lock:
+            if etag is None and last_modified is None:
+                self._entries.pop(url, None)
+            else:
+                self._entries[url] = ValidatedResult(etag, last_modified, result)
+                self._entries.move_to_end(url)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
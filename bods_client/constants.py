@@ -13,6 +13,41 @@ FARES_PATH = "fares/dataset"
 GTFS_RT_PATH = "gtfsrtdatafeed"
 SIRI_VM_PATH = "datafeed"
 
+DEFAULT_TIMEOUT = 60
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_CONCURRENCY = 10
+DEFAULT_PAGE_WORKERS = 4
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+DEFAULT_SPOOL_SIZE = 16 * 1024 * 1024
+DEFAULT_DOWNLOAD_WORKERS = 4
+DEFAULT_CACHE_MAX_ENTRIES = 1024
+DEFAULT_VALIDATOR_MAX_ENTRIES = 128
+DEFAULT_SYNC_PAGE_SIZE = 100
+DEFAULT_POLL_MIN_INTERVAL = 5.0
+DEFAULT_POLL_MAX_INTERVAL = 300.0
+DEFAULT_POLL_BACKOFF = 2.0
+DEFAULT_RETRY_BACKOFF = 0.5
+DEFAULT_RETRY_MAX_BACKOFF = 30.0
+DEFAULT_RETRY_DEADLINE = 60.0
+DEFAULT_RETRY_STATUSES = (429, 500, 502, 503, 504)
+# About 1.1km north to south and 0.7km east to west in Great Britain.
+DEFAULT_CELL_SIZE = 0.01
+DEFAULT_PARSE_CHUNK_SIZE = 4 * 1024 * 1024
+
+TIMETABLES = "timetables"
+FARES = "fares"
+SIRI_VM = "siri_vm"
+GTFS_RT = "gtfs_rt"
+ARCHIVE = "archive"
+# The endpoint names reported to instrumentation hooks for the bulk archives.
+SIRI_VM_ARCHIVE = "siri_vm_archive"
+GTFS_RT_ARCHIVE = "gtfs_rt_archive"
+
+# Seconds to cache responses from each endpoint, dataset metadata changes rarely
+# while SIRI-VM responses are cached for their ShortestPossibleCycle when given.
+DEFAULT_CACHE_TTLS = {TIMETABLES: 3600.0, FARES: 3600.0, SIRI_VM: 10.0, GTFS_RT: 10.0}
+
 DATASET_STATUSES = ["published", "error", "expired", "inactive"]
 
 OK_200 = 200
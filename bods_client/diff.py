@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+diff.py a module for finding what changed between successive SIRI-VM snapshots.
+"""
+
+from typing import Callable, Dict, Hashable, List, NamedTuple, Optional, Union
+
+from bods_client.geo import haversine
+from bods_client.models.siri import (
+    MonitoredVehicleJourney,
+    Siri,
+    SiriSource,
+    VehicleActivity,
+)
+
+KeyFunction = Callable[[VehicleActivity], Hashable]
+
+
+def vehicle_key(activity: VehicleActivity) -> Hashable:
+    """
+    Keys an activity by its operator and vehicle, vehicle refs are only unique
+    within an operator.
+    """
+    mvj = activity.monitored_vehicle_journey
+    return mvj.operator_ref, mvj.vehicle_ref
+
+
+def item_key(activity: VehicleActivity) -> Hashable:
+    """
+    Keys an activity by its ItemIdentifier.
+    """
+    return activity.item_identifier
+
+
+def _journey_hash(mvj: MonitoredVehicleJourney) -> int:
+    framed = mvj.framed_vehicle_journey_ref
+    return hash(
+        (
+            mvj.line_ref,
+            mvj.direction_ref,
+            mvj.vehicle_journey_ref,
+            mvj.block_ref,
+            mvj.origin_ref,
+            mvj.destination_ref,
+            None if framed is None else framed.dated_vehicle_journey_ref,
+            None if framed is None else framed.data_frame_ref,
+        )
+    )
+
+
+class _VehicleState(NamedTuple):
+    longitude: Optional[float]
+    latitude: Optional[float]
+    bearing: Optional[float]
+    journey: int
+
+
+class SnapshotDiff(NamedTuple):
+    added: List[VehicleActivity]
+    updated: List[VehicleActivity]
+    removed: List[Hashable]
+    unchanged: int
+
+
+class SnapshotDiffer:
+    """
+    Keeps the last SIRI-VM snapshot and reports the vehicles that were added,
+    updated or removed in each new one.
+
+    A vehicle is updated when it moves further than distance_threshold, turns
+    by more than bearing_threshold, or its journey changes. Journeys are
+    compared by the hash of their references. The previous state is only
+    replaced when a vehicle is reported as updated, so many small moves below
+    the threshold still add up to an update.
+
+    Args:
+        distance_threshold: The distance in metres a vehicle must move.
+        bearing_threshold: The change in degrees a vehicle's bearing must exceed.
+        key: A function returning the key to track each activity by, by default
+        ``vehicle_key``.
+    """
+
+    def __init__(
+        self,
+        distance_threshold: float = 0.0,
+        bearing_threshold: float = 0.0,
+        key: KeyFunction = vehicle_key,
+    ):
+        self.distance_threshold = distance_threshold
+        self.bearing_threshold = bearing_threshold
+        self.key = key
+        self._states: Dict[Hashable, _VehicleState] = {}
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def reset(self) -> None:
+        """
+        Forgets the previous snapshot, so every vehicle is added on the next update.
+        """
+        self._states.clear()
+
+    def update(self, snapshot: Union[Siri, SiriSource]) -> SnapshotDiff:
+        """
+        Compares a snapshot with the previous one and keeps it for the next call.
+
+        Only the first activity for each key in a snapshot is considered.
+
+        Args:
+            snapshot: A parsed Siri object, or a raw SIRI-VM document as bytes, a
+            binary file object or a path which is parsed incrementally.
+        """
+        if isinstance(snapshot, Siri):
+            delivery = snapshot.service_delivery.vehicle_monitoring_delivery
+            activities = iter(delivery.vehicle_activities)
+        else:
+            activities = Siri.iter_vehicle_activities(snapshot)
+
+        previous = self._states
+        states: Dict[Hashable, _VehicleState] = {}
+        added: List[VehicleActivity] = []
+        updated: List[VehicleActivity] = []
+        unchanged = 0
+        key = self.key
+        for activity in activities:
+            activity_key = key(activity)
+            if activity_key in states:
+                continue
+            state = self._state(activity)
+            old = previous.get(activity_key)
+            if old is None:
+                added.append(activity)
+            elif self._changed(old, state):
+                updated.append(activity)
+            else:
+                state = old
+                unchanged += 1
+            states[activity_key] = state
+
+        removed = [k for k in previous if k not in states]
+        self._states = states
+        return SnapshotDiff(added, updated, removed, unchanged)
+
+    @staticmethod
+    def _state(activity: VehicleActivity) -> _VehicleState:
+        mvj = activity.monitored_vehicle_journey
+        location = mvj.vehicle_location
+        if location is None:
+            return _VehicleState(None, None, mvj.bearing, _journey_hash(mvj))
+        return _VehicleState(
+            location.longitude, location.latitude, mvj.bearing, _journey_hash(mvj)
+        )
+
+    def _changed(self, old: _VehicleState, new: _VehicleState) -> bool:
+        if old.journey != new.journey:
+            return True
+
+        if old.longitude is None or new.longitude is None:
+            if old.longitude is not new.longitude:
+                return True
+        elif (old.longitude, old.latitude) != (new.longitude, new.latitude):
+            distance = haversine(
+                old.longitude, old.latitude, new.longitude, new.latitude
+            )
+            if distance > self.distance_threshold:
+                return True
+
+        if old.bearing is None or new.bearing is None:
+            return old.bearing is not new.bearing
+        turn = abs(old.bearing - new.bearing) % 360
+        return min(turn, 360 - turn) > self.bearing_threshold
@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+download.py a module for downloading the files of timetable and fares data sets.
+"""
+
+import hashlib
+import json
+import os
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, NamedTuple, Optional, Union
+
+import requests
+
+from bods_client.client import BODSClient
+from bods_client.constants import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_DOWNLOAD_WORKERS,
+    FARES,
+    TIMETABLES,
+)
+from bods_client.models import APIError, Fares
+from bods_client.models.base import BaseAPIResponse, BaseDataset
+
+PathType = Union[str, "os.PathLike[str]"]
+
+DOWNLOADED = "downloaded"
+RESUMED = "resumed"
+SKIPPED = "skipped"
+FAILED = "failed"
+
+
+class DownloadResult(NamedTuple):
+    dataset: BaseDataset
+    path: Path
+    status: str
+    size: int
+    sha256: Optional[str]
+    error: Optional[Union[APIError, Exception]]
+
+
+def _sha256_file(path: Path, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Any:
+    digest = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest
+
+
+class DatasetDownloader:
+    """
+    Downloads the TransXChange and NeTEx files of data sets to a directory.
+
+    Each file is saved as ``<directory>/<timetables|fares>/<id>.<extension>``
+    alongside a ``.json`` manifest of the data set's modified time and the file's
+    SHA-256, size and modification time. A file is skipped if the manifest's
+    modified time matches the data set's and the file's size and modification
+    time are unchanged. The file is only hashed again if they have changed, and
+    is downloaded again if its hash no longer matches.
+
+    Files are streamed to a ``.part`` file which is renamed when complete. An
+    interrupted download is resumed with a Range request if the data set has not
+    been modified since, and started again if the server does not honour it.
+
+    Args:
+        client: The client to download with, its rate limiter and retry policy
+        apply to every request.
+        directory: The directory to save the files in.
+        max_workers: The number of files to download at once.
+        chunk_size: The number of bytes to read from a response at a time.
+    """
+
+    def __init__(
+        self,
+        client: BODSClient,
+        directory: PathType,
+        max_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+    ):
+        self.client = client
+        self.directory = Path(directory)
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+
+    def path(self, dataset: BaseDataset) -> Path:
+        """
+        Returns where the file of dataset is saved.
+        """
+        kind = FARES if isinstance(dataset, Fares) else TIMETABLES
+        extension = getattr(dataset, "extension", None) or "zip"
+        return self.directory / kind / f"{dataset.id}.{extension}"
+
+    def download(
+        self, datasets: Union[BaseAPIResponse, Iterable[BaseDataset]]
+    ) -> Iterator[DownloadResult]:
+        """
+        Downloads the files of several data sets at once, yielding a
+        DownloadResult for each in the order given.
+
+        A failed download is reported in its result rather than raised, so the
+        remaining files are still downloaded.
+
+        Args:
+            datasets: A TimetableResponse or FaresResponse, or an iterable of
+            Timetable and Fares data sets such as ``iter_timetable_datasets``.
+        """
+        results = getattr(datasets, "results", None)
+        remaining = iter(datasets if results is None else results)
+        pending: Deque[Future] = deque()
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+
+        def submit_next() -> None:
+            dataset = next(remaining, None)
+            if dataset is not None:
+                pending.append(executor.submit(self.download_one, dataset))
+
+        try:
+            for _ in range(self.max_workers):
+                submit_next()
+            while pending:
+                result = pending.popleft().result()
+                submit_next()
+                yield result
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def download_one(self, dataset: BaseDataset) -> DownloadResult:
+        """
+        Downloads the file of a single data set unless it is already up to date.
+
+        Request errors, and errors writing the file or its manifest such as a full
+        disk, are reported in the result rather than raised.
+        """
+        path = self.path(dataset)
+        try:
+            return self._download(dataset, path)
+        except (requests.RequestException, OSError, ValueError) as exc:
+            return DownloadResult(dataset, path, FAILED, 0, None, exc)
+
+    def _download(self, dataset: BaseDataset, path: Path) -> DownloadResult:
+        manifest_path = path.with_name(path.name + ".json")
+        part_path = path.with_name(path.name + ".part")
+        modified = dataset.modified.isoformat()
+        manifest = self._read_manifest(manifest_path)
+        current = manifest is not None and manifest.get("modified") == modified
+
+        if current and manifest.get("sha256") is not None and path.exists():
+            stat = path.stat()
+            sha256 = manifest["sha256"]
+            recorded = (manifest.get("size"), manifest.get("mtime_ns"))
+            if recorded != (stat.st_size, stat.st_mtime_ns):
+                # The file has been touched since it was downloaded, so only skip
+                # it if its contents are unchanged.
+                if _sha256_file(path, self.chunk_size).hexdigest() != sha256:
+                    sha256 = None
+                else:
+                    self._write_manifest(manifest_path, dataset, sha256, stat)
+            if sha256 is not None:
+                return DownloadResult(
+                    dataset, path, SKIPPED, stat.st_size, sha256, None
+                )
+
+        offset = 0
+        if current and manifest.get("sha256") is None and part_path.exists():
+            offset = part_path.stat().st_size
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            part_path.unlink(missing_ok=True)
+            self._write_manifest(manifest_path, dataset, None, None)
+
+        return self._fetch(dataset, path, part_path, manifest_path, offset)
+
+    def _fetch(
+        self,
+        dataset: BaseDataset,
+        path: Path,
+        part_path: Path,
+        manifest_path: Path,
+        offset: int,
+    ) -> DownloadResult:
+        with self.client.open_dataset_file(dataset, offset=offset) as response:
+            status = response.status_code
+            if offset and status == HTTPStatus.PARTIAL_CONTENT:
+                content_range = response.headers.get("Content-Range", "")
+                resumed = content_range.startswith(f"bytes {offset}-")
+            else:
+                resumed = False
+
+            restart = (
+                HTTPStatus.PARTIAL_CONTENT,
+                HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE,
+            )
+            if offset and not resumed and status in restart:
+                # The part doesn't match the file on the server, so start again.
+                response.close()
+                part_path.unlink()
+                return self._fetch(dataset, path, part_path, manifest_path, 0)
+            if not resumed and status != HTTPStatus.OK:
+                error = APIError(status_code=status, reason=response.content)
+                return DownloadResult(dataset, path, FAILED, 0, None, error)
+
+            if resumed:
+                digest = _sha256_file(part_path, self.chunk_size)
+                mode = "ab"
+            else:
+                digest = hashlib.sha256()
+                mode = "wb"
+            with part_path.open(mode) as f:
+                for chunk in response.iter_content(chunk_size=self.chunk_size):
+                    digest.update(chunk)
+                    f.write(chunk)
+
+        part_path.replace(path)
+        stat = path.stat()
+        sha256 = digest.hexdigest()
+        self._write_manifest(manifest_path, dataset, sha256, stat)
+        return DownloadResult(
+            dataset,
+            path,
+            RESUMED if resumed else DOWNLOADED,
+            stat.st_size,
+            sha256,
+            None,
+        )
+
+    @staticmethod
+    def _read_manifest(path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with path.open() as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return manifest if isinstance(manifest, dict) else None
+
+    @staticmethod
+    def _write_manifest(
+        path: Path,
+        dataset: BaseDataset,
+        sha256: Optional[str],
+        stat: Optional[os.stat_result],
+    ) -> None:
+        manifest = {
+            "id": dataset.id,
+            "url": dataset.url,
+            "modified": dataset.modified.isoformat(),
+            "sha256": sha256,
+            "size": None if stat is None else stat.st_size,
+            "mtime_ns": None if stat is None else stat.st_mtime_ns,
+        }
+        temporary = path.with_name(path.name + ".tmp")
+        with temporary.open("w") as f:
+            json.dump(manifest, f)
+        temporary.replace(path)
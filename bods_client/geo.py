@@ -0,0 +1,23 @@
+# -*- coding: utf-8 -*-
+"""
+geo.py a module of geographic helpers.
+"""
+
+from math import asin, cos, radians, sin, sqrt
+
+# The mean radius of the Earth in metres.
+EARTH_RADIUS = 6_371_008.8
+
+
+def haversine(
+    longitude1: float, latitude1: float, longitude2: float, latitude2: float
+) -> float:
+    """
+    Returns the great-circle distance in metres between two points in degrees.
+    """
+    lat1 = radians(latitude1)
+    lat2 = radians(latitude2)
+    dlat = sin((lat2 - lat1) / 2)
+    dlon = sin(radians(longitude2 - longitude1) / 2)
+    a = dlat * dlat + cos(lat1) * cos(lat2) * dlon * dlon
+    return 2 * EARTH_RADIUS * asin(min(1.0, sqrt(a)))
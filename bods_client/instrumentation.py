@@ -0,0 +1,338 @@
+# -*- coding: utf-8 -*-
+"""
+instrumentation.py a module for measuring the requests made by the BODS client.
+"""
+
+import bisect
+import logging
+import threading
+import time
+from typing import IO, Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class CallMetrics:
+    """
+    The measurements of one call to a client method, passed to each hook once the
+    call has finished.
+
+    Times are in seconds and are None if the call did not reach that stage. Each
+    page fetched by ``iter_timetable_datasets`` and ``iter_fares_datasets`` is a
+    call of its own.
+
+    Attributes:
+        endpoint: The endpoint called, such as ``"timetables"``, ``"siri_vm"`` or
+        ``"siri_vm_archive"``.
+        url: The url requested.
+        params: The query parameters sent, without the api key.
+        status: The status of the response, None if the request raised an error
+        or the response was cached.
+        cached: True if the response body came from the client's cache.
+        bytes_received: The size of the response body.
+        time_to_first_byte: The time from sending the request to receiving the
+        response headers.
+        download_time: The time taken to receive the response body after its
+        headers.
+        decompress_time: The time spent decompressing a bulk archive.
+        parse_time: The time spent parsing the response into the result.
+        duration: The time the whole call took.
+        objects: The number of data sets, vehicle activities or feed entities in
+        the result, None if it was not parsed into them.
+        retries: The number of times the request was retried.
+        error: The exception the call raised, if any.
+    """
+
+    __slots__ = (
+        "endpoint",
+        "url",
+        "params",
+        "status",
+        "cached",
+        "bytes_received",
+        "time_to_first_byte",
+        "download_time",
+        "decompress_time",
+        "parse_time",
+        "duration",
+        "objects",
+        "retries",
+        "error",
+        "_started",
+    )
+
+    def __init__(
+        self, endpoint: str, url: str, params: Optional[Dict[str, Any]] = None
+    ):
+        self.endpoint = endpoint
+        self.url = url
+        self.params = params
+        self.status: Optional[int] = None
+        self.cached = False
+        self.bytes_received: Optional[int] = None
+        self.time_to_first_byte: Optional[float] = None
+        self.download_time: Optional[float] = None
+        self.decompress_time: Optional[float] = None
+        self.parse_time: Optional[float] = None
+        self.duration: Optional[float] = None
+        self.objects: Optional[int] = None
+        self.retries = 0
+        self.error: Optional[BaseException] = None
+        self._started = time.perf_counter()
+
+    def finish(self) -> None:
+        self.duration = time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__[:-1]}
+
+    def __repr__(self) -> str:
+        fields = ", ".join(
+            f"{name}={value!r}" for name, value in self.as_dict().items()
+        )
+        return f"CallMetrics({fields})"
+
+
+CallHook = Callable[[CallMetrics], None]
+
+
+class TimedReader:
+    """
+    Wraps a file, adding the time spent in read to metrics.decompress_time.
+    """
+
+    def __init__(self, file: IO[bytes], metrics: CallMetrics):
+        self.file = file
+        self.metrics = metrics
+        metrics.decompress_time = metrics.decompress_time or 0.0
+
+    def read(self, size: int = -1) -> bytes:
+        started = time.perf_counter()
+        data = self.file.read(size)
+        self.metrics.decompress_time += time.perf_counter() - started  # type: ignore
+        return data
+
+
+def _format(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.3f}s"
+
+
+class LoggingHook:
+    """
+    Logs a line for every call.
+
+    Args:
+        logger: The logger to log to, ``bods_client.instrumentation`` by default.
+        level: The level to log calls at, calls that failed are logged as warnings.
+    """
+
+    def __init__(
+        self, logger: Optional[logging.Logger] = None, level: int = logging.INFO
+    ):
+        self.logger = logger or logging.getLogger(__name__)
+        self.level = level
+
+    def __call__(self, metrics: CallMetrics) -> None:
+        failed = metrics.error is not None
+        if metrics.status is not None and metrics.status >= 400:
+            failed = True
+        level = logging.WARNING if failed else self.level
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(
+            level,
+            "%s %s status=%s cached=%s bytes=%s ttfb=%s download=%s "
+            "decompress=%s parse=%s total=%s objects=%s retries=%s error=%r",
+            metrics.endpoint,
+            metrics.url,
+            metrics.status,
+            metrics.cached,
+            metrics.bytes_received,
+            _format(metrics.time_to_first_byte),
+            _format(metrics.download_time),
+            _format(metrics.decompress_time),
+            _format(metrics.parse_time),
+            _format(metrics.duration),
+            metrics.objects,
+            metrics.retries,
+            metrics.error,
+            extra={"bods_metrics": metrics},
+        )
+
+
+def _labels(names: Sequence[str], values: Tuple[str, ...]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Counter:
+    """
+    A Prometheus style counter with labels.
+    """
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: Tuple[str, ...] = (), amount: float = 1.0) -> None:
+        with self._lock:
+            self.values[labels] = self.values.get(labels, 0.0) + amount
+
+    def get(self, labels: Tuple[str, ...] = ()) -> float:
+        return self.values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} counter",
+        ]
+        with self._lock:
+            for labels, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Histogram:
+    """
+    A Prometheus style histogram with labels and cumulative buckets.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # The count in each bucket, not cumulative, then the sum and the count.
+        self.values: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: Tuple[str, ...] = ()) -> None:
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self.values.get(labels)
+            if entry is None:
+                entry = self.values[labels] = ([0] * (len(self.buckets) + 1), [0.0, 0])
+            entry[0][index] += 1
+            entry[1][0] += value
+            entry[1][1] += 1
+
+    def count(self, labels: Tuple[str, ...] = ()) -> int:
+        entry = self.values.get(labels)
+        return 0 if entry is None else int(entry[1][1])
+
+    def sum(self, labels: Tuple[str, ...] = ()) -> float:
+        entry = self.values.get(labels)
+        return 0.0 if entry is None else entry[1][0]
+
+    def render(self) -> List[str]:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} histogram",
+        ]
+        names = self.label_names + ("le",)
+        with self._lock:
+            for labels, (counts, (total, count)) in sorted(self.values.items()):
+                cumulative = 0
+                bounds = [str(bound) for bound in self.buckets] + ["+Inf"]
+                for bound, bucket_count in zip(bounds, counts):
+                    cumulative += bucket_count
+                    bucket_labels = _labels(names, labels + (bound,))
+                    lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+                label_text = _labels(self.label_names, labels)
+                lines.append(f"{self.name}_sum{label_text} {total}")
+                lines.append(f"{self.name}_count{label_text} {int(count)}")
+        return lines
+
+
+class PrometheusHook:
+    """
+    Keeps Prometheus style counters and histograms of every call, by endpoint.
+
+    ``render`` returns them in the Prometheus text exposition format, to serve
+    from a metrics endpoint. The metrics are kept in memory, no Prometheus client
+    library is needed.
+
+    Args:
+        namespace: The prefix of every metric name.
+        buckets: The upper bounds of the histogram buckets, in seconds.
+    """
+
+    PHASES = (
+        ("time_to_first_byte", "Time from sending a request to its headers."),
+        ("download_time", "Time to receive response bodies."),
+        ("decompress_time", "Time to decompress bulk archives."),
+        ("parse_time", "Time to parse responses."),
+        ("duration", "Time taken by each call."),
+    )
+
+    def __init__(
+        self, namespace: str = "bods_client", buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.calls = Counter(
+            f"{namespace}_calls_total",
+            "Calls by endpoint and status.",
+            ("endpoint", "status"),
+        )
+        self.retries = Counter(
+            f"{namespace}_retries_total", "Retried requests.", ("endpoint",)
+        )
+        self.bytes_received = Counter(
+            f"{namespace}_received_bytes_total", "Response bytes.", ("endpoint",)
+        )
+        self.objects = Counter(
+            f"{namespace}_objects_total", "Objects parsed.", ("endpoint",)
+        )
+        self.histograms = {
+            phase: Histogram(
+                f"{namespace}_{phase.replace('_time', '')}_seconds",
+                documentation,
+                ("endpoint",),
+                buckets,
+            )
+            for phase, documentation in self.PHASES
+        }
+
+    def __call__(self, metrics: CallMetrics) -> None:
+        endpoint = (metrics.endpoint,)
+        if metrics.error is not None:
+            status = "error"
+        elif metrics.cached:
+            status = "cached"
+        else:
+            status = str(metrics.status)
+        self.calls.inc((metrics.endpoint, status))
+        if metrics.retries:
+            self.retries.inc(endpoint, metrics.retries)
+        if metrics.bytes_received is not None:
+            self.bytes_received.inc(endpoint, metrics.bytes_received)
+        if metrics.objects is not None:
+            self.objects.inc(endpoint, metrics.objects)
+        for phase, histogram in self.histograms.items():
+            value = getattr(metrics, phase)
+            if value is not None:
+                histogram.observe(value, endpoint)
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        metrics = [self.calls, self.retries, self.bytes_received, self.objects]
+        lines: List[str] = []
+        for metric in [*metrics, *self.histograms.values()]:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
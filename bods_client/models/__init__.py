@@ -1,11 +1,13 @@
+from typing import Any
+
 from .avl import GTFSRTParams, SIRIVMParams
-from .base import APIError, BoundingBox
+from .base import APIError, APIRequestError, BoundingBox
 from .fares import Fares, FaresParams, FaresResponse
-from .siri import Siri
 from .timetables import Timetable, TimetableParams, TimetableResponse
 
 __all__ = [
     "APIError",
+    "APIRequestError",
     "BoundingBox",
     "Fares",
     "FaresParams",
@@ -17,3 +19,12 @@ __all__ = [
     "TimetableParams",
     "TimetableResponse",
 ]
+
+
+def __getattr__(name: str) -> Any:
+    # Siri needs lxml, which is slow to import, so it is imported on first use.
+    if name == "Siri":
+        from .siri import Siri
+
+        return Siri
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
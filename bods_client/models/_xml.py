@@ -0,0 +1,125 @@
+"""
+_xml.py helpers shared by the SIRI-VM, TransXChange and NeTEx parsers.
+"""
+
+import io
+import os
+import zipfile
+from typing import IO, Dict, Iterator, Optional, Tuple, Union
+
+from lxml.etree import _Element
+
+from bods_client.archive import spool_stream
+from bods_client.constants import DEFAULT_SPOOL_SIZE
+
+XMLSource = Union[bytes, str, "os.PathLike[str]", IO[bytes]]
+Document = Union[str, "os.PathLike[str]", IO[bytes]]
+
+# A zip archive starts with a local file header, or the end of central directory
+# record if it is empty.
+_ZIP_SIGNATURES = (b"PK\x03\x04", b"PK\x05\x06")
+_SIGNATURE_SIZE = 4
+
+
+def child_elements(element: _Element, prefix: str) -> Dict[str, _Element]:
+    """
+    Maps the local name of each child of element in the namespace of prefix to
+    the first such child.
+
+    Reading every child once is much cheaper than a namespaced findtext per field.
+    """
+    children: Dict[str, _Element] = {}
+    length = len(prefix)
+    for child in element:
+        tag = child.tag
+        if isinstance(tag, str) and tag.startswith(prefix):
+            children.setdefault(tag[length:], child)
+    return children
+
+
+def child_text(children: Dict[str, _Element], name: str) -> Optional[str]:
+    """
+    Returns the text of the child called name, "" if it is empty or None if it is
+    missing.
+    """
+    child = children.get(name)
+    if child is None:
+        return None
+    return child.text or ""
+
+
+class _PrefixedStream:
+    """
+    A forward-only stream with the bytes already read from it put back in front.
+    """
+
+    def __init__(self, prefix: bytes, stream: IO[bytes]):
+        self._prefix = prefix
+        self._stream = stream
+
+    def read(self, size: int = -1) -> bytes:
+        prefix = self._prefix
+        if not prefix:
+            return self._stream.read(size)
+        if size is None or size < 0:
+            self._prefix = b""
+            return prefix + self._stream.read()
+        self._prefix = prefix[size:]
+        return prefix[:size]
+
+
+def _seekable(stream: IO[bytes]) -> bool:
+    seekable = getattr(stream, "seekable", None)
+    return seekable is not None and seekable()
+
+
+def iter_documents(
+    source: XMLSource, spool_size: int = DEFAULT_SPOOL_SIZE
+) -> Iterator[Tuple[Document, Optional[str]]]:
+    """
+    Yields each XML document in source, and its file name, which is either a
+    single document or a zip archive of them.
+
+    A seekable file object is read from the start. A forward-only stream, such as
+    an ``ArchiveMember.file`` or an HTTP response body, is read from where it is.
+    A document in one is parsed straight from the stream, while a zip archive is
+    first copied to a temporary file that only rolls over to disk beyond
+    spool_size bytes, as zipfile needs to seek.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    if isinstance(source, (str, os.PathLike)):
+        if not zipfile.is_zipfile(source):
+            yield source, os.path.basename(source)
+            return
+        yield from _iter_archive(source)
+        return
+
+    name = getattr(source, "name", None)
+    if _seekable(source):
+        source.seek(0)
+        signature = source.read(_SIGNATURE_SIZE)
+        source.seek(0)
+        if signature not in _ZIP_SIGNATURES:
+            yield source, name
+            return
+        yield from _iter_archive(source)
+        return
+
+    signature = source.read(_SIGNATURE_SIZE)
+    if signature not in _ZIP_SIGNATURES:
+        yield _PrefixedStream(signature, source), name
+        return
+    with spool_stream(
+        _PrefixedStream(signature, source), spool_size=spool_size
+    ) as archive:
+        yield from _iter_archive(archive)
+
+
+def _iter_archive(source: Document) -> Iterator[Tuple[Document, Optional[str]]]:
+    with zipfile.ZipFile(source) as archive:
+        for info in archive.infolist():
+            if info.filename.lower().endswith(".xml"):
+                with archive.open(info) as document:
+                    yield document, info.filename
@@ -1,6 +1,6 @@
 import json
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic import BaseModel
 from pydantic.config import ConfigDict
@@ -42,6 +42,16 @@ class APIError(BaseModel):
     reason: str
 
 
+class APIRequestError(Exception):
+    """
+    Raised when a request made while iterating over the BODS API fails.
+    """
+
+    def __init__(self, error: APIError):
+        super().__init__(f"{error.status_code}: {error.reason}")
+        self.error = error
+
+
 class AdminAreas(BaseModel):
     atco_code: str
     name: str
@@ -76,9 +86,12 @@ class BoundingBoxMixin(BaseModel):
     )
 
     def model_dump_json(self, *args, **kwargs):
-        d = super().model_dump(*args, **kwargs)
+        return json.dumps(self._query_dict(*args, **kwargs))
+
+    def _query_dict(self, *args, **kwargs) -> Dict[str, Any]:
+        d = super().model_dump(*args, mode="json", **kwargs)
 
         if "boundingBox" in d and self.bounding_box is not None:
             d["boundingBox"] = self.bounding_box.csv()
 
-        return json.dumps(d)
+        return d
@@ -0,0 +1,318 @@
+"""
+netex.py a module for incrementally parsing NeTEx fares data sets.
+"""
+
+from decimal import Decimal
+from typing import Collection, Dict, Iterator, List, Optional
+
+from lxml import etree
+from lxml.etree import _Element
+from pydantic import BaseModel
+
+from bods_client.models._xml import (
+    Document,
+    XMLSource,
+    child_elements,
+    child_text,
+    iter_documents,
+)
+
+NETEX_NAMESPACE = "http://www.netex.org.uk/netex"
+_NS_PREFIX = f"{{{NETEX_NAMESPACE}}}"
+_NS_PREFIX_LENGTH = len(_NS_PREFIX)
+_TYPE_OF_FRAME_REF_TAG = f"{_NS_PREFIX}TypeOfFrameRef"
+_FARE_TABLE_TAG = f"{_NS_PREFIX}FareTable"
+
+FRAME_TYPES = (
+    "CompositeFrame",
+    "GeneralFrame",
+    "ResourceFrame",
+    "ServiceCalendarFrame",
+    "SiteFrame",
+    "ServiceFrame",
+    "TimetableFrame",
+    "FareFrame",
+    "SalesTransactionFrame",
+)
+FARE_PRODUCT_TYPES = (
+    "PreassignedFareProduct",
+    "AmountOfPriceUnitProduct",
+    "SupplementProduct",
+    "SaleDiscountRight",
+    "UsageDiscountRight",
+    "CappedDiscountRight",
+    "EntitlementProduct",
+    "ThirdPartyProduct",
+)
+_FRAME_TAGS = frozenset(f"{_NS_PREFIX}{name}" for name in FRAME_TYPES)
+
+NeTExSource = XMLSource
+
+
+def _netex_children(element: Optional[_Element]) -> Dict[str, _Element]:
+    return {} if element is None else child_elements(element, _NS_PREFIX)
+
+
+def _ref(children: Dict[str, _Element], name: str) -> Optional[str]:
+    child = children.get(name)
+    return None if child is None else child.get("ref")
+
+
+def _local_name(element: _Element) -> str:
+    return element.tag[_NS_PREFIX_LENGTH:]
+
+
+class NeTExRecord(BaseModel):
+    """
+    A record parsed from a NeTEx document.
+
+    file_name is the name of the document within a zipped data set, or the file
+    parsed, and frame_id the id of the innermost frame the record was found in.
+    """
+
+    file_name: Optional[str]
+    frame_id: Optional[str]
+
+
+class FareZone(NeTExRecord):
+    id: str
+    name: Optional[str]
+    members: List[str]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, **values: Optional[str]
+    ) -> "FareZone":
+        children = _netex_children(element)
+        members = children.get("members")
+        return cls(
+            id=element.get("id"),
+            name=child_text(children, "Name"),
+            members=[
+                ref.get("ref")
+                for ref in ([] if members is None else members)
+                if isinstance(ref.tag, str)
+            ],
+            **values,
+        )
+
+
+class FareProduct(NeTExRecord):
+    """
+    A fare product, product_kind is its NeTEx type such as PreassignedFareProduct.
+    """
+
+    id: str
+    product_kind: str
+    name: Optional[str]
+    product_type: Optional[str]
+    charging_moment_type: Optional[str]
+    type_of_fare_product_ref: Optional[str]
+    operator_ref: Optional[str]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, **values: Optional[str]
+    ) -> "FareProduct":
+        children = _netex_children(element)
+        return cls(
+            id=element.get("id"),
+            product_kind=_local_name(element),
+            name=child_text(children, "Name"),
+            product_type=child_text(children, "ProductType"),
+            charging_moment_type=child_text(children, "ChargingMomentType"),
+            type_of_fare_product_ref=_ref(children, "TypeOfFareProductRef"),
+            operator_ref=_ref(children, "OperatorRef"),
+            **values,
+        )
+
+
+class UserProfile(NeTExRecord):
+    id: str
+    name: Optional[str]
+    user_type: Optional[str]
+    minimum_age: Optional[int]
+    maximum_age: Optional[int]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, **values: Optional[str]
+    ) -> "UserProfile":
+        children = _netex_children(element)
+        return cls(
+            id=element.get("id"),
+            name=child_text(children, "Name"),
+            user_type=child_text(children, "UserType"),
+            minimum_age=child_text(children, "MinimumAge"),
+            maximum_age=child_text(children, "MaximumAge"),
+            **values,
+        )
+
+
+class FareTableCell(BaseModel):
+    """
+    A cell of a FareTable, price_kind is the NeTEx type of its price, such as
+    DistanceMatrixElementPrice, and price_refs maps the names of the price's
+    references to their refs.
+    """
+
+    id: Optional[str]
+    order: Optional[int]
+    price_kind: Optional[str]
+    amount: Optional[Decimal]
+    price_refs: Dict[str, str]
+    column_ref: Optional[str]
+    row_ref: Optional[str]
+
+    @classmethod
+    def from_lxml_element(cls, element: _Element) -> "FareTableCell":
+        children = _netex_children(element)
+        price = next(
+            (child for name, child in children.items() if name.endswith("Price")),
+            None,
+        )
+        price_children = _netex_children(price)
+        price_refs = {
+            name: child.get("ref")
+            for name, child in price_children.items()
+            if name.endswith("Ref")
+        }
+        return cls(
+            id=element.get("id"),
+            order=element.get("order"),
+            price_kind=None if price is None else _local_name(price),
+            amount=child_text(price_children, "Amount"),
+            price_refs=price_refs,
+            column_ref=_ref(children, "ColumnRef"),
+            row_ref=_ref(children, "RowRef"),
+        )
+
+
+class FareTable(NeTExRecord):
+    """
+    A table of prices, a table included in another has its id as parent_id.
+
+    Included tables are yielded before the table that includes them.
+    """
+
+    id: str
+    name: Optional[str]
+    parent_id: Optional[str]
+    cells: List[FareTableCell]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, **values: Optional[str]
+    ) -> "FareTable":
+        children = _netex_children(element)
+        cells = children.get("cells")
+        includes = element.getparent()
+        parent = None if includes is None else includes.getparent()
+        parent_id = None
+        if parent is not None and parent.tag == _FARE_TABLE_TAG:
+            parent_id = parent.get("id")
+        return cls(
+            id=element.get("id"),
+            name=child_text(children, "Name"),
+            parent_id=parent_id,
+            cells=[
+                FareTableCell.from_lxml_element(cell)
+                for cell in ([] if cells is None else cells)
+                if isinstance(cell.tag, str)
+            ],
+            **values,
+        )
+
+
+_RECORD_MODELS = {
+    f"{_NS_PREFIX}FareZone": FareZone,
+    f"{_NS_PREFIX}UserProfile": UserProfile,
+    f"{_NS_PREFIX}FareTable": FareTable,
+}
+for _name in FARE_PRODUCT_TYPES:
+    _RECORD_MODELS[f"{_NS_PREFIX}{_name}"] = FareProduct
+# Elements that aren't parsed, and can be large, are cleared as they end too.
+_SKIP_TAGS = frozenset(
+    f"{_NS_PREFIX}{name}"
+    for name in (
+        "ScheduledStopPoint",
+        "StopPlace",
+        "TariffZone",
+        "Line",
+        "Operator",
+        "Authority",
+        "DistanceMatrixElement",
+        "GeographicalInterval",
+        "TimeInterval",
+        "FareStructureElement",
+        "ValidableElement",
+        "SalesOfferPackage",
+        "TypeOfTravelDocument",
+    )
+)
+
+
+def _iter_document(
+    source: Document,
+    file_name: Optional[str],
+    frame_types: Optional[Collection[str]],
+) -> Iterator[NeTExRecord]:
+    tags = [*_RECORD_MODELS, *_SKIP_TAGS, *_FRAME_TAGS, _TYPE_OF_FRAME_REF_TAG]
+    context = etree.iterparse(source, events=("start", "end"), tag=tags)
+    # The open frames, each with whether the records within it are wanted.
+    frames: List[List] = []
+
+    for event, element in context:
+        tag = element.tag
+        if event == "start":
+            if tag in _FRAME_TAGS:
+                selected = frame_types is None or _local_name(element) in frame_types
+                if frames and frames[-1][1]:
+                    selected = True
+                frames.append([element, selected])
+            continue
+
+        if tag == _TYPE_OF_FRAME_REF_TAG:
+            frame = frames[-1] if frames else None
+            if frame is not None and element.getparent() is frame[0]:
+                if frame_types is not None and element.get("ref") in frame_types:
+                    frame[1] = True
+            continue
+
+        if tag in _FRAME_TAGS:
+            frames.pop()
+        elif tag in _RECORD_MODELS:
+            selected = frames[-1][1] if frames else frame_types is None
+            if selected:
+                frame_id = frames[-1][0].get("id") if frames else None
+                yield _RECORD_MODELS[tag].from_lxml_element(
+                    element, file_name=file_name, frame_id=frame_id
+                )
+
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def iter_netex(
+    source: NeTExSource,
+    frame_types: Optional[Collection[str]] = None,
+) -> Iterator[NeTExRecord]:
+    """
+    Incrementally parses a NeTEx document, or a zipped data set of them, yielding
+    each FareZone, FareProduct, UserProfile and FareTable as it is read.
+
+    Each element is cleared once it has been parsed, so memory use stays flat
+    however large the document is.
+
+    Args:
+        source: The document or zip archive as bytes, a binary file object or a
+        path. Every ``.xml`` file in an archive is parsed in turn.
+        frame_types: Only yield records from these frames, given either as the
+        frame's element such as "FareFrame" or its TypeOfFrameRef such as
+        "fxc:UK:DFT:TypeOfFrame_UK_PI_FARE_PRICE:FXCP". A frame within a selected
+        frame is selected too. Records in other frames are skipped without being
+        built.
+    """
+    for document, file_name in iter_documents(source):
+        yield from _iter_document(document, file_name, frame_types)
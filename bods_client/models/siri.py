@@ -1,30 +1,209 @@
+import io
+import os
+import re
 from datetime import date, datetime
-from typing import List, Optional
-
+from typing import (
+    IO,
+    Callable,
+    Dict,
+    FrozenSet,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Union,
+)
+
+from dateutil.parser import isoparse
 from lxml import etree
 from lxml.etree import _Element
 from pydantic import BaseModel
 
+from bods_client.models._xml import child_elements, child_text
+from bods_client.models.avl import SIRIVMParams
+
 SIRI_NAMESPACE = "http://www.siri.org.uk/siri"
 _NSMAP = {"x": SIRI_NAMESPACE}
 _UTF8 = "utf-8"
+_NS_PREFIX = f"{{{SIRI_NAMESPACE}}}"
+_VEHICLE_ACTIVITY_TAG = f"{_NS_PREFIX}VehicleActivity"
+_MVJ_TAG = f"{_NS_PREFIX}MonitoredVehicleJourney"
+_VEHICLE_LOCATION_TAG = f"{_NS_PREFIX}VehicleLocation"
+_LONGITUDE_TAG = f"{_NS_PREFIX}Longitude"
+_LATITUDE_TAG = f"{_NS_PREFIX}Latitude"
+
+SiriSource = Union[bytes, str, "os.PathLike[str]", IO[bytes]]
+ActivityFilter = Callable[[_Element], bool]
+ActivityFilterType = Union[SIRIVMParams, ActivityFilter]
 
 
 class SiriParsingError(ValueError):
     pass
 
 
+def _child(element: _Element, tag: str) -> Optional[_Element]:
+    # iterchildren matches the tag in C, which is several times faster than find.
+    for child in element.iterchildren(tag):
+        return child
+    return None
+
+
+def compile_activity_filter(params: SIRIVMParams) -> Optional[ActivityFilter]:
+    """
+    Compiles the filters in params into a predicate on VehicleActivity elements,
+    or returns None if params has no filters.
+
+    The predicate only reads the MonitoredVehicleJourney children it needs, so
+    activities can be rejected before any model is built. It applies the
+    operator, line, vehicle, origin and destination refs and the bounding box,
+    edges included. producer_ref applies to a whole delivery and is ignored.
+    Activities missing a field being filtered on never match.
+    """
+    refs: List[Tuple[str, FrozenSet[str]]] = []
+    if params.operator_refs:
+        refs.append((f"{_NS_PREFIX}OperatorRef", frozenset(params.operator_refs)))
+    for name, value in (
+        ("LineRef", params.line_ref),
+        ("VehicleRef", params.vehicle_ref),
+        ("OriginRef", params.origin_ref),
+        ("DestinationRef", params.destinaton_ref),
+    ):
+        if value is not None:
+            refs.append((f"{_NS_PREFIX}{name}", frozenset((value,))))
+    box = params.bounding_box
+    if not refs and box is None:
+        return None
+
+    def predicate(element: _Element) -> bool:
+        mvj = _child(element, _MVJ_TAG)
+        if mvj is None:
+            return False
+        for tag, allowed in refs:
+            child = _child(mvj, tag)
+            if child is None or child.text not in allowed:
+                return False
+        if box is None:
+            return True
+        location = _child(mvj, _VEHICLE_LOCATION_TAG)
+        if location is None:
+            return False
+        longitude_element = _child(location, _LONGITUDE_TAG)
+        latitude_element = _child(location, _LATITUDE_TAG)
+        if longitude_element is None or latitude_element is None:
+            return False
+        try:
+            longitude = float(longitude_element.text)
+            latitude = float(latitude_element.text)
+        except (TypeError, ValueError):
+            return False
+        if not box.min_longitude <= longitude <= box.max_longitude:
+            return False
+        return box.min_latitude <= latitude <= box.max_latitude
+
+    return predicate
+
+
+def _as_filter(params: Optional[ActivityFilterType]) -> Optional[ActivityFilter]:
+    if isinstance(params, SIRIVMParams):
+        return compile_activity_filter(params)
+    return params
+
+
+def iter_vehicle_activity_elements(
+    source: SiriSource, params: Optional[ActivityFilterType] = None
+) -> Iterator[_Element]:
+    """
+    Incrementally parses a SIRI-VM document yielding each VehicleActivity element.
+
+    Each element is cleared, and detached from the tree, once the caller moves on
+    to the next one so memory use stays flat however large the document is.
+
+    Args:
+        source: The SIRI-VM document as bytes, a binary file object or a path.
+        params: Only yield the activities matching these SIRIVMParams, see
+        ``compile_activity_filter``, or for which this predicate is true.
+    """
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+
+    predicate = _as_filter(params)
+    context = etree.iterparse(source, events=("end",), tag=_VEHICLE_ACTIVITY_TAG)
+    for _, element in context:
+        if predicate is None or predicate(element):
+            yield element
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def _parse_datetime(text: str) -> datetime:
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        # fromisoformat only accepts 'Z' and other fractional precisions from 3.11.
+        return isoparse(text)
+
+
+_DURATION_PATTERN = re.compile(
+    r"P(?:(?P<days>\d+(?:\.\d+)?)D)?"
+    r"(?:T(?:(?P<hours>\d+(?:\.\d+)?)H)?(?:(?P<minutes>\d+(?:\.\d+)?)M)?"
+    r"(?:(?P<seconds>\d+(?:\.\d+)?)S)?)?"
+)
+_DURATION_SECONDS = {"days": 86_400, "hours": 3_600, "minutes": 60, "seconds": 1}
+_SHORTEST_POSSIBLE_CYCLE_PATTERN = re.compile(
+    rb"<(?:[\w.-]+:)?ShortestPossibleCycle>\s*([^<\s]+)\s*</"
+)
+# The delivery header, and so ShortestPossibleCycle, precedes the vehicle activities.
+_HEADER_SIZE = 64 * 1024
+
+
+def parse_duration(text: str) -> float:
+    """
+    Returns the number of seconds in an ISO 8601 duration such as ``PT5S``.
+
+    Only day and time components are supported as years and months have no fixed
+    length.
+    """
+    text = text.strip()
+    match = _DURATION_PATTERN.fullmatch(text)
+    if match is None or text.endswith(("P", "T")):
+        raise ValueError(f"invalid duration {text!r}.")
+    seconds = 0.0
+    for name, value in match.groupdict().items():
+        if value is not None:
+            seconds += float(value) * _DURATION_SECONDS[name]
+    return seconds
+
+
+def read_shortest_possible_cycle(packet: bytes) -> Optional[float]:
+    """
+    Returns the ShortestPossibleCycle of a SIRI-VM document in seconds, without
+    parsing the document, or None if it is missing or invalid.
+    """
+    match = _SHORTEST_POSSIBLE_CYCLE_PATTERN.search(packet, 0, _HEADER_SIZE)
+    if match is None:
+        return None
+    try:
+        return parse_duration(match.group(1).decode(_UTF8))
+    except ValueError:
+        return None
+
+
+def _children(element: _Element) -> Dict[str, _Element]:
+    return child_elements(element, _NS_PREFIX)
+
+
 class FramedVehicleJourneyRef(BaseModel):
     data_frame_ref: date
     dated_vehicle_journey_ref: str
 
     @classmethod
     def from_lxml_element(cls, element: _Element) -> "FramedVehicleJourneyRef":
+        children = _children(element)
         return cls(
-            data_frame_ref=element.findtext("x:DataFrameRef", namespaces=_NSMAP),
-            dated_vehicle_journey_ref=element.findtext(
-                "x:DatedVehicleJourneyRef", namespaces=_NSMAP
-            ),
+            data_frame_ref=child_text(children, "DataFrameRef"),
+            dated_vehicle_journey_ref=child_text(children, "DatedVehicleJourneyRef"),
         )
 
 
@@ -34,9 +213,10 @@ class VehicleLocation(BaseModel):
 
     @classmethod
     def from_lxml_element(cls, element: _Element) -> "VehicleLocation":
+        children = _children(element)
         return cls(
-            longitude=element.findtext("x:Longitude", namespaces=_NSMAP),
-            latitude=element.findtext("x:Latitude", namespaces=_NSMAP),
+            longitude=child_text(children, "Longitude"),
+            latitude=child_text(children, "Latitude"),
         )
 
 
@@ -59,39 +239,36 @@ class MonitoredVehicleJourney(BaseModel):
 
     @classmethod
     def from_lxml_element(cls, element: _Element) -> "MonitoredVehicleJourney":
+        children = _children(element)
 
         framed_vehicle_journey_ref = None
-        fvjr_element = element.find("x:FramedVehicleJourneyRef", namespaces=_NSMAP)
+        fvjr_element = children.get("FramedVehicleJourneyRef")
         if fvjr_element is not None:
             framed_vehicle_journey_ref = FramedVehicleJourneyRef.from_lxml_element(
                 fvjr_element
             )
 
-        vehicle_location_element = element.find("x:VehicleLocation", namespaces=_NSMAP)
+        vehicle_location_element = children.get("VehicleLocation")
         if vehicle_location_element is None:
             raise SiriParsingError("missing 'VehicleLocation'.")
 
         return cls(
-            bearing=element.findtext("x:Bearing", namespaces=_NSMAP),
-            block_ref=element.findtext("x:BlockRef", namespaces=_NSMAP),
-            line_ref=element.findtext("x:LineRef", namespaces=_NSMAP),
-            direction_ref=element.findtext("x:DirectionRef", namespaces=_NSMAP),
-            published_line_name=element.findtext(
-                "x:PublishedLineName", namespaces=_NSMAP
-            ),
-            operator_ref=element.findtext("x:OperatorRef", namespaces=_NSMAP),
-            origin_ref=element.findtext("x:OriginRef", namespaces=_NSMAP),
-            origin_name=element.findtext("x:OriginName", namespaces=_NSMAP),
-            destination_ref=element.findtext("x:DestinationRef", namespaces=_NSMAP),
-            destination_name=element.findtext("x:DestinationName", namespaces=_NSMAP),
-            origin_aimed_departure_time=element.findtext(
-                "x:OriginAimedDepartureTime", namespaces=_NSMAP
+            bearing=child_text(children, "Bearing"),
+            block_ref=child_text(children, "BlockRef"),
+            line_ref=child_text(children, "LineRef"),
+            direction_ref=child_text(children, "DirectionRef"),
+            published_line_name=child_text(children, "PublishedLineName"),
+            operator_ref=child_text(children, "OperatorRef"),
+            origin_ref=child_text(children, "OriginRef"),
+            origin_name=child_text(children, "OriginName"),
+            destination_ref=child_text(children, "DestinationRef"),
+            destination_name=child_text(children, "DestinationName"),
+            origin_aimed_departure_time=child_text(
+                children, "OriginAimedDepartureTime"
             ),
             framed_vehicle_journey_ref=framed_vehicle_journey_ref,
-            vehicle_journey_ref=element.findtext(
-                "x:VehicleJourneyRef", namespaces=_NSMAP
-            ),
-            vehicle_ref=element.findtext("x:VehicleRef", namespaces=_NSMAP),
+            vehicle_journey_ref=child_text(children, "VehicleJourneyRef"),
+            vehicle_ref=child_text(children, "VehicleRef"),
             vehicle_location=VehicleLocation.from_lxml_element(
                 vehicle_location_element
             ),
@@ -106,14 +283,15 @@ class VehicleActivity(BaseModel):
 
     @classmethod
     def from_lxml_element(cls, element: _Element) -> "VehicleActivity":
-        mvj_element = element.find("x:MonitoredVehicleJourney", namespaces=_NSMAP)
+        children = _children(element)
+        mvj_element = children.get("MonitoredVehicleJourney")
         if mvj_element is None:
             raise SiriParsingError("missing 'MonitoredVehicleJourney'.")
 
         return cls(
-            recorded_at_time=element.findtext("x:RecordedAtTime", namespaces=_NSMAP),
-            item_identifier=element.findtext("x:ItemIdentifier", namespaces=_NSMAP),
-            valid_until_time=element.findtext("x:ValidUntilTime", namespaces=_NSMAP),
+            recorded_at_time=child_text(children, "RecordedAtTime"),
+            item_identifier=child_text(children, "ItemIdentifier"),
+            valid_until_time=child_text(children, "ValidUntilTime"),
             monitored_vehicle_journey=MonitoredVehicleJourney.from_lxml_element(
                 mvj_element
             ),
@@ -183,9 +361,218 @@ class Siri(BaseModel):
         return cls(service_delivery=service_delivery)
 
     @classmethod
-    def from_string(cls, packet: str) -> "Siri":
-        return cls.from_lxml_element(etree.fromstring(packet))
+    def from_string(
+        cls,
+        packet: str,
+        params: Optional[ActivityFilterType] = None,
+    ) -> "Siri":
+        """
+        Parses a SIRI-VM document.
+
+        Args:
+            packet: The SIRI-VM document.
+            params: Only keep the activities matching these SIRIVMParams, or for
+            which this predicate is true, see ``iter_vehicle_activity_elements``.
+        """
+        element = etree.fromstring(packet)
+        predicate = _as_filter(params)
+        if predicate is not None:
+            rejected = [
+                activity
+                for activity in element.iter(_VEHICLE_ACTIVITY_TAG)
+                if not predicate(activity)
+            ]
+            for activity in rejected:
+                activity.getparent().remove(activity)
+        return cls.from_lxml_element(element)
+
+    @classmethod
+    def from_bytes(
+        cls,
+        packet: bytes,
+        params: Optional[ActivityFilterType] = None,
+    ) -> "Siri":
+        return cls.from_string(packet.decode(_UTF8), params=params)
 
     @classmethod
-    def from_bytes(cls, packet: bytes) -> "Siri":
-        return cls.from_string(packet.decode(_UTF8))
+    def iter_vehicle_activities(
+        cls,
+        source: SiriSource,
+        params: Optional[ActivityFilterType] = None,
+    ) -> Iterator[VehicleActivity]:
+        """
+        Yields the VehicleActivity objects in a SIRI-VM document one at a time.
+
+        Unlike ``from_bytes`` the document is never held in memory as a whole, which
+        makes this suitable for the national bulk archive.
+
+        Args:
+            source: The SIRI-VM document as bytes, a binary file object or a path.
+            params: Only yield the activities matching these SIRIVMParams, or for
+            which this predicate is true, see ``iter_vehicle_activity_elements``.
+        """
+        for element in iter_vehicle_activity_elements(source, params=params):
+            yield VehicleActivity.from_lxml_element(element)
+
+
+# Records are built from trusted documents without validation, so empty elements
+# are read as missing rather than rejected.
+def _record_float(text: Optional[str]) -> Optional[float]:
+    return float(text) if text else None
+
+
+def _record_datetime(text: Optional[str]) -> Optional[datetime]:
+    return _parse_datetime(text) if text else None
+
+
+def _child_texts(element: _Element) -> Dict[str, Optional[str]]:
+    # Keyed by the namespaced tag, which is cheaper than checking the namespace of
+    # each child as child_elements does.
+    return {child.tag: child.text for child in element}
+
+
+_RECORDED_AT_TIME_TAG = f"{_NS_PREFIX}RecordedAtTime"
+_ITEM_IDENTIFIER_TAG = f"{_NS_PREFIX}ItemIdentifier"
+_VALID_UNTIL_TIME_TAG = f"{_NS_PREFIX}ValidUntilTime"
+_FVJR_TAG = f"{_NS_PREFIX}FramedVehicleJourneyRef"
+_DATA_FRAME_REF_TAG = f"{_NS_PREFIX}DataFrameRef"
+_DATED_VEHICLE_JOURNEY_REF_TAG = f"{_NS_PREFIX}DatedVehicleJourneyRef"
+_BEARING_TAG = f"{_NS_PREFIX}Bearing"
+_BLOCK_REF_TAG = f"{_NS_PREFIX}BlockRef"
+_VEHICLE_JOURNEY_REF_TAG = f"{_NS_PREFIX}VehicleJourneyRef"
+_DESTINATION_NAME_TAG = f"{_NS_PREFIX}DestinationName"
+_DESTINATION_REF_TAG = f"{_NS_PREFIX}DestinationRef"
+_ORIGIN_NAME_TAG = f"{_NS_PREFIX}OriginName"
+_ORIGIN_REF_TAG = f"{_NS_PREFIX}OriginRef"
+_ORIGIN_AIMED_DEPARTURE_TIME_TAG = f"{_NS_PREFIX}OriginAimedDepartureTime"
+_DIRECTION_REF_TAG = f"{_NS_PREFIX}DirectionRef"
+_PUBLISHED_LINE_NAME_TAG = f"{_NS_PREFIX}PublishedLineName"
+_LINE_REF_TAG = f"{_NS_PREFIX}LineRef"
+_OPERATOR_REF_TAG = f"{_NS_PREFIX}OperatorRef"
+_VEHICLE_REF_TAG = f"{_NS_PREFIX}VehicleRef"
+
+
+class FramedVehicleJourneyRefRecord(NamedTuple):
+    data_frame_ref: Optional[date]
+    dated_vehicle_journey_ref: Optional[str]
+
+
+class VehicleLocationRecord(NamedTuple):
+    longitude: Optional[float]
+    latitude: Optional[float]
+
+
+class MonitoredVehicleJourneyRecord(NamedTuple):
+    bearing: Optional[float]
+    block_ref: Optional[str]
+    framed_vehicle_journey_ref: Optional[FramedVehicleJourneyRefRecord]
+    vehicle_journey_ref: Optional[str]
+    destination_name: Optional[str]
+    destination_ref: Optional[str]
+    origin_name: Optional[str]
+    origin_ref: Optional[str]
+    origin_aimed_departure_time: Optional[datetime]
+    direction_ref: Optional[str]
+    published_line_name: Optional[str]
+    line_ref: Optional[str]
+    vehicle_location: Optional[VehicleLocationRecord]
+    operator_ref: Optional[str]
+    vehicle_ref: Optional[str]
+
+
+class VehicleActivityRecord(NamedTuple):
+    recorded_at_time: Optional[datetime]
+    item_identifier: Optional[str]
+    valid_until_time: Optional[datetime]
+    monitored_vehicle_journey: Optional[MonitoredVehicleJourneyRecord]
+
+
+def _framed_vehicle_journey_ref_record(
+    element: _Element,
+) -> FramedVehicleJourneyRefRecord:
+    texts = _child_texts(element)
+    data_frame_ref = texts.get(_DATA_FRAME_REF_TAG)
+    return FramedVehicleJourneyRefRecord(
+        date.fromisoformat(data_frame_ref) if data_frame_ref else None,
+        texts.get(_DATED_VEHICLE_JOURNEY_REF_TAG),
+    )
+
+
+def _vehicle_location_record(element: _Element) -> VehicleLocationRecord:
+    texts = _child_texts(element)
+    return VehicleLocationRecord(
+        _record_float(texts.get(_LONGITUDE_TAG)),
+        _record_float(texts.get(_LATITUDE_TAG)),
+    )
+
+
+def _monitored_vehicle_journey_record(
+    element: _Element,
+) -> MonitoredVehicleJourneyRecord:
+    texts = _child_texts(element)
+    fvjr_element = _child(element, _FVJR_TAG)
+    location_element = _child(element, _VEHICLE_LOCATION_TAG)
+    return MonitoredVehicleJourneyRecord(
+        bearing=_record_float(texts.get(_BEARING_TAG)),
+        block_ref=texts.get(_BLOCK_REF_TAG),
+        framed_vehicle_journey_ref=(
+            None
+            if fvjr_element is None
+            else _framed_vehicle_journey_ref_record(fvjr_element)
+        ),
+        vehicle_journey_ref=texts.get(_VEHICLE_JOURNEY_REF_TAG),
+        destination_name=texts.get(_DESTINATION_NAME_TAG),
+        destination_ref=texts.get(_DESTINATION_REF_TAG),
+        origin_name=texts.get(_ORIGIN_NAME_TAG),
+        origin_ref=texts.get(_ORIGIN_REF_TAG),
+        origin_aimed_departure_time=_record_datetime(
+            texts.get(_ORIGIN_AIMED_DEPARTURE_TIME_TAG)
+        ),
+        direction_ref=texts.get(_DIRECTION_REF_TAG),
+        published_line_name=texts.get(_PUBLISHED_LINE_NAME_TAG),
+        line_ref=texts.get(_LINE_REF_TAG),
+        vehicle_location=(
+            None
+            if location_element is None
+            else _vehicle_location_record(location_element)
+        ),
+        operator_ref=texts.get(_OPERATOR_REF_TAG),
+        vehicle_ref=texts.get(_VEHICLE_REF_TAG),
+    )
+
+
+def _vehicle_activity_record(element: _Element) -> VehicleActivityRecord:
+    texts = _child_texts(element)
+    mvj_element = _child(element, _MVJ_TAG)
+    return VehicleActivityRecord(
+        recorded_at_time=_record_datetime(texts.get(_RECORDED_AT_TIME_TAG)),
+        item_identifier=texts.get(_ITEM_IDENTIFIER_TAG),
+        valid_until_time=_record_datetime(texts.get(_VALID_UNTIL_TIME_TAG)),
+        monitored_vehicle_journey=(
+            None
+            if mvj_element is None
+            else _monitored_vehicle_journey_record(mvj_element)
+        ),
+    )
+
+
+def iter_vehicle_activity_records(
+    source: SiriSource, params: Optional[ActivityFilterType] = None
+) -> Iterator[VehicleActivityRecord]:
+    """
+    Yields the vehicle activities in a trusted SIRI-VM document as lightweight
+    records, read incrementally like ``Siri.iter_vehicle_activities``.
+
+    The records are NamedTuples with the same field names and value types as the
+    pydantic models, but nothing is validated. Missing and empty elements,
+    including required ones, are read as None and text that can't be converted
+    raises ValueError. It is meant for bulk data, such as the archive, that is
+    trusted not to need checking.
+
+    Args:
+        source: The SIRI-VM document as bytes, a binary file object or a path.
+        params: Only yield the activities matching these SIRIVMParams, or for
+        which this predicate is true, see ``iter_vehicle_activity_elements``.
+    """
+    for element in iter_vehicle_activity_elements(source, params=params):
+        yield _vehicle_activity_record(element)
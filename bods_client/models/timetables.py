@@ -1,6 +1,6 @@
 import json
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic.fields import Field
 
@@ -49,18 +49,21 @@ class TimetableParams(BaseAPIParams):
     bods_compliance: Optional[bool] = Field(default=None, alias="bodsCompliance")
 
     def model_dump_json(self, *args, **kwargs):
+        return json.dumps(self._query_dict(*args, **kwargs))
+
+    def _query_dict(self, *args, **kwargs) -> Dict[str, Any]:
         """Custom dict method to convert list of noc strings to a cvs.
 
         There's a bug in the BODS timetables API where ?noc=NOC1&noc=NOC2
         only recognises the last parameter. This also applies to adminArea too.
         """
-        dict_ = super().model_dump(*args, **kwargs)
+        dict_ = super().model_dump(*args, mode="json", **kwargs)
 
         if "noc" in dict_:
             dict_["noc"] = ",".join(dict_.get("noc", []))
         if "adminArea" in dict_:
             dict_["adminArea"] = ",".join(dict_.get("adminArea", []))
-        return json.dumps(dict_)
+        return dict_
 
 
 class TimetableResponse(BaseAPIResponse):
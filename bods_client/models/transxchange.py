@@ -0,0 +1,317 @@
+"""
+transxchange.py a module for incrementally parsing TransXChange timetables.
+"""
+
+from datetime import date, time
+from typing import Callable, Dict, Iterator, List, Optional
+
+from lxml import etree
+from lxml.etree import _Element
+from pydantic import BaseModel
+
+from bods_client.models._xml import (
+    Document,
+    XMLSource,
+    child_elements,
+    child_text,
+    iter_documents,
+)
+
+TXC_NAMESPACE = "http://www.transxchange.org.uk/"
+_NS_PREFIX = f"{{{TXC_NAMESPACE}}}"
+_JOURNEY_PATTERN_TIMING_LINK_TAG = f"{_NS_PREFIX}JourneyPatternTimingLink"
+_LINES_TAG = f"{_NS_PREFIX}Lines"
+_LINE_TAG = f"{_NS_PREFIX}Line"
+_STANDARD_SERVICE_TAG = f"{_NS_PREFIX}StandardService"
+_PATTERN_TAG = f"{_NS_PREFIX}JourneyPattern"
+_PATTERN_SECTION_REFS_TAG = f"{_NS_PREFIX}JourneyPatternSectionRefs"
+
+TransXChangeSource = XMLSource
+
+
+def _txc_children(element: Optional[_Element]) -> Dict[str, _Element]:
+    return {} if element is None else child_elements(element, _NS_PREFIX)
+
+
+class TransXChangeRecord(BaseModel):
+    """
+    A record parsed from a TransXChange document.
+
+    file_name is the name of the document within a zipped data set, or the file
+    parsed, so records can be told apart when ids repeat across documents.
+    """
+
+    file_name: Optional[str]
+
+
+class StopPoint(TransXChangeRecord):
+    atco_code: str
+    common_name: Optional[str]
+    indicator: Optional[str]
+    locality_name: Optional[str]
+    longitude: Optional[float]
+    latitude: Optional[float]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, file_name: Optional[str]
+    ) -> "StopPoint":
+        """
+        Parses an AnnotatedStopPointRef or a full StopPoint definition.
+        """
+        children = _txc_children(element)
+        if "AtcoCode" in children:
+            descriptor = _txc_children(children.get("Descriptor"))
+            place = _txc_children(children.get("Place"))
+            location = _txc_children(place.get("Location"))
+            atco_code = child_text(children, "AtcoCode")
+        else:
+            descriptor = place = children
+            location = _txc_children(children.get("Location"))
+            atco_code = child_text(children, "StopPointRef")
+        if "Translation" in location:
+            location = _txc_children(location["Translation"])
+
+        return cls(
+            file_name=file_name,
+            atco_code=atco_code,
+            common_name=child_text(descriptor, "CommonName"),
+            indicator=child_text(descriptor, "Indicator"),
+            locality_name=child_text(place, "LocalityName"),
+            longitude=child_text(location, "Longitude"),
+            latitude=child_text(location, "Latitude"),
+        )
+
+
+class TimingLink(BaseModel):
+    id: Optional[str]
+    from_stop_ref: Optional[str]
+    from_sequence_number: Optional[int]
+    from_timing_status: Optional[str]
+    to_stop_ref: Optional[str]
+    to_sequence_number: Optional[int]
+    to_timing_status: Optional[str]
+    route_link_ref: Optional[str]
+    run_time: Optional[str]
+
+    @classmethod
+    def from_lxml_element(cls, element: _Element) -> "TimingLink":
+        children = _txc_children(element)
+        from_element = children.get("From")
+        to_element = children.get("To")
+        from_ = _txc_children(from_element)
+        to = _txc_children(to_element)
+        return cls(
+            id=element.get("id"),
+            from_stop_ref=child_text(from_, "StopPointRef"),
+            from_sequence_number=(
+                None if from_element is None else from_element.get("SequenceNumber")
+            ),
+            from_timing_status=child_text(from_, "TimingStatus"),
+            to_stop_ref=child_text(to, "StopPointRef"),
+            to_sequence_number=(
+                None if to_element is None else to_element.get("SequenceNumber")
+            ),
+            to_timing_status=child_text(to, "TimingStatus"),
+            route_link_ref=child_text(children, "RouteLinkRef"),
+            run_time=child_text(children, "RunTime"),
+        )
+
+
+class JourneyPatternSection(TransXChangeRecord):
+    id: str
+    timing_links: List[TimingLink]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, file_name: Optional[str]
+    ) -> "JourneyPatternSection":
+        timing_links = [
+            TimingLink.from_lxml_element(child)
+            for child in element.iterchildren(_JOURNEY_PATTERN_TIMING_LINK_TAG)
+        ]
+        return cls(
+            file_name=file_name,
+            id=element.get("id"),
+            timing_links=timing_links,
+        )
+
+
+class Line(TransXChangeRecord):
+    id: str
+    service_code: Optional[str]
+    line_name: Optional[str]
+
+
+class JourneyPattern(TransXChangeRecord):
+    id: str
+    service_code: Optional[str]
+    direction: Optional[str]
+    route_ref: Optional[str]
+    section_refs: List[str]
+
+
+class Service(TransXChangeRecord):
+    service_code: str
+    operator_ref: Optional[str]
+    mode: Optional[str]
+    description: Optional[str]
+    origin: Optional[str]
+    destination: Optional[str]
+    start_date: Optional[date]
+    end_date: Optional[date]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, file_name: Optional[str]
+    ) -> "Service":
+        children = _txc_children(element)
+        period = _txc_children(children.get("OperatingPeriod"))
+        standard = _txc_children(children.get("StandardService"))
+        return cls(
+            file_name=file_name,
+            service_code=child_text(children, "ServiceCode"),
+            operator_ref=child_text(children, "RegisteredOperatorRef"),
+            mode=child_text(children, "Mode"),
+            description=child_text(children, "Description"),
+            origin=child_text(standard, "Origin"),
+            destination=child_text(standard, "Destination"),
+            start_date=child_text(period, "StartDate"),
+            end_date=child_text(period, "EndDate"),
+        )
+
+    @staticmethod
+    def iter_records(
+        element: _Element, file_name: Optional[str]
+    ) -> Iterator[TransXChangeRecord]:
+        """
+        Yields the Service followed by its Lines and JourneyPatterns.
+        """
+        service = Service.from_lxml_element(element, file_name)
+        yield service
+        service_code = service.service_code
+
+        lines = element.find(_LINES_TAG)
+        for line in () if lines is None else lines.iterchildren(_LINE_TAG):
+            children = _txc_children(line)
+            yield Line(
+                file_name=file_name,
+                id=line.get("id"),
+                service_code=service_code,
+                line_name=child_text(children, "LineName"),
+            )
+
+        standard = element.find(_STANDARD_SERVICE_TAG)
+        patterns = () if standard is None else standard.iterchildren(_PATTERN_TAG)
+        for pattern in patterns:
+            children = _txc_children(pattern)
+            section_refs = [
+                ref.text or ""
+                for ref in pattern.iterchildren(_PATTERN_SECTION_REFS_TAG)
+            ]
+            yield JourneyPattern(
+                file_name=file_name,
+                id=pattern.get("id"),
+                service_code=service_code,
+                direction=child_text(children, "Direction"),
+                route_ref=child_text(children, "RouteRef"),
+                section_refs=section_refs,
+            )
+
+
+class VehicleJourney(TransXChangeRecord):
+    vehicle_journey_code: Optional[str]
+    private_code: Optional[str]
+    operator_ref: Optional[str]
+    service_ref: Optional[str]
+    line_ref: Optional[str]
+    journey_pattern_ref: Optional[str]
+    vehicle_journey_ref: Optional[str]
+    departure_time: Optional[time]
+
+    @classmethod
+    def from_lxml_element(
+        cls, element: _Element, file_name: Optional[str]
+    ) -> "VehicleJourney":
+        children = _txc_children(element)
+        return cls(
+            file_name=file_name,
+            vehicle_journey_code=child_text(children, "VehicleJourneyCode"),
+            private_code=child_text(children, "PrivateCode"),
+            operator_ref=child_text(children, "OperatorRef"),
+            service_ref=child_text(children, "ServiceRef"),
+            line_ref=child_text(children, "LineRef"),
+            journey_pattern_ref=child_text(children, "JourneyPatternRef"),
+            vehicle_journey_ref=child_text(children, "VehicleJourneyRef"),
+            departure_time=child_text(children, "DepartureTime"),
+        )
+
+
+RecordParser = Callable[[_Element, Optional[str]], Iterator[TransXChangeRecord]]
+
+
+def _single(
+    model: Callable[..., TransXChangeRecord],
+) -> RecordParser:
+    def parse(
+        element: _Element, file_name: Optional[str]
+    ) -> Iterator[TransXChangeRecord]:
+        yield model(element, file_name)
+
+    return parse
+
+
+def _skip(element: _Element, file_name: Optional[str]) -> Iterator[TransXChangeRecord]:
+    return iter(())
+
+
+_PARSERS: Dict[str, RecordParser] = {
+    f"{_NS_PREFIX}AnnotatedStopPointRef": _single(StopPoint.from_lxml_element),
+    f"{_NS_PREFIX}StopPoint": _single(StopPoint.from_lxml_element),
+    f"{_NS_PREFIX}JourneyPatternSection": _single(
+        JourneyPatternSection.from_lxml_element
+    ),
+    f"{_NS_PREFIX}Service": Service.iter_records,
+    f"{_NS_PREFIX}VehicleJourney": _single(VehicleJourney.from_lxml_element),
+}
+# Elements that aren't parsed, and can be large, are cleared as they end too.
+for _name in (
+    "RouteSection",
+    "Route",
+    "Operator",
+    "StopArea",
+    "ServicedOrganisation",
+    "SupportingDocument",
+    "Registration",
+):
+    _PARSERS[f"{_NS_PREFIX}{_name}"] = _skip
+
+
+def _iter_document(
+    source: Document,
+    file_name: Optional[str],
+) -> Iterator[TransXChangeRecord]:
+    context = etree.iterparse(source, events=("end",), tag=list(_PARSERS))
+    for _, element in context:
+        yield from _PARSERS[element.tag](element, file_name)
+        element.clear(keep_tail=True)
+        while element.getprevious() is not None:
+            del element.getparent()[0]
+
+
+def iter_transxchange(source: TransXChangeSource) -> Iterator[TransXChangeRecord]:
+    """
+    Incrementally parses a TransXChange document, or a zipped data set of them,
+    yielding each StopPoint, JourneyPatternSection, Service, Line, JourneyPattern
+    and VehicleJourney as it is read.
+
+    Records are yielded in document order, a Service is followed by its Lines
+    and JourneyPatterns. Each element is cleared once it has been parsed, so
+    memory use stays flat however large the document is.
+
+    Args:
+        source: The document or zip archive as bytes, a binary file object or a
+        path. Every ``.xml`` file in an archive is parsed in turn.
+    """
+    for document, file_name in iter_documents(source):
+        yield from _iter_document(document, file_name)
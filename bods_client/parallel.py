@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""
+parallel.py a module for parsing large SIRI-VM documents on several cores.
+"""
+
+import re
+from concurrent.futures import Executor, ProcessPoolExecutor
+from functools import partial
+from typing import Callable, List, Optional, Tuple, TypeVar
+
+from bods_client.columnar import VehiclePositions
+from bods_client.constants import DEFAULT_PARSE_CHUNK_SIZE
+from bods_client.models.siri import ActivityFilterType, Siri, VehicleActivity
+
+ResultType = TypeVar("ResultType")
+
+_ACTIVITY_START = re.compile(rb"<(?:[\w.-]+:)?VehicleActivity[\s>]")
+_ACTIVITY_END = re.compile(rb"</(?:[\w.-]+:)?VehicleActivity\s*>")
+
+
+def _split(packet: bytes, chunk_size: int) -> Tuple[bytes, List[bytes], bytes]:
+    """
+    Splits a SIRI-VM document into the part before the first VehicleActivity,
+    chunks of whole VehicleActivity elements of about chunk_size bytes, and the
+    part after the last VehicleActivity.
+
+    The tags are found by searching the bytes, so VehicleActivity tags must not
+    appear in comments or CDATA sections.
+    """
+    first = _ACTIVITY_START.search(packet)
+    if first is None:
+        return packet, [], b""
+
+    starts = [first.start()]
+    while True:
+        match = _ACTIVITY_START.search(packet, starts[-1] + chunk_size)
+        if match is None:
+            break
+        starts.append(match.start())
+
+    end = starts[-1]
+    for match in _ACTIVITY_END.finditer(packet, starts[-1]):
+        end = match.end()
+
+    bounds = starts[1:] + [end]
+    chunks = [packet[start:stop] for start, stop in zip(starts, bounds)]
+    return packet[: starts[0]], chunks, packet[end:]
+
+
+def _parse_activities(
+    document: bytes, params: Optional[ActivityFilterType]
+) -> List[VehicleActivity]:
+    return list(Siri.iter_vehicle_activities(document, params=params))
+
+
+def _parse_positions(
+    document: bytes, params: Optional[ActivityFilterType]
+) -> VehiclePositions:
+    return VehiclePositions.from_siri(document, params=params)
+
+
+def _map_chunks(
+    function: Callable[[bytes], ResultType],
+    header: bytes,
+    chunks: List[bytes],
+    footer: bytes,
+    max_workers: Optional[int],
+    executor: Optional[Executor],
+) -> List[ResultType]:
+    """
+    Applies function to each chunk, wrapped in the header and footer so it is a
+    whole SIRI-VM document, returning the results in document order.
+    """
+    documents = [header + chunk + footer for chunk in chunks]
+    if len(documents) == 1:
+        return [function(documents[0])]
+    if executor is not None:
+        return list(executor.map(function, documents))
+    with ProcessPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(function, documents))
+
+
+def parse_siri_parallel(
+    packet: bytes,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_PARSE_CHUNK_SIZE,
+    params: Optional[ActivityFilterType] = None,
+    executor: Optional[Executor] = None,
+) -> Siri:
+    """
+    Parses a SIRI-VM document, such as the bulk archive's siri.xml, in a process
+    pool giving the same Siri as ``Siri.from_bytes``.
+
+    The document is split on VehicleActivity boundaries into chunks which are
+    parsed in parallel and merged back in their original order. Documents of a
+    single chunk are parsed in this process.
+
+    The parsed models have to be pickled back from the workers, which costs about
+    half as much as parsing them. ``parse_vehicle_positions_parallel`` returns
+    arrays which are far cheaper to send back, so scales much better.
+
+    Args:
+        packet: The SIRI-VM document.
+        max_workers: The number of processes to use, by default the number of
+        CPUs.
+        chunk_size: The approximate size of each chunk in bytes.
+        params: Only keep the activities matching these SIRIVMParams, or for which
+        this predicate is true, see ``Siri.from_string``. A predicate must be
+        picklable, a function defined at module level for example.
+        executor: Parse the chunks with this executor rather than a new process
+        pool, useful to avoid starting the pool for every document.
+    """
+    header, chunks, footer = _split(packet, chunk_size)
+    if not chunks:
+        return Siri.from_bytes(packet, params=params)
+
+    parse = partial(_parse_activities, params=params)
+    results = _map_chunks(parse, header, chunks, footer, max_workers, executor)
+    siri = Siri.from_bytes(header + footer)
+    activities = [activity for result in results for activity in result]
+    siri.service_delivery.vehicle_monitoring_delivery.vehicle_activities = activities
+    return siri
+
+
+def parse_vehicle_positions_parallel(
+    packet: bytes,
+    max_workers: Optional[int] = None,
+    chunk_size: int = DEFAULT_PARSE_CHUNK_SIZE,
+    params: Optional[ActivityFilterType] = None,
+    executor: Optional[Executor] = None,
+) -> VehiclePositions:
+    """
+    Parses a SIRI-VM document into columns in a process pool giving the same
+    VehiclePositions as ``VehiclePositions.from_siri``, including the order of
+    the dictionary codes. See ``parse_siri_parallel``.
+    """
+    header, chunks, footer = _split(packet, chunk_size)
+    if not chunks:
+        return VehiclePositions.from_siri(packet, params=params)
+
+    parse = partial(_parse_positions, params=params)
+    positions = VehiclePositions()
+    for result in _map_chunks(parse, header, chunks, footer, max_workers, executor):
+        positions.extend(result)
+    return positions
@@ -0,0 +1,325 @@
+# -*- coding: utf-8 -*-
+"""
+poller.py a module for polling the SIRI-VM data feed at the rate BODS asks for.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterator,
+    NamedTuple,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
+
+import requests
+from lxml import etree
+
+from bods_client.client import BODSClient
+from bods_client.constants import (
+    DEFAULT_POLL_BACKOFF,
+    DEFAULT_POLL_MAX_INTERVAL,
+    DEFAULT_POLL_MIN_INTERVAL,
+)
+from bods_client.diff import SnapshotDiff, SnapshotDiffer
+from bods_client.models import APIError
+from bods_client.models.avl import SIRIVMParams
+from bods_client.models.siri import Siri, parse_duration
+from bods_client.query import PreparedQuery
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PollStats:
+    """
+    Counts and timings of the polls made by a poller.
+
+    Latency is the time taken to fetch and parse a delivery. Drift is how late
+    each fetch started compared with when it was scheduled.
+    """
+
+    __slots__ = (
+        "polls",
+        "errors",
+        "empty",
+        "skipped",
+        "total_latency",
+        "max_latency",
+        "total_drift",
+        "max_drift",
+        "last_error",
+    )
+
+    def __init__(self):
+        self.polls = 0
+        self.errors = 0
+        self.empty = 0
+        self.skipped = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+        self.total_drift = 0.0
+        self.max_drift = 0.0
+        self.last_error: Optional[Union[APIError, Exception]] = None
+
+    def record(self, latency: float, drift: float) -> None:
+        self.polls += 1
+        self.total_latency += latency
+        self.max_latency = max(self.max_latency, latency)
+        self.total_drift += drift
+        self.max_drift = max(self.max_drift, drift)
+
+    @property
+    def mean_latency(self) -> float:
+        return self.total_latency / self.polls if self.polls else 0.0
+
+    @property
+    def mean_drift(self) -> float:
+        return self.total_drift / self.polls if self.polls else 0.0
+
+    def __repr__(self) -> str:
+        return (
+            f"PollStats(polls={self.polls}, errors={self.errors}, "
+            f"empty={self.empty}, skipped={self.skipped}, "
+            f"mean_latency={self.mean_latency:.3f}, "
+            f"mean_drift={self.mean_drift:.3f})"
+        )
+
+
+class PollResult(NamedTuple):
+    siri: Siri
+    diff: Optional[SnapshotDiff]
+    latency: float
+    drift: float
+
+
+class BasePoller:
+    """
+    Scheduling shared by the sync and async SIRI-VM pollers.
+
+    After a delivery the next fetch is scheduled ShortestPossibleCycle later, or
+    sooner if the delivery's ValidUntil comes first, within min_interval and
+    max_interval. After an error or an empty delivery the interval is instead
+    multiplied by backoff for each failure in a row, up to max_interval.
+
+    Fetches are made on a fixed schedule. If a fetch, or the consumer, takes so
+    long that later fetches are overdue they are skipped rather than made back to
+    back, and counted in ``stats.skipped``.
+
+    Args:
+        client: The client to fetch the data feed with.
+        params: The SIRI-VM filters to apply, prepared once as a PreparedQuery.
+        differ: Compare each delivery with the last one, and include the
+        SnapshotDiff in each result.
+        min_interval: The minimum number of seconds between fetches, which must be
+        positive.
+        max_interval: The maximum number of seconds between fetches, at least
+        min_interval.
+        backoff: The factor to grow the interval by after each failure.
+        clock: A monotonic clock in seconds, ``time.monotonic`` by default.
+        now: Returns the current UTC time, to compare with ValidUntil.
+    """
+
+    _transport_errors: Tuple[Type[Exception], ...] = ()
+
+    def __init__(
+        self,
+        client: Any,
+        params: Union[SIRIVMParams, PreparedQuery, None] = None,
+        differ: Optional[SnapshotDiffer] = None,
+        min_interval: float = DEFAULT_POLL_MIN_INTERVAL,
+        max_interval: float = DEFAULT_POLL_MAX_INTERVAL,
+        backoff: float = DEFAULT_POLL_BACKOFF,
+        clock: Callable[[], float] = time.monotonic,
+        now: Callable[[], datetime] = _utcnow,
+    ):
+        # The schedule must advance after every fetch, so that overdue fetches can
+        # be counted in whole intervals.
+        if min_interval <= 0:
+            raise ValueError("min_interval must be positive.")
+        if max_interval < min_interval:
+            raise ValueError("max_interval must be at least min_interval.")
+        self.client = client
+        self.params = params
+        if not isinstance(params, PreparedQuery):
+            params = PreparedQuery(params or SIRIVMParams())
+        self.query = params
+        self.differ = differ
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.clock = clock
+        self.now = now
+        self.stats = PollStats()
+        self.failures = 0
+
+    def _parse(self, response: Union[bytes, APIError, Exception]) -> Optional[Siri]:
+        if isinstance(response, (APIError, Exception)):
+            self.stats.errors += 1
+            self.stats.last_error = response
+            return None
+        try:
+            siri = Siri.from_bytes(response)
+        except (ValueError, etree.LxmlError) as exc:
+            # ValueError covers SiriParsingError, pydantic's ValidationError for a
+            # malformed activity and UnicodeDecodeError.
+            self.stats.errors += 1
+            self.stats.last_error = exc
+            return None
+        if not siri.service_delivery.vehicle_monitoring_delivery.vehicle_activities:
+            self.stats.empty += 1
+            return None
+        return siri
+
+    def _interval(self, siri: Optional[Siri]) -> float:
+        """
+        Returns the number of seconds until the fetch after this one.
+        """
+        if siri is None:
+            self.failures += 1
+            interval = self.min_interval * self.backoff**self.failures
+            return min(interval, self.max_interval)
+
+        self.failures = 0
+        delivery = siri.service_delivery.vehicle_monitoring_delivery
+        try:
+            interval = parse_duration(delivery.shortest_possible_cycle)
+        except ValueError:
+            interval = self.min_interval
+        valid_until = delivery.valid_until
+        if valid_until.tzinfo is None:
+            valid_until = valid_until.replace(tzinfo=timezone.utc)
+        remaining = (valid_until - self.now()).total_seconds()
+        if remaining > 0:
+            interval = min(interval, remaining)
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def _reschedule(self, scheduled: float, interval: float) -> float:
+        """
+        Returns when to make the next fetch, skipping any that are already overdue.
+        """
+        scheduled += interval
+        overdue = self.clock() - scheduled
+        if overdue > 0:
+            skipped = int(overdue // interval) + 1
+            self.stats.skipped += skipped
+            scheduled += skipped * interval
+        return scheduled
+
+    def _result(self, siri: Siri, started: float, drift: float) -> PollResult:
+        latency = self.clock() - started
+        self.stats.record(latency, drift)
+        diff = None if self.differ is None else self.differ.update(siri)
+        return PollResult(siri, diff, latency, drift)
+
+
+class SiriVMPoller(BasePoller):
+    """
+    Polls a BODSClient's SIRI-VM data feed, yielding a PollResult for each
+    delivery with vehicles in it.
+
+    Transport errors such as timeouts are backed off from like API errors, the
+    last one is kept in ``stats.last_error``. See ``BasePoller``.
+
+    Args:
+        sleep: The function to wait with, ``time.sleep`` by default.
+    """
+
+    _transport_errors = (requests.RequestException,)
+
+    def __init__(
+        self,
+        client: BODSClient,
+        *args: Any,
+        sleep: Callable[[float], None] = time.sleep,
+        **kwargs: Any,
+    ):
+        super().__init__(client, *args, **kwargs)
+        self.sleep = sleep
+
+    def __iter__(self) -> Iterator[PollResult]:
+        return self.poll()
+
+    def poll(self, max_polls: Optional[int] = None) -> Iterator[PollResult]:
+        """
+        Polls the data feed, forever unless max_polls fetches are given.
+        """
+        scheduled = self.clock()
+        interval: Optional[float] = None
+        fetches = 0
+        while max_polls is None or fetches < max_polls:
+            if interval is not None:
+                scheduled = self._reschedule(scheduled, interval)
+            delay = scheduled - self.clock()
+            if delay > 0:
+                self.sleep(delay)
+            started = self.clock()
+            drift = max(0.0, started - scheduled)
+            fetches += 1
+            try:
+                response = self.client.get_siri_vm_data_feed(self.query)
+            except self._transport_errors as exc:
+                response = exc
+            siri = self._parse(response)
+            interval = self._interval(siri)
+            if siri is not None:
+                yield self._result(siri, started, drift)
+
+
+class AsyncSiriVMPoller(BasePoller):
+    """
+    Polls an AsyncBODSClient's SIRI-VM data feed, see ``SiriVMPoller``.
+
+    Args:
+        sleep: The coroutine function to wait with, ``asyncio.sleep`` by default.
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        *args: Any,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+        **kwargs: Any,
+    ):
+        super().__init__(client, *args, **kwargs)
+        self.sleep = sleep
+        # httpx is optional, it is only needed alongside an AsyncBODSClient.
+        import httpx
+
+        self._transport_errors = (httpx.HTTPError,)
+
+    def __aiter__(self) -> AsyncIterator[PollResult]:
+        return self.poll()
+
+    async def poll(self, max_polls: Optional[int] = None) -> AsyncIterator[PollResult]:
+        """
+        Polls the data feed, forever unless max_polls fetches are given.
+        """
+        scheduled = self.clock()
+        interval: Optional[float] = None
+        fetches = 0
+        while max_polls is None or fetches < max_polls:
+            if interval is not None:
+                scheduled = self._reschedule(scheduled, interval)
+            delay = scheduled - self.clock()
+            if delay > 0:
+                await self.sleep(delay)
+            started = self.clock()
+            drift = max(0.0, started - scheduled)
+            fetches += 1
+            try:
+                response = await self.client.get_siri_vm_data_feed(self.query)
+            except self._transport_errors as exc:
+                response = exc
+            siri = self._parse(response)
+            interval = self._interval(siri)
+            if siri is not None:
+                yield self._result(siri, started, drift)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+query.py a module for preparing the query strings of requests to the BODS API.
+"""
+
+from typing import Any, Dict, List, Tuple, Union
+from urllib.parse import urlencode
+
+from pydantic import BaseModel
+
+from bods_client.constants import (
+    FARES_PATH,
+    GTFS_RT_PATH,
+    SIRI_VM_PATH,
+    TIMETABLES_PATH,
+)
+from bods_client.models.avl import GTFSRTParams, SIRIVMParams
+from bods_client.models.fares import FaresParams
+from bods_client.models.timetables import TimetableParams
+
+QueryParams = Union[SIRIVMParams, GTFSRTParams, TimetableParams, FaresParams]
+
+_PATHS = (
+    (SIRIVMParams, SIRI_VM_PATH),
+    (GTFSRTParams, GTFS_RT_PATH),
+    (TimetableParams, TIMETABLES_PATH),
+    (FaresParams, FARES_PATH),
+)
+
+
+def to_query_params(params: BaseModel) -> Dict[str, Any]:
+    """
+    Returns the query parameters of params, by their aliases.
+    """
+    query_dict = getattr(params, "_query_dict", None)
+    if query_dict is not None:
+        return query_dict(by_alias=True, exclude_none=True)
+    return params.model_dump(mode="json", by_alias=True, exclude_none=True)
+
+
+def encode_query(query: Dict[str, Any]) -> str:
+    """
+    Returns query as a query string, a list is sent as repeated parameters as
+    requests does.
+    """
+    pairs: List[Tuple[str, Any]] = []
+    for name, value in query.items():
+        values = value if isinstance(value, list) else [value]
+        pairs += [(name, item) for item in values]
+    return urlencode(pairs)
+
+
+class PreparedQuery:
+    """
+    A query built once from its params, to be sent again and again.
+
+    Passing params to a client method serializes them on every call. A poller can
+    prepare its params once instead and pass the PreparedQuery to
+    ``get_siri_vm_data_feed``, ``get_gtfs_rt_data_feed``,
+    ``get_timetable_datasets`` or ``get_fares_datasets`` of ``BODSClient`` and
+    ``AsyncBODSClient``. A PreparedQuery can be shared between clients and threads.
+    Later changes to params are not seen.
+
+    Args:
+        params: The SIRIVMParams, GTFSRTParams, TimetableParams or FaresParams to
+        prepare.
+
+    Attributes:
+        path: The path of the endpoint the params are for.
+        query: The query parameters, without the api key.
+        query_string: The url encoded query parameters.
+    """
+
+    __slots__ = ("params", "path", "query", "query_string", "_urls")
+
+    def __init__(self, params: QueryParams):
+        path = next((path for type_, path in _PATHS if isinstance(params, type_)), None)
+        if path is None:
+            raise TypeError(f"Cannot prepare a query from {type(params).__name__}.")
+        self.params = params.model_copy(deep=True)
+        self.path = path
+        self.query = to_query_params(params)
+        self.query_string = encode_query(self.query)
+        self._urls: Dict[str, str] = {}
+
+    def url(self, endpoint: str) -> str:
+        """
+        Returns the url of the query at endpoint, without the api key.
+        """
+        url = self._urls.get(endpoint)
+        if url is None:
+            url = endpoint
+            if self.query_string:
+                url = f"{endpoint}?{self.query_string}"
+            self._urls[endpoint] = url
+        return url
+
+    def __repr__(self) -> str:
+        return f"PreparedQuery({self.path!r}, {self.query_string!r})"
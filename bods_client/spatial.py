@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+"""
+spatial.py a module for indexing vehicle positions by location.
+"""
+
+import heapq
+from array import array
+from math import asin, cos, degrees, floor, isnan, radians, sin
+from typing import Dict, Generic, Iterable, Iterator, List, Tuple, TypeVar
+
+from google.transit.gtfs_realtime_pb2 import FeedEntity, FeedMessage
+
+from bods_client.columnar import VehiclePositions
+from bods_client.constants import DEFAULT_CELL_SIZE
+from bods_client.geo import EARTH_RADIUS, haversine
+from bods_client.models.base import BoundingBox
+from bods_client.models.siri import Siri, VehicleActivity
+
+ItemType = TypeVar("ItemType")
+Cell = Tuple[int, int]
+
+
+class SpatialIndex(Generic[ItemType]):
+    """
+    A uniform grid over longitude and latitude for finding the items near a
+    location without scanning them all.
+
+    Building the index is a single pass over the points, so it is cheap to
+    rebuild for every snapshot. Distances are haversine distances in metres.
+    Longitudes are not wrapped at the antimeridian.
+
+    Args:
+        points: (longitude, latitude, item) for each item, items without a
+        location should be left out.
+        cell_size: The width and height of each grid cell in degrees.
+    """
+
+    def __init__(
+        self,
+        points: Iterable[Tuple[float, float, ItemType]],
+        cell_size: float = DEFAULT_CELL_SIZE,
+    ):
+        self.cell_size = cell_size
+        self.longitudes = array("d")
+        self.latitudes = array("d")
+        self.items: List[ItemType] = []
+        self._cells: Dict[Cell, List[int]] = {}
+        for longitude, latitude, item in points:
+            index = len(self.items)
+            self.longitudes.append(longitude)
+            self.latitudes.append(latitude)
+            self.items.append(item)
+            self._cells.setdefault(self._cell(longitude, latitude), []).append(index)
+        # The range of occupied cells, which bounds the search for the nearest.
+        self._extent = (
+            min((x for x, _ in self._cells), default=0),
+            min((y for _, y in self._cells), default=0),
+            max((x for x, _ in self._cells), default=0),
+            max((y for _, y in self._cells), default=0),
+        )
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    @classmethod
+    def from_siri(
+        cls, siri: Siri, cell_size: float = DEFAULT_CELL_SIZE
+    ) -> "SpatialIndex[VehicleActivity]":
+        """
+        Indexes the vehicle activities in a SIRI-VM snapshot.
+        """
+        delivery = siri.service_delivery.vehicle_monitoring_delivery
+        points = (
+            (location.longitude, location.latitude, activity)
+            for activity in delivery.vehicle_activities
+            for location in (activity.monitored_vehicle_journey.vehicle_location,)
+            if location is not None
+        )
+        return cls(points, cell_size=cell_size)
+
+    @classmethod
+    def from_gtfs_rt(
+        cls, message: FeedMessage, cell_size: float = DEFAULT_CELL_SIZE
+    ) -> "SpatialIndex[FeedEntity]":
+        """
+        Indexes the entities with a vehicle position in a GTFS-RT feed.
+        """
+        points = (
+            (
+                entity.vehicle.position.longitude,
+                entity.vehicle.position.latitude,
+                entity,
+            )
+            for entity in message.entity
+            if entity.HasField("vehicle") and entity.vehicle.HasField("position")
+        )
+        return cls(points, cell_size=cell_size)
+
+    @classmethod
+    def from_vehicle_positions(
+        cls, positions: VehiclePositions, cell_size: float = DEFAULT_CELL_SIZE
+    ) -> "SpatialIndex[int]":
+        """
+        Indexes the rows of a VehiclePositions, the items are the row numbers.
+        """
+        points = (
+            (longitude, latitude, row)
+            for row, (longitude, latitude) in enumerate(
+                zip(positions.longitude, positions.latitude)
+            )
+            if not (isnan(longitude) or isnan(latitude))
+        )
+        return cls(points, cell_size=cell_size)
+
+    def _cell(self, longitude: float, latitude: float) -> Cell:
+        return floor(longitude / self.cell_size), floor(latitude / self.cell_size)
+
+    def _cell_range(self, bounding_box: BoundingBox) -> Tuple[Cell, Cell]:
+        return (
+            self._cell(bounding_box.min_longitude, bounding_box.min_latitude),
+            self._cell(bounding_box.max_longitude, bounding_box.max_latitude),
+        )
+
+    def _cells_within(
+        self, bounding_box: BoundingBox
+    ) -> Iterator[Tuple[Cell, List[int]]]:
+        (min_x, min_y), (max_x, max_y) = self._cell_range(bounding_box)
+        if (max_x - min_x + 1) * (max_y - min_y + 1) > len(self._cells):
+            # Fewer cells are occupied than the box covers, so check those instead.
+            for (x, y), indices in self._cells.items():
+                if min_x <= x <= max_x and min_y <= y <= max_y:
+                    yield (x, y), indices
+        else:
+            for x in range(min_x, max_x + 1):
+                for y in range(min_y, max_y + 1):
+                    indices = self._cells.get((x, y))
+                    if indices is not None:
+                        yield (x, y), indices
+
+    def within(self, bounding_box: BoundingBox) -> List[ItemType]:
+        """
+        Returns the items inside bounding_box, edges included, in the order they
+        were indexed.
+        """
+        (min_x, min_y), (max_x, max_y) = self._cell_range(bounding_box)
+        min_longitude, max_longitude = (
+            bounding_box.min_longitude,
+            bounding_box.max_longitude,
+        )
+        min_latitude, max_latitude = (
+            bounding_box.min_latitude,
+            bounding_box.max_latitude,
+        )
+        longitudes, latitudes = self.longitudes, self.latitudes
+
+        found: List[int] = []
+        for (x, y), indices in self._cells_within(bounding_box):
+            if min_x < x < max_x and min_y < y < max_y:
+                found.extend(indices)
+                continue
+            for index in indices:
+                if not min_longitude <= longitudes[index] <= max_longitude:
+                    continue
+                if min_latitude <= latitudes[index] <= max_latitude:
+                    found.append(index)
+        found.sort()
+        return [self.items[index] for index in found]
+
+    def within_radius(
+        self, longitude: float, latitude: float, radius: float
+    ) -> List[Tuple[ItemType, float]]:
+        """
+        Returns the items within radius metres of a point with their distances,
+        nearest first.
+        """
+        # The latitude span is exact, the longitude span is widened by the
+        # cosine of the latitude furthest from the equator within the radius.
+        span = degrees(radius / EARTH_RADIUS)
+        longitude_span = span / cos(radians(min(89.9, abs(latitude) + span)))
+        bounding_box = BoundingBox(
+            min_longitude=longitude - longitude_span,
+            min_latitude=latitude - span,
+            max_longitude=longitude + longitude_span,
+            max_latitude=latitude + span,
+        )
+        results = []
+        longitudes, latitudes = self.longitudes, self.latitudes
+        for _, indices in self._cells_within(bounding_box):
+            for index in indices:
+                distance = haversine(
+                    longitude, latitude, longitudes[index], latitudes[index]
+                )
+                if distance <= radius:
+                    results.append((distance, index))
+        results.sort()
+        return [(self.items[index], distance) for distance, index in results]
+
+    def nearest(
+        self, longitude: float, latitude: float, k: int = 1
+    ) -> List[Tuple[ItemType, float]]:
+        """
+        Returns the k items nearest to a point with their distances, nearest first.
+
+        Cells are searched in rings around the point until no unsearched cell can
+        hold anything nearer than the k-th nearest item found.
+        """
+        if k <= 0 or not self._cells:
+            return []
+        center_x, center_y = self._cell(longitude, latitude)
+        min_x, min_y, max_x, max_y = self._extent
+        last_ring = max(
+            center_x - min_x, max_x - center_x, center_y - min_y, max_y - center_y
+        )
+        cos_latitude = cos(radians(latitude))
+
+        # A max heap of the k nearest as (-distance, -index).
+        heap: List[Tuple[float, int]] = []
+        for ring in range(last_ring + 1):
+            if len(heap) == k and ring > 1:
+                # Every point in the rings not yet searched is at least ring - 1
+                # cells away along one axis, and the distance to a meridian or
+                # parallel that far away bounds its distance from below.
+                reach = radians(min(90.0, (ring - 1) * self.cell_size))
+                bound = EARTH_RADIUS * asin(min(1.0, sin(reach) * cos_latitude))
+                if bound > -heap[0][0]:
+                    break
+            for cell in self._ring(center_x, center_y, ring):
+                for index in self._cells.get(cell, ()):
+                    distance = haversine(
+                        longitude,
+                        latitude,
+                        self.longitudes[index],
+                        self.latitudes[index],
+                    )
+                    entry = (-distance, -index)
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+
+        nearest = sorted(
+            (-neg_distance, -neg_index) for neg_distance, neg_index in heap
+        )
+        return [(self.items[index], distance) for distance, index in nearest]
+
+    @staticmethod
+    def _ring(center_x: int, center_y: int, ring: int) -> Iterator[Cell]:
+        if ring == 0:
+            yield center_x, center_y
+            return
+        for x in range(center_x - ring, center_x + ring + 1):
+            yield x, center_y - ring
+            yield x, center_y + ring
+        for y in range(center_y - ring + 1, center_y + ring):
+            yield center_x - ring, y
+            yield center_x + ring, y
@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+"""
+sync.py a module for keeping a local copy of the BODS data set catalogue.
+"""
+
+import os
+import sqlite3
+from datetime import datetime
+from types import TracebackType
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+from bods_client.client import BODSClient
+from bods_client.constants import (
+    DATASET_STATUSES,
+    DEFAULT_PAGE_WORKERS,
+    DEFAULT_SYNC_PAGE_SIZE,
+    FARES,
+    TIMETABLES,
+)
+from bods_client.models import (
+    APIError,
+    APIRequestError,
+    Fares,
+    Timetable,
+    TimetableParams,
+)
+from bods_client.models.base import BaseDataset
+from bods_client.models.fares import FaresParams
+
+_MODELS: Dict[str, Type[BaseDataset]] = {TIMETABLES: Timetable, FARES: Fares}
+
+
+class SyncResult(NamedTuple):
+    inserted: List[int]
+    updated: List[int]
+    expired: List[int]
+    deleted: List[int]
+    high_water_mark: Optional[datetime]
+    full_refresh: bool
+
+
+class DatasetStore:
+    """
+    A SQLite store of timetable and fares data set metadata.
+
+    Each data set is stored as JSON alongside indexed id, modified, status and
+    operator_name columns. The high-water mark of each kind of data set, the
+    latest modified time seen, is stored with it.
+
+    Args:
+        path: The database file, an in-memory database by default.
+    """
+
+    def __init__(self, path: Union[str, "os.PathLike[str]"] = ":memory:"):
+        self.path = path
+        self._connection = sqlite3.connect(path)
+        with self._connection:
+            for kind in _MODELS:
+                self._connection.execute(
+                    f"CREATE TABLE IF NOT EXISTS {kind} ("
+                    "id INTEGER PRIMARY KEY, modified TEXT NOT NULL, "
+                    "status TEXT NOT NULL, operator_name TEXT NOT NULL, "
+                    "data TEXT NOT NULL)"
+                )
+                for column in ("modified", "status", "operator_name"):
+                    self._connection.execute(
+                        f"CREATE INDEX IF NOT EXISTS {kind}_{column} "
+                        f"ON {kind} ({column})"
+                    )
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                "kind TEXT PRIMARY KEY, high_water_mark TEXT NOT NULL)"
+            )
+
+    @staticmethod
+    def _table(kind: str) -> str:
+        if kind not in _MODELS:
+            raise ValueError(f"unknown data set kind {kind!r}.")
+        return kind
+
+    def upsert(
+        self, kind: str, datasets: Iterable[BaseDataset]
+    ) -> Tuple[List[int], List[int]]:
+        """
+        Inserts new data sets and updates changed ones, unchanged data sets are
+        not written.
+
+        Returns:
+            ids: The ids of the inserted and of the updated data sets.
+        """
+        table = self._table(kind)
+        inserted: List[int] = []
+        updated: List[int] = []
+        with self._connection:
+            for dataset in datasets:
+                data = dataset.model_dump_json(by_alias=True, exclude_none=True)
+                row = self._connection.execute(
+                    f"SELECT data FROM {table} WHERE id = ?", (dataset.id,)
+                ).fetchone()
+                if row is not None and row[0] == data:
+                    continue
+                self._connection.execute(
+                    f"INSERT OR REPLACE INTO {table} "
+                    "(id, modified, status, operator_name, data) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (
+                        dataset.id,
+                        dataset.modified.isoformat(),
+                        dataset.status,
+                        dataset.operator_name,
+                        data,
+                    ),
+                )
+                (inserted if row is None else updated).append(dataset.id)
+        return inserted, updated
+
+    def remove(self, kind: str, ids: Iterable[int]) -> List[int]:
+        """
+        Removes data sets, returning the ids of those that were stored.
+        """
+        table = self._table(kind)
+        removed: List[int] = []
+        with self._connection:
+            for id_ in ids:
+                cursor = self._connection.execute(
+                    f"DELETE FROM {table} WHERE id = ?", (id_,)
+                )
+                if cursor.rowcount:
+                    removed.append(id_)
+        return removed
+
+    def get(self, kind: str, dataset_id: int) -> Optional[BaseDataset]:
+        row = self._connection.execute(
+            f"SELECT data FROM {self._table(kind)} WHERE id = ?", (dataset_id,)
+        ).fetchone()
+        return None if row is None else _MODELS[kind].model_validate_json(row[0])
+
+    def datasets(
+        self, kind: str, operator_name: Optional[str] = None
+    ) -> Iterator[BaseDataset]:
+        """
+        Iterates over the stored data sets in id order.
+        """
+        query = f"SELECT data FROM {self._table(kind)}"
+        args: Tuple[str, ...] = ()
+        if operator_name is not None:
+            query += " WHERE operator_name = ?"
+            args = (operator_name,)
+        model = _MODELS[kind]
+        for (data,) in self._connection.execute(query + " ORDER BY id", args):
+            yield model.model_validate_json(data)
+
+    def ids(self, kind: str) -> Set[int]:
+        rows = self._connection.execute(f"SELECT id FROM {self._table(kind)}")
+        return {id_ for (id_,) in rows}
+
+    def count(self, kind: str) -> int:
+        query = f"SELECT COUNT(*) FROM {self._table(kind)}"
+        return self._connection.execute(query).fetchone()[0]
+
+    def high_water_mark(self, kind: str) -> Optional[datetime]:
+        row = self._connection.execute(
+            "SELECT high_water_mark FROM sync_state WHERE kind = ?",
+            (self._table(kind),),
+        ).fetchone()
+        return None if row is None else datetime.fromisoformat(row[0])
+
+    def set_high_water_mark(self, kind: str, mark: datetime) -> None:
+        with self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO sync_state (kind, high_water_mark) "
+                "VALUES (?, ?)",
+                (self._table(kind), mark.isoformat()),
+            )
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self) -> "DatasetStore":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.close()
+
+
+class CatalogueSync:
+    """
+    Keeps a DatasetStore up to date with the BODS timetable and fares catalogues.
+
+    The first sync of each catalogue, or one with full_refresh=True, lists every
+    data set and prunes any the store holds that BODS no longer lists. Later
+    timetable syncs only fetch data sets modified since the high-water mark.
+    Data sets that have moved to a status that is not kept are removed as
+    expired. If the store and BODS then disagree on the number of data sets,
+    some were deleted, and the ids are reconciled with a full listing.
+
+    The fares API cannot filter by modified date, so every fares sync lists the
+    catalogue, but only changed data sets are written.
+
+    Args:
+        client: The client to request the catalogues with.
+        store: The store to keep the data sets in.
+        statuses: The data set statuses to keep.
+        page_size: The number of data sets to request per page.
+        max_workers: The maximum number of pages to fetch concurrently.
+    """
+
+    def __init__(
+        self,
+        client: BODSClient,
+        store: DatasetStore,
+        statuses: Sequence[str] = ("published",),
+        page_size: int = DEFAULT_SYNC_PAGE_SIZE,
+        max_workers: int = DEFAULT_PAGE_WORKERS,
+    ):
+        self.client = client
+        self.store = store
+        self.statuses = tuple(statuses)
+        self.page_size = page_size
+        self.max_workers = max_workers
+
+    def sync(self, full_refresh: bool = False) -> Dict[str, SyncResult]:
+        """
+        Syncs the timetable and the fares catalogues.
+        """
+        return {
+            TIMETABLES: self.sync_timetables(full_refresh=full_refresh),
+            FARES: self.sync_fares(full_refresh=full_refresh),
+        }
+
+    def sync_timetables(self, full_refresh: bool = False) -> SyncResult:
+        """
+        Syncs the timetable catalogue.
+
+        Raises:
+            APIRequestError: If any request fails, the store is left consistent
+            but the high-water mark is not advanced.
+        """
+        mark = self.store.high_water_mark(TIMETABLES)
+        if full_refresh or mark is None:
+            return self._full_refresh(TIMETABLES, self._iter_timetables)
+
+        modified: List[BaseDataset] = []
+        changed: List[BaseDataset] = []
+        stale: List[int] = []
+        for status in DATASET_STATUSES:
+            for dataset in self._iter_timetables(status, mark):
+                modified.append(dataset)
+                if status in self.statuses:
+                    changed.append(dataset)
+                else:
+                    stale.append(dataset.id)
+
+        inserted, updated = self.store.upsert(TIMETABLES, changed)
+        expired = self.store.remove(TIMETABLES, stale)
+        deleted: List[int] = []
+        if self._remote_count() != self.store.count(TIMETABLES):
+            remote_ids = {
+                dataset.id
+                for status in self.statuses
+                for dataset in self._iter_timetables(status)
+            }
+            deleted = self.store.remove(
+                TIMETABLES, sorted(self.store.ids(TIMETABLES) - remote_ids)
+            )
+        mark = self._advance(TIMETABLES, mark, modified)
+        return SyncResult(inserted, updated, expired, deleted, mark, False)
+
+    def sync_fares(self, full_refresh: bool = False) -> SyncResult:
+        """
+        Syncs the fares catalogue.
+
+        Raises:
+            APIRequestError: If any request fails.
+        """
+        return self._full_refresh(FARES, self._iter_fares)
+
+    def _full_refresh(
+        self, kind: str, fetch: Callable[[str], Iterator[BaseDataset]]
+    ) -> SyncResult:
+        datasets = [dataset for status in self.statuses for dataset in fetch(status)]
+        inserted, updated = self.store.upsert(kind, datasets)
+        remote_ids = {dataset.id for dataset in datasets}
+        deleted = self.store.remove(kind, sorted(self.store.ids(kind) - remote_ids))
+        mark = self._advance(kind, self.store.high_water_mark(kind), datasets)
+        return SyncResult(inserted, updated, [], deleted, mark, True)
+
+    def _advance(
+        self, kind: str, mark: Optional[datetime], datasets: Iterable[BaseDataset]
+    ) -> Optional[datetime]:
+        for dataset in datasets:
+            if mark is None or dataset.modified > mark:
+                mark = dataset.modified
+        if mark is not None:
+            self.store.set_high_water_mark(kind, mark)
+        return mark
+
+    def _iter_timetables(
+        self, status: str, modified_date: Optional[datetime] = None
+    ) -> Iterator[Timetable]:
+        params = TimetableParams(
+            status=status, modified_date=modified_date, limit=self.page_size
+        )
+        return self.client.iter_timetable_datasets(params, self.max_workers)
+
+    def _iter_fares(self, status: str) -> Iterator[Fares]:
+        params = FaresParams(status=status, limit=self.page_size)
+        return self.client.iter_fares_datasets(params, self.max_workers)
+
+    def _remote_count(self) -> int:
+        count = 0
+        for status in self.statuses:
+            page = self.client.get_timetable_datasets(
+                TimetableParams(status=status, limit=1)
+            )
+            if isinstance(page, APIError):
+                raise APIRequestError(page)
+            count += page.count
+        return count
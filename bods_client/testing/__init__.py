@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+"""
+Synthetic BODS payloads and a local stub of the BODS API, for tests, benchmarks
+and load tests that shouldn't touch the network.
+"""
+
+from .generator import (
+    fares_datasets,
+    gtfs_rt_archive,
+    gtfs_rt_feed,
+    siri_vm_archive,
+    siri_vm_packet,
+    timetable_datasets,
+    zip_archive,
+)
+from .server import StubBODSServer
+
+__all__ = [
+    "StubBODSServer",
+    "fares_datasets",
+    "gtfs_rt_archive",
+    "gtfs_rt_feed",
+    "siri_vm_archive",
+    "siri_vm_packet",
+    "timetable_datasets",
+    "zip_archive",
+]
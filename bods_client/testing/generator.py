@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""
+generator.py a module for generating synthetic BODS payloads.
+
+The payloads are deterministic, the same arguments always give the same bytes, so
+they can be used for tests, benchmarks and load tests alike.
+"""
+
+import io
+import zipfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from bods_client.constants import BODS_HOST
+
+DEFAULT_TIMESTAMP = datetime(2022, 1, 29, 19, 49, 42, tzinfo=timezone.utc)
+
+SIRI_HEADER = """<?xml version="1.0"?>
+<Siri xmlns="http://www.siri.org.uk/siri" version="2.0">
+  <ServiceDelivery>
+    <ResponseTimestamp>{timestamp}</ResponseTimestamp>
+    <ProducerRef>ItoWorld</ProducerRef>
+    <VehicleMonitoringDelivery>
+      <ResponseTimestamp>{timestamp}</ResponseTimestamp>
+      <RequestMessageRef>cc212489-6e88-4681-876d-d66223d3e117</RequestMessageRef>
+      <ValidUntil>{valid_until}</ValidUntil>
+      <ShortestPossibleCycle>PT5S</ShortestPossibleCycle>
+"""
+
+SIRI_ACTIVITY = """      <VehicleActivity>
+        <RecordedAtTime>{recorded_at}</RecordedAtTime>
+        <ItemIdentifier>item-{index}</ItemIdentifier>
+        <ValidUntilTime>{valid_until}</ValidUntilTime>
+        <MonitoredVehicleJourney>
+          <LineRef>{line}</LineRef>
+          <DirectionRef>outbound</DirectionRef>
+          <FramedVehicleJourneyRef>
+            <DataFrameRef>{date}</DataFrameRef>
+            <DatedVehicleJourneyRef>{line}_{index}</DatedVehicleJourneyRef>
+          </FramedVehicleJourneyRef>
+          <PublishedLineName>{line}</PublishedLineName>
+          <OperatorRef>OP{operator}</OperatorRef>
+          <OriginRef>2400A001770A</OriginRef>
+          <OriginName>Origin</OriginName>
+          <DestinationRef>2400A001770B</DestinationRef>
+          <DestinationName>Destination</DestinationName>
+          <OriginAimedDepartureTime>{recorded_at}</OriginAimedDepartureTime>
+          <VehicleLocation>
+            <Longitude>{longitude:.6f}</Longitude>
+            <Latitude>{latitude:.6f}</Latitude>
+          </VehicleLocation>
+          <Bearing>{bearing:.1f}</Bearing>
+          <BlockRef>{block}</BlockRef>
+          <VehicleJourneyRef>{index}</VehicleJourneyRef>
+          <VehicleRef>{index}</VehicleRef>
+        </MonitoredVehicleJourney>
+      </VehicleActivity>
+"""
+
+SIRI_FOOTER = """    </VehicleMonitoringDelivery>
+  </ServiceDelivery>
+</Siri>
+"""
+
+
+def _vehicle(index: int) -> Dict[str, Any]:
+    """
+    Returns the line, operator and position of a vehicle, spread over Great Britain.
+    """
+    return {
+        "line": index % 300,
+        "operator": index % 50,
+        "block": index % 1000,
+        "longitude": -5.0 + (index % 700) / 100,
+        "latitude": 50.0 + (index % 900) / 100,
+        "bearing": index % 360,
+        "age": index % 60,
+    }
+
+
+def siri_vm_packet(vehicles: int, timestamp: Optional[datetime] = None) -> bytes:
+    """
+    Returns a SIRI-VM document with the given number of vehicle activities.
+
+    Args:
+        vehicles: The number of vehicle activities.
+        timestamp: The time of the response, vehicles were recorded up to a minute
+        before it.
+    """
+    now = timestamp or DEFAULT_TIMESTAMP
+    valid_until = (now + timedelta(minutes=5)).isoformat()
+    parts = [SIRI_HEADER.format(timestamp=now.isoformat(), valid_until=valid_until)]
+    for index in range(vehicles):
+        vehicle = _vehicle(index)
+        recorded_at = now - timedelta(seconds=vehicle.pop("age"))
+        parts.append(
+            SIRI_ACTIVITY.format(
+                index=index,
+                recorded_at=recorded_at.isoformat(),
+                valid_until=valid_until,
+                date=now.date().isoformat(),
+                **vehicle,
+            )
+        )
+    parts.append(SIRI_FOOTER)
+    return "".join(parts).encode("utf-8")
+
+
+def gtfs_rt_feed(vehicles: int, timestamp: Optional[datetime] = None) -> bytes:
+    """
+    Returns a serialized GTFS-RT FeedMessage with the given number of vehicles,
+    the same vehicles as ``siri_vm_packet``.
+    """
+    now = timestamp or DEFAULT_TIMESTAMP
+    seconds = int(now.timestamp())
+    message = FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.header.timestamp = seconds
+    for index in range(vehicles):
+        vehicle = _vehicle(index)
+        entity = message.entity.add()
+        entity.id = str(index)
+        position = entity.vehicle
+        position.trip.trip_id = f"{vehicle['line']}_{index}"
+        position.trip.route_id = str(vehicle["line"])
+        position.trip.start_date = now.strftime("%Y%m%d")
+        position.position.longitude = vehicle["longitude"]
+        position.position.latitude = vehicle["latitude"]
+        position.position.bearing = vehicle["bearing"]
+        position.vehicle.id = str(index)
+        position.timestamp = seconds - vehicle["age"]
+    return message.SerializeToString()
+
+
+def zip_archive(name: str, content: bytes) -> bytes:
+    """
+    Returns a zip archive holding content as name.
+    """
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def siri_vm_archive(vehicles: int, timestamp: Optional[datetime] = None) -> bytes:
+    """
+    Returns a SIRI-VM bulk archive, siri.xml zipped as the BODS bulk download is.
+    """
+    return zip_archive("siri.xml", siri_vm_packet(vehicles, timestamp))
+
+
+def gtfs_rt_archive(vehicles: int, timestamp: Optional[datetime] = None) -> bytes:
+    """
+    Returns a GTFS-RT bulk archive, gtfsrt.bin zipped as the BODS bulk download is.
+    """
+    return zip_archive("gtfsrt.bin", gtfs_rt_feed(vehicles, timestamp))
+
+
+def _dataset(index: int, kind: str, host: str) -> Dict[str, Any]:
+    return {
+        "id": index,
+        "created": "2020-10-21T12:12:34+00:00",
+        "modified": "2021-09-15T17:17:42+00:00",
+        "operatorName": f"Operator {index % 50}",
+        "noc": [f"OP{index % 50}", f"OP{index % 50 + 50}"],
+        "name": f"Operator {index % 50}_{index}",
+        "description": f"Synthetic {kind} data set",
+        "comment": "Automatically detected change in data set",
+        "status": "published",
+        "url": f"{host}/{kind}/dataset/{index}/download/",
+        "extension": "zip",
+    }
+
+
+def timetable_datasets(
+    count: int, start: int = 1, host: str = BODS_HOST
+) -> List[Dict[str, Any]]:
+    """
+    Returns the JSON of count timetable data sets with ids from start.
+
+    Args:
+        count: The number of data sets.
+        start: The id of the first data set.
+        host: The host their download urls point to.
+    """
+    datasets = []
+    for index in range(start, start + count):
+        dataset = _dataset(index, "timetable", host)
+        dataset.update(
+            {
+                "lines": [str(line) for line in range(index % 40)],
+                "firstStartDate": "2021-01-17T00:00:00+00:00",
+                "firstEndDate": "2021-09-19T23:59:00+00:00",
+                "lastEndDate": "2021-09-19T23:59:00+00:00",
+                "adminAreas": [
+                    {"atco_code": f"{area:03d}", "name": f"Area {area}"}
+                    for area in range(index % 10)
+                ],
+                "localities": [
+                    {"gazetteer_id": f"E{locality:07d}", "name": "Locality"}
+                    for locality in range(index % 100)
+                ],
+                "dqScore": "96.2%",
+                "dqRag": "amber",
+                "bodsCompliance": False,
+            }
+        )
+        datasets.append(dataset)
+    return datasets
+
+
+def fares_datasets(
+    count: int, start: int = 1, host: str = BODS_HOST
+) -> List[Dict[str, Any]]:
+    """
+    Returns the JSON of count fares data sets with ids from start, see
+    ``timetable_datasets``.
+    """
+    datasets = []
+    for index in range(start, start + count):
+        dataset = _dataset(index, "fares", host)
+        dataset.update(
+            {
+                "numOfLines": index % 130,
+                "numOfFareZones": index % 2000,
+                "numOfSalesOfferPackages": index % 260,
+                "numOfFareProducts": index % 130,
+                "numOfUserTypes": index % 600,
+            }
+        )
+        datasets.append(dataset)
+    return datasets
@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+server.py a module for running a local stub of the BODS API.
+"""
+
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import TracebackType
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple, Type
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from bods_client.constants import (
+    FARES_PATH,
+    GTFS_RT_PATH,
+    SIRI_VM_PATH,
+    TIMETABLES_PATH,
+)
+from bods_client.testing.generator import (
+    fares_datasets,
+    gtfs_rt_archive,
+    gtfs_rt_feed,
+    siri_vm_archive,
+    siri_vm_packet,
+    timetable_datasets,
+)
+
+JSON = "application/json"
+XML = "text/xml"
+ZIP = "application/zip"
+PROTOBUF = "application/x-protobuf"
+
+Response = Tuple[int, str, bytes]
+
+_DATASET_ID = r"(?:(?P<id>\d+)/)?"
+
+
+class StubBODSServer:
+    """
+    A local HTTP server that behaves like the BODS API, for load tests and
+    tests that shouldn't touch the network.
+
+    It serves synthetic timetable and fares data sets, paginated with limit and
+    offset, a SIRI-VM and GTFS-RT feed of the given number of vehicles and the
+    bulk archives of both. Query filters other than limit and offset are ignored.
+    Point a client at it with ``BODSClient(api_key, base_url=server.api_url)``.
+
+    The server runs in a background thread once started, or within a with block.
+
+    Args:
+        timetables: The number of timetable data sets.
+        fares: The number of fares data sets.
+        vehicles: The number of vehicles in the feeds and archives.
+        latency: Seconds to wait before every response.
+        error_rate: The chance of answering any request with error_status.
+        error_status: The status of injected errors.
+        seed: Seeds the injected errors, so a run can be repeated.
+        api_key: Reject requests without this api_key with 401, by default any
+        key is accepted.
+        host: The host to listen on.
+        port: The port to listen on, by default a free port is chosen.
+    """
+
+    def __init__(
+        self,
+        timetables: int = 100,
+        fares: int = 20,
+        vehicles: int = 1000,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = HTTPStatus.SERVICE_UNAVAILABLE,
+        seed: Optional[int] = None,
+        api_key: Optional[str] = None,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.vehicles = vehicles
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.api_key = api_key
+        self.requests: List[str] = []
+        self._random = random.Random(seed)
+        self._failures: Deque[int] = deque()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._payloads: Dict[Tuple[str, int], bytes] = {}
+        self._thread: Optional[threading.Thread] = None
+
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self._httpd.stub = self  # type: ignore[attr-defined]
+        host, port = self._httpd.server_address[:2]
+        self.url = f"http://{host}:{port}"
+        self.api_url = f"{self.url}/api"
+        self.timetables = timetable_datasets(timetables, host=self.url)
+        self.fares = fares_datasets(fares, host=self.url)
+
+        api = "/api/v1/"
+        routes: List[Tuple[str, Callable[..., Response]]] = [
+            (f"{api}{TIMETABLES_PATH}/{_DATASET_ID}", self._timetables),
+            (f"{api}{FARES_PATH}/{_DATASET_ID}", self._fares),
+            (f"{api}{SIRI_VM_PATH}/{_DATASET_ID}", self._siri_vm),
+            (f"{api}{GTFS_RT_PATH}/", self._gtfs_rt),
+            ("/avl/download/bulk_archive", self._siri_vm_archive),
+            ("/avl/download/gtfsrt", self._gtfs_rt_archive),
+        ]
+        self._routes = [(re.compile(pattern + "$"), route) for pattern, route in routes]
+
+    def start(self) -> "StubBODSServer":
+        """
+        Starts serving requests in a background thread.
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._httpd.serve_forever, name="StubBODSServer", daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """
+        Stops the server and closes its socket.
+        """
+        if self._thread is not None:
+            self._httpd.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._httpd.server_close()
+
+    def __enter__(self) -> "StubBODSServer":
+        return self.start()
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc_value: Optional[BaseException],
+        traceback: Optional[TracebackType],
+    ) -> None:
+        self.stop()
+
+    def fail_next(
+        self, count: int = 1, status: int = HTTPStatus.SERVICE_UNAVAILABLE
+    ) -> None:
+        """
+        Answers the next count requests with status, whatever they ask for.
+        """
+        with self._lock:
+            self._failures.extend([status] * count)
+
+    def handle(self, target: str) -> Response:
+        """
+        Returns the status, content type and body of the response to a GET of
+        target, a path and query string.
+        """
+        with self._lock:
+            self.requests.append(target)
+            failure = self._failures.popleft() if self._failures else None
+            if failure is None and self.error_rate > 0:
+                if self._random.random() < self.error_rate:
+                    failure = self.error_status
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if failure is not None:
+            return failure, "text/plain", HTTPStatus(failure).phrase.encode()
+
+        url = urlsplit(target)
+        query = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        if self.api_key is not None and query.get("api_key") != self.api_key:
+            return _json(HTTPStatus.UNAUTHORIZED, {"detail": "Invalid API key."})
+
+        for pattern, route in self._routes:
+            match = pattern.match(url.path)
+            if match is not None:
+                return route(url.path, query, **match.groupdict())
+        return _json(HTTPStatus.NOT_FOUND, {"detail": "Not found."})
+
+    def _payload(self, kind: str, build: Callable[[int], bytes]) -> bytes:
+        key = (kind, self.vehicles)
+        payload = self._payloads.get(key)
+        if payload is None:
+            with self._build_lock:
+                payload = self._payloads.get(key)
+                if payload is None:
+                    payload = self._payloads[key] = build(self.vehicles)
+        return payload
+
+    def _page(
+        self,
+        path: str,
+        query: Dict[str, str],
+        datasets: List[Dict[str, Any]],
+        id: Optional[str],
+    ) -> Response:
+        if id is not None:
+            dataset = next((d for d in datasets if d["id"] == int(id)), None)
+            if dataset is None:
+                return _json(HTTPStatus.NOT_FOUND, {"detail": "Not found."})
+            return _json(HTTPStatus.OK, dataset)
+
+        try:
+            limit = int(query.get("limit", 25))
+            offset = int(query.get("offset", 0))
+        except ValueError:
+            return _json(HTTPStatus.BAD_REQUEST, {"detail": "Invalid limit or offset."})
+
+        def page_url(page_offset: int) -> str:
+            return f"{self.url}{path}?" + urlencode(
+                dict(query, limit=limit, offset=page_offset)
+            )
+
+        count = len(datasets)
+        body = {
+            "count": count,
+            "next": page_url(offset + limit) if offset + limit < count else None,
+            "previous": page_url(max(offset - limit, 0)) if offset > 0 else None,
+            "results": datasets[offset:][:limit],
+        }
+        return _json(HTTPStatus.OK, body)
+
+    def _timetables(
+        self, path: str, query: Dict[str, str], id: Optional[str]
+    ) -> Response:
+        return self._page(path, query, self.timetables, id)
+
+    def _fares(self, path: str, query: Dict[str, str], id: Optional[str]) -> Response:
+        return self._page(path, query, self.fares, id)
+
+    def _siri_vm(self, path: str, query: Dict[str, str], id: Optional[str]) -> Response:
+        return HTTPStatus.OK, XML, self._payload("siri_vm", siri_vm_packet)
+
+    def _gtfs_rt(self, path: str, query: Dict[str, str]) -> Response:
+        return HTTPStatus.OK, PROTOBUF, self._payload("gtfs_rt", gtfs_rt_feed)
+
+    def _siri_vm_archive(self, path: str, query: Dict[str, str]) -> Response:
+        return HTTPStatus.OK, ZIP, self._payload("siri_vm_archive", siri_vm_archive)
+
+    def _gtfs_rt_archive(self, path: str, query: Dict[str, str]) -> Response:
+        return HTTPStatus.OK, ZIP, self._payload("gtfs_rt_archive", gtfs_rt_archive)
+
+
+def _json(status: int, body: Any) -> Response:
+    return status, JSON, json.dumps(body).encode()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self) -> None:
+        stub: StubBODSServer = self.server.stub  # type: ignore[attr-defined]
+        status, content_type, body = stub.handle(self.path)
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
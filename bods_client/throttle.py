@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+throttle.py a module for rate limiting and retrying requests to the BODS API.
+"""
+
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Collection, Dict, Mapping, Optional, Union
+
+from bods_client.constants import (
+    DEFAULT_RETRY_BACKOFF,
+    DEFAULT_RETRY_DEADLINE,
+    DEFAULT_RETRY_MAX_BACKOFF,
+    DEFAULT_RETRY_STATUSES,
+)
+
+Clock = Callable[[], float]
+
+
+class TokenBucket:
+    """
+    A thread-safe token bucket.
+
+    Tokens are added at rate per second up to capacity. Taking a token when the
+    bucket is empty reserves the next one, so concurrent callers are served in
+    turn rather than all waking up at once.
+
+    Args:
+        rate: The number of tokens added per second.
+        capacity: The most tokens the bucket holds, which is the largest burst
+        allowed, by default one second of tokens.
+        clock: A monotonic clock in seconds, ``time.monotonic`` by default.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: Optional[float] = None,
+        clock: Clock = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.capacity = max(1.0, rate) if capacity is None else capacity
+        self.clock = clock
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """
+        Takes tokens from the bucket and returns the number of seconds to wait
+        before using them.
+        """
+        with self._lock:
+            now = self.clock()
+            elapsed = now - self._updated
+            self._updated = now
+            self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+
+class RateLimiter:
+    """
+    A token bucket for each endpoint family, shared by every method of a client
+    and every thread using it. Requests to families without a limit are not
+    throttled.
+
+    Args:
+        limits: The requests per second, or a TokenBucket, for each endpoint
+        family such as ``"siri_vm"``, ``"timetables"``, ``"fares"``, ``"gtfs_rt"``
+        or ``"archive"``.
+    """
+
+    def __init__(self, limits: Mapping[str, Union[float, TokenBucket]]):
+        self.buckets: Dict[str, TokenBucket] = {
+            family: limit if isinstance(limit, TokenBucket) else TokenBucket(limit)
+            for family, limit in limits.items()
+        }
+
+    def reserve(self, family: Optional[str]) -> float:
+        """
+        Returns the number of seconds to wait before making a request.
+        """
+        bucket = self.buckets.get(family) if family is not None else None
+        return 0.0 if bucket is None else bucket.reserve()
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _parse_retry_after(value: str, now: Callable[[], datetime]) -> float:
+    """
+    Returns the seconds to wait from a Retry-After header, given in seconds or as
+    an HTTP date, or 0 if it is invalid.
+    """
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return 0.0
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - now()).total_seconds())
+
+
+class RetryPolicy:
+    """
+    When and for how long to wait before retrying a request.
+
+    Responses with one of statuses and connection errors are retried up to
+    max_retries times. Waits grow exponentially from backoff up to max_backoff,
+    with full jitter, unless the response has a Retry-After header. A retry is
+    not made if it could not start within deadline seconds of the first attempt,
+    in which case the last response is returned or the last error raised.
+
+    Args:
+        max_retries: The number of times to retry a request.
+        backoff: The longest wait before the first retry, in seconds.
+        max_backoff: The longest wait between attempts, in seconds.
+        deadline: The time from the first attempt after which no more retries are
+        made, in seconds.
+        statuses: The response status codes to retry.
+        jitter: Wait a random time up to the backoff rather than the whole backoff.
+    """
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        backoff: float = DEFAULT_RETRY_BACKOFF,
+        max_backoff: float = DEFAULT_RETRY_MAX_BACKOFF,
+        deadline: float = DEFAULT_RETRY_DEADLINE,
+        statuses: Collection[int] = DEFAULT_RETRY_STATUSES,
+        jitter: bool = True,
+    ):
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.deadline = deadline
+        self.statuses = frozenset(statuses)
+        self.jitter = jitter
+
+    def delay(
+        self,
+        attempt: int,
+        retry_after: Optional[str] = None,
+        now: Callable[[], datetime] = _utcnow,
+    ) -> float:
+        """
+        Returns the number of seconds to wait before retrying after attempt, the
+        first attempt being 0.
+        """
+        if retry_after is not None:
+            return _parse_retry_after(retry_after, now)
+        backoff = min(self.max_backoff, self.backoff * 2**attempt)
+        return random.uniform(0, backoff) if self.jitter else backoff
+
+
+class RequestStats:
+    """
+    Counts of the requests made by a client and the time spent waiting.
+
+    throttled_time is the time spent waiting for the rate limiter and
+    backoff_time the time spent waiting between retries.
+    """
+
+    __slots__ = ("requests", "retries", "throttled_time", "backoff_time", "_lock")
+
+    def __init__(self):
+        self.requests = 0
+        self.retries = 0
+        self.throttled_time = 0.0
+        self.backoff_time = 0.0
+        self._lock = threading.Lock()
+
+    def record_request(self, throttled: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.throttled_time += throttled
+
+    def record_retry(self, backoff: float) -> None:
+        with self._lock:
+            self.retries += 1
+            self.backoff_time += backoff
+
+    def __repr__(self) -> str:
+        return (
+            f"RequestStats(requests={self.requests}, retries={self.retries}, "
+            f"throttled_time={self.throttled_time:.3f}, "
+            f"backoff_time={self.backoff_time:.3f})"
+        )
@@ -106,3 +106,26 @@ def _bods_requests_error(requests_mock):
 
     matcher = re.compile(r".*/datafeed/\d*")
     requests_mock.get(matcher, status_code=500, text="Error")
+
+
+def _paginated_callback(record_name: str, count: int):
+    record = json.loads((DATA_DIR / record_name).read_text())
+
+    def callback(request, context):
+        limit = int(request.qs["limit"][0])
+        offset = int(request.qs["offset"][0])
+        results = [
+            dict(record, id=id_) for id_ in range(offset, min(offset + limit, count))
+        ]
+        return {"count": count, "next": None, "previous": None, "results": results}
+
+    return callback
+
+
+@pytest.fixture
+def _bods_paginated(requests_mock):
+    matcher = re.compile(r".*/v1/dataset/")
+    requests_mock.get(matcher, json=_paginated_callback("timetable.json", 53))
+
+    matcher = re.compile(r".*/v1/fares/dataset/")
+    requests_mock.get(matcher, json=_paginated_callback("fare.json", 53))
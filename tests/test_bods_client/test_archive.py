@@ -0,0 +1,203 @@
+import asyncio
+import io
+import itertools
+import re
+import zipfile
+
+import pytest
+import requests
+
+from bods_client import archive as archive_module
+from bods_client.archive import (
+    ArchiveMember,
+    _open_archive_file,
+    adownload_archive,
+    download_archive,
+    spool_stream,
+)
+from bods_client.client import BODSClient
+from bods_client.models import APIRequestError, Siri, SIRIVMParams
+from bods_client.models.base import APIError
+
+from .conftest import DATA_DIR
+
+
+class ChunkedResponse:
+    def __init__(self, content: bytes):
+        self.content = content
+        self.chunk_sizes = []
+
+    def iter_content(self, chunk_size):
+        self.chunk_sizes.append(chunk_size)
+        for start in range(0, len(self.content), chunk_size):
+            end = start + chunk_size
+            yield self.content[start:end]
+
+    async def aiter_bytes(self, chunk_size):
+        for chunk in self.iter_content(chunk_size):
+            yield chunk
+
+
+def test_download_archive_spools_in_chunks():
+    content = (DATA_DIR / "sirivm.zip").read_bytes()
+    response = ChunkedResponse(content)
+    with download_archive(response, chunk_size=100, spool_size=200) as archive:
+        assert archive.read() == content
+        assert archive._rolled
+    assert response.chunk_sizes == [100]
+
+
+def test_adownload_archive_spools_in_chunks():
+    content = (DATA_DIR / "sirivm.zip").read_bytes()
+    response = ChunkedResponse(content)
+    download = adownload_archive(response, chunk_size=100, spool_size=200)
+    with asyncio.run(download) as archive:
+        assert archive.read() == content
+        assert archive._rolled
+    assert response.chunk_sizes == [100]
+
+
+def test_download_archive_to_path(tmp_path):
+    content = (DATA_DIR / "sirivm.zip").read_bytes()
+    path = tmp_path / "sirivm.zip"
+    with download_archive(ChunkedResponse(content), archive_path=path) as archive:
+        assert archive.read() == content
+    assert path.read_bytes() == content
+
+
+class InterruptedResponse(ChunkedResponse):
+    def iter_content(self, chunk_size):
+        yield from itertools.islice(super().iter_content(chunk_size), 2)
+        raise requests.ConnectionError("reset")
+
+
+@pytest.fixture
+def opened(monkeypatch):
+    files = []
+
+    def open_archive_file(archive_path, spool_size):
+        files.append(_open_archive_file(archive_path, spool_size))
+        return files[-1]
+
+    monkeypatch.setattr(archive_module, "_open_archive_file", open_archive_file)
+    return files
+
+
+@pytest.mark.parametrize("to_path", [False, True])
+def test_download_archive_interrupted(tmp_path, opened, to_path):
+    path = tmp_path / "sirivm.zip" if to_path else None
+    response = InterruptedResponse((DATA_DIR / "sirivm.zip").read_bytes())
+    with pytest.raises(requests.ConnectionError):
+        download_archive(response, archive_path=path, chunk_size=100)
+    (archive,) = opened
+    assert archive.closed
+    assert not tmp_path.joinpath("sirivm.zip").exists()
+
+
+def test_adownload_archive_interrupted(tmp_path, opened):
+    path = tmp_path / "sirivm.zip"
+    response = InterruptedResponse((DATA_DIR / "sirivm.zip").read_bytes())
+    with pytest.raises(requests.ConnectionError):
+        asyncio.run(adownload_archive(response, archive_path=path, chunk_size=100))
+    (archive,) = opened
+    assert archive.closed
+    assert not path.exists()
+
+
+class BrokenStream:
+    def read(self, size):
+        raise OSError("reset")
+
+
+def test_spool_stream_interrupted(monkeypatch):
+    spooled = []
+    spooled_file = archive_module._SpooledFile
+
+    def open_spooled_file(**kwargs):
+        spooled.append(spooled_file(**kwargs))
+        return spooled[-1]
+
+    monkeypatch.setattr(archive_module, "_SpooledFile", open_spooled_file)
+    with pytest.raises(OSError, match="reset"):
+        spool_stream(BrokenStream())
+    assert spooled[0].closed
+
+
+def test_archive_member_streams_file():
+    archive = (DATA_DIR / "sirivm.zip").open("rb")
+    with ArchiveMember(archive, "siri.xml") as member:
+        assert member.read(5) == b"<Siri"
+    assert archive.closed
+
+
+def test_archive_member_missing_file_closes_archive():
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("other.xml", b"")
+    with pytest.raises(KeyError):
+        ArchiveMember(archive, "siri.xml")
+    assert archive.closed
+
+
+@pytest.mark.usefixtures("_bods_requests")
+def test_open_siri_vm_archive():
+    client = BODSClient(api_key="apikey")
+    member = client.open_siri_vm_archive()
+    with member:
+        siri = Siri.from_bytes(member.read())
+    assert member.file.closed
+    assert siri.service_delivery.producer_ref == "ItoWorld"
+
+
+def test_iter_siri_vm_from_archive(requests_mock, tmp_path):
+    packet = (DATA_DIR / "good_packet.xml").read_bytes()
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("siri.xml", packet)
+    requests_mock.get(re.compile(r".*/bulk_archive"), content=content.getvalue())
+
+    client = BODSClient(api_key="apikey")
+    path = tmp_path / "bulk_archive.zip"
+    activities = list(client.iter_siri_vm_from_archive(archive_path=path))
+
+    vmd = Siri.from_bytes(packet).service_delivery.vehicle_monitoring_delivery
+    assert len(activities) == 4
+    assert activities == vmd.vehicle_activities
+    assert path.read_bytes() == content.getvalue()
+
+
+def test_iter_siri_vm_from_archive_with_params(requests_mock):
+    packet = (DATA_DIR / "good_packet.xml").read_bytes()
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w") as zf:
+        zf.writestr("siri.xml", packet)
+    requests_mock.get(re.compile(r".*/bulk_archive"), content=content.getvalue())
+
+    client = BODSClient(api_key="apikey")
+    params = SIRIVMParams(operator_refs=["AMTM"])
+    activities = list(client.iter_siri_vm_from_archive(params=params))
+    assert [a.monitored_vehicle_journey.vehicle_ref for a in activities] == ["4103"]
+
+
+@pytest.mark.usefixtures("_bods_requests")
+def test_open_gtfs_rt_archive():
+    client = BODSClient(api_key="apikey")
+    with client.open_gtfs_rt_archive() as member:
+        assert member.name == "gtfsrt.bin"
+        assert member.read(0) == b""
+
+
+@pytest.mark.usefixtures("_bods_requests_error")
+@pytest.mark.parametrize("method", ["open_siri_vm_archive", "open_gtfs_rt_archive"])
+def test_open_archive_error(method):
+    client = BODSClient(api_key="apikey")
+    error = getattr(client, method)()
+    assert isinstance(error, APIError)
+    assert error.status_code == 500
+
+
+@pytest.mark.usefixtures("_bods_requests_error")
+def test_iter_siri_vm_from_archive_error():
+    client = BODSClient(api_key="apikey")
+    with pytest.raises(APIRequestError):
+        list(client.iter_siri_vm_from_archive())
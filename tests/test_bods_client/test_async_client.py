@@ -0,0 +1,293 @@
+import asyncio
+import io
+import json
+import re
+import zipfile
+
+import httpx
+import pytest
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from bods_client.archive import ArchiveMember
+from bods_client.async_client import AsyncBODSClient
+from bods_client.constants import V1_FARES_URL, V1_TIMETABLES_URL
+from bods_client.models import (
+    APIRequestError,
+    FaresResponse,
+    Siri,
+    Timetable,
+    TimetableParams,
+    TimetableResponse,
+)
+from bods_client.models.avl import SIRIVMParams
+from bods_client.models.base import APIError
+
+from .conftest import DATA_DIR
+
+ROUTES = [
+    (re.compile(r".*/v1/dataset/\d+/"), "timetable.json"),
+    (re.compile(r".*/v1/dataset/"), "timetables.json"),
+    (re.compile(r".*/v1/fares/dataset/\d+/"), "fare.json"),
+    (re.compile(r".*/v1/fares/dataset/"), "fares.json"),
+    (re.compile(r".*/gtfsrtdatafeed"), "gtfsrt.bin"),
+    (re.compile(r".*/avl/download/gtfsrt"), "gtfsrt.zip"),
+    (re.compile(r".*/datafeed"), "good_packet.xml"),
+    (re.compile(r".*/avl/download/bulk_archive"), "sirivm.zip"),
+]
+
+
+def bods_handler(request: httpx.Request) -> httpx.Response:
+    for matcher, name in ROUTES:
+        if matcher.match(str(request.url)):
+            return httpx.Response(200, content=(DATA_DIR / name).read_bytes())
+    return httpx.Response(404, content=b"Not found")  # pragma: no cover
+
+
+def error_handler(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(500, content=b"Error")
+
+
+def make_client(handler, **kwargs) -> AsyncBODSClient:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return AsyncBODSClient(api_key="apikey", client=client, **kwargs)
+
+
+@pytest.mark.parametrize(
+    ("method", "args", "expected"),
+    [
+        ("get_timetable_datasets", (), TimetableResponse),
+        ("get_timetable_dataset", (5,), TimetableResponse),
+        ("get_fares_datasets", (), FaresResponse),
+        ("get_fares_dataset", (5,), FaresResponse),
+        ("get_siri_vm_data_feed", (), bytes),
+        ("get_siri_vm_data_feed_by_id", (10,), bytes),
+        ("get_siri_vm_from_archive", (), bytes),
+        ("get_gtfs_rt_data_feed", (), FeedMessage),
+        ("get_gtfs_rt_from_archive", (), FeedMessage),
+        ("open_siri_vm_archive", (), ArchiveMember),
+        ("open_gtfs_rt_archive", (), ArchiveMember),
+    ],
+)
+def test_async_client_methods(method, args, expected):
+    async def run():
+        async with make_client(bods_handler) as client:
+            return await getattr(client, method)(*args)
+
+    result = asyncio.run(run())
+    assert isinstance(result, expected)
+    if isinstance(result, ArchiveMember):
+        result.close()
+
+
+@pytest.mark.parametrize(
+    "method",
+    [
+        "get_timetable_datasets",
+        "get_fares_datasets",
+        "get_siri_vm_data_feed",
+        "get_siri_vm_from_archive",
+        "get_gtfs_rt_data_feed",
+        "get_gtfs_rt_from_archive",
+        "open_siri_vm_archive",
+        "open_gtfs_rt_archive",
+    ],
+)
+def test_async_client_errors(method):
+    async def run():
+        async with make_client(error_handler) as client:
+            return await getattr(client, method)()
+
+    error = asyncio.run(run())
+    assert isinstance(error, APIError)
+    assert error.status_code == 500
+
+
+def test_async_iter_siri_vm_from_archive(tmp_path):
+    packet = (DATA_DIR / "good_packet.xml").read_bytes()
+    content = io.BytesIO()
+    with zipfile.ZipFile(content, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("siri.xml", packet)
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=content.getvalue())
+
+    async def run(**kwargs):
+        async with make_client(handler) as client:
+            pages = client.iter_siri_vm_from_archive(**kwargs)
+            return [activity async for activity in pages]
+
+    path = tmp_path / "bulk_archive.zip"
+    activities = asyncio.run(run(archive_path=path))
+    vmd = Siri.from_bytes(packet).service_delivery.vehicle_monitoring_delivery
+    assert activities == vmd.vehicle_activities
+    assert path.read_bytes() == content.getvalue()
+
+    activities = asyncio.run(run(params=SIRIVMParams(operator_refs=["AMTM"])))
+    assert [a.monitored_vehicle_journey.vehicle_ref for a in activities] == ["4103"]
+
+
+def test_async_iter_siri_vm_from_archive_error():
+    async def run():
+        async with make_client(error_handler) as client:
+            return [activity async for activity in client.iter_siri_vm_from_archive()]
+
+    with pytest.raises(APIRequestError, match="500"):
+        asyncio.run(run())
+
+
+def test_async_client_request_params():
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        return httpx.Response(400, content=b"Oopsie")
+
+    async def run():
+        async with make_client(handler) as client:
+            await client.get_timetable_datasets()
+            await client.get_timetable_dataset(5)
+            await client.get_fares_dataset(5)
+            await client.get_siri_vm_data_feed(SIRIVMParams(line_ref="51"))
+
+    asyncio.run(run())
+    urls = [str(request.url) for request in requests]
+    assert urls == [
+        V1_TIMETABLES_URL + "/?limit=25&offset=0&api_key=apikey",
+        V1_TIMETABLES_URL + "/5/?api_key=apikey",
+        V1_FARES_URL + "/5/?api_key=apikey",
+        "https://data.bus-data.dft.gov.uk/api/v1/datafeed/?lineRef=51&api_key=apikey",
+    ]
+
+
+def test_async_client_concurrency_limit():
+    in_flight = 0
+    peak = 0
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        return httpx.Response(200, content=b"<Siri/>")
+
+    async def run():
+        async with make_client(handler, max_concurrency=3) as client:
+            calls = [client.get_siri_vm_data_feed_by_id(i) for i in range(12)]
+            return await asyncio.gather(*calls)
+
+    responses = asyncio.run(run())
+    assert len(responses) == 12
+    assert peak == 3
+
+
+def test_async_client_owns_client():
+    async def run():
+        async with AsyncBODSClient(api_key="apikey", max_connections=5) as client:
+            assert not client.client.is_closed
+            return client
+
+    client = asyncio.run(run())
+    assert client.client.is_closed
+
+
+def test_async_client_does_not_close_shared_client():
+    async def run():
+        shared = httpx.AsyncClient()
+        async with AsyncBODSClient(api_key="apikey", client=shared):
+            pass
+        assert not shared.is_closed
+        await shared.aclose()
+
+    asyncio.run(run())
+
+
+def paginated_handler(record_name: str, count: int):
+    record = json.loads((DATA_DIR / record_name).read_text())
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        limit = int(request.url.params["limit"])
+        offset = int(request.url.params["offset"])
+        if offset == 30:
+            return httpx.Response(503, content=b"Unavailable")
+        ids = range(offset, min(offset + limit, count))
+        results = [dict(record, id=id_) for id_ in ids]
+        return httpx.Response(200, json={"count": count, "results": results})
+
+    return handler
+
+
+@pytest.mark.parametrize(
+    ("method", "record_name"),
+    [
+        ("iter_timetable_datasets", "timetable.json"),
+        ("iter_fares_datasets", "fare.json"),
+    ],
+)
+def test_async_iter_datasets(method, record_name):
+    async def run():
+        handler = paginated_handler(record_name, 28)
+        async with make_client(handler) as client:
+            return [dataset.id async for dataset in getattr(client, method)()]
+
+    assert asyncio.run(run()) == list(range(28))
+
+
+def test_async_iter_datasets_page_error():
+    ids = []
+
+    async def run():
+        handler = paginated_handler("timetable.json", 100)
+        params = TimetableParams(limit=10)
+        async with make_client(handler) as client:
+            async for dataset in client.iter_timetable_datasets(params, 2):
+                ids.append(dataset.id)
+
+    with pytest.raises(APIRequestError, match="503"):
+        asyncio.run(run())
+    assert ids == list(range(30))
+
+
+def test_async_iter_datasets_first_page_error():
+    async def run():
+        async with make_client(error_handler) as client:
+            return [dataset async for dataset in client.iter_fares_datasets()]
+
+    with pytest.raises(APIRequestError):
+        asyncio.run(run())
+
+
+def test_async_iter_datasets_stopped_early():
+    async def run():
+        handler = paginated_handler("timetable.json", 100)
+        params = TimetableParams(limit=10)
+        async with make_client(handler) as client:
+            datasets = client.iter_timetable_datasets(params, 4)
+            async for dataset in datasets:
+                if dataset.id == 15:
+                    break
+            await datasets.aclose()
+            return asyncio.all_tasks() - {asyncio.current_task()}
+
+    assert asyncio.run(run()) == set()
+
+
+def test_async_open_dataset_file():
+    content = bytes(range(256))
+    headers = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        headers.append(request.headers.get("Range"))
+        return httpx.Response(206, content=content[10:])
+
+    async def run():
+        record = json.loads((DATA_DIR / "timetable.json").read_text())
+        async with make_client(handler) as client:
+            response = await client.open_dataset_file(Timetable(**record), offset=10)
+            try:
+                return response.status_code, await response.aread()
+            finally:
+                await response.aclose()
+
+    assert asyncio.run(run()) == (206, content[10:])
+    assert headers == ["bytes=10-"]
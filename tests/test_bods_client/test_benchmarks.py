@@ -0,0 +1,22 @@
+import json
+
+from benchmarks.suite import benchmarks, main
+
+
+def test_benchmarks_list(capsys):
+    main(["list"])
+    names = capsys.readouterr().out.split()
+    assert names == [benchmark.name for benchmark in benchmarks()]
+    assert "params.siri_vm" in names
+
+
+def test_benchmarks_run_and_compare(capsys, tmp_path):
+    output = tmp_path / "results.json"
+    argv = ["run", "-k", "^params.siri_vm$", "--min-time", "0", "--repeat", "1"]
+    main([*argv, "--output", str(output)])
+    results = json.loads(output.read_text())
+    assert list(results["benchmarks"]) == ["params.siri_vm"]
+    assert results["benchmarks"]["params.siri_vm"]["min"] > 0
+
+    main(["compare", str(output), str(output)])
+    assert "1.00x" in capsys.readouterr().out
@@ -0,0 +1,215 @@
+import asyncio
+import re
+
+import httpx
+import pytest
+
+from bods_client.async_client import AsyncBODSClient
+from bods_client.cache import CachedResponse, CacheStats, MemoryCache, SQLiteCache
+from bods_client.client import BODSClient
+from bods_client.constants import DEFAULT_CACHE_TTLS, FARES
+from bods_client.models import APIError, TimetableParams, TimetableResponse
+from bods_client.query import PreparedQuery
+
+from .conftest import DATA_DIR
+
+TIMETABLE = (DATA_DIR / "timetable.json").read_text()
+SIRI = (DATA_DIR / "good_packet.xml").read_bytes()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_cache(request, tmp_path):
+    caches = []
+
+    def make(**kwargs):
+        if request.param == "memory":
+            cache = MemoryCache(**kwargs)
+        else:
+            cache = SQLiteCache(tmp_path / "cache.db", **kwargs)
+        caches.append(cache)
+        return cache
+
+    yield make
+    for cache in caches:
+        if isinstance(cache, SQLiteCache):
+            cache.close()
+
+
+def test_cache_get_set_and_stats(make_cache):
+    cache = make_cache()
+    assert cache.get("a") is None
+    cache.set("a", b"body", ttl=10)
+    assert cache.get("a") == b"body"
+    assert len(cache) == 1
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 1
+    assert cache.stats.hit_ratio == 0.5
+
+
+def test_cache_expires_entries(make_cache):
+    clock = Clock()
+    cache = make_cache(clock=clock)
+    cache.set("a", b"body", ttl=10)
+    clock.now += 9
+    assert cache.get("a") == b"body"
+    clock.now += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_cache_ignores_non_positive_ttl(make_cache):
+    cache = make_cache()
+    cache.set("a", b"body", ttl=0)
+    assert len(cache) == 0
+
+
+def test_cache_evicts_least_recently_used(make_cache):
+    cache = make_cache(max_entries=2)
+    cache.set("a", b"1", ttl=10)
+    cache.set("b", b"2", ttl=10)
+    cache.get("a")
+    cache.set("c", b"3", ttl=10)
+    assert cache.get("b") is None
+    assert cache.get("a") == b"1"
+    assert cache.get("c") == b"3"
+    assert cache.stats.evictions == 1
+
+
+def test_cache_delete_and_clear(make_cache):
+    cache = make_cache()
+    cache.set("a", b"1", ttl=10)
+    cache.set("b", b"2", ttl=10)
+    cache.delete("a")
+    assert cache.get("a") is None
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_sqlite_cache_persists(tmp_path):
+    path = tmp_path / "cache.db"
+    cache = SQLiteCache(path)
+    cache.set("a", b"body", ttl=60)
+    cache.close()
+
+    cache = SQLiteCache(path, max_entries=1)
+    cache.set("b", b"other", ttl=60)
+    assert cache.get("a") is None
+    assert cache.get("b") == b"other"
+    cache.close()
+
+
+def test_sqlite_cache_shared_between_connections(tmp_path):
+    path = tmp_path / "cache.db"
+    first = SQLiteCache(path, max_entries=2)
+    second = SQLiteCache(path, max_entries=2)
+    first.set("a", b"1", ttl=60)
+    for _ in range(3):
+        assert first.get("a") == b"1"
+    second.set("b", b"2", ttl=60)
+    second.set("c", b"3", ttl=60)
+    assert first.get("a") is None
+    assert first.get("b") == b"2"
+    assert second.get("c") == b"3"
+    first.close()
+    second.close()
+
+
+def test_cache_stats_repr():
+    stats = CacheStats()
+    assert stats.hit_ratio == 0.0
+    assert repr(stats) == "CacheStats(hits=0, misses=0, evictions=0)"
+
+
+def test_cached_response():
+    response = CachedResponse(b'{"count": 0}')
+    assert response.status_code == 200
+    assert response.json() == {"count": 0}
+
+
+def test_client_caches_timetable_pages(requests_mock):
+    page = '{"count": 1, "next": null, "previous": null, "results": [%s]}' % TIMETABLE
+    requests_mock.get(re.compile(r".*/v1/dataset/"), text=page)
+    cache = MemoryCache()
+    client = BODSClient(api_key="apikey", cache=cache)
+    first = client.get_timetable_datasets(TimetableParams(limit=1))
+    second = client.get_timetable_datasets(TimetableParams(limit=1))
+    client.get_timetable_datasets(TimetableParams(limit=2))
+    assert isinstance(first, TimetableResponse)
+    assert second == first
+    assert requests_mock.call_count == 2
+    assert cache.stats.hits == 1
+    assert cache.stats.misses == 2
+    url = PreparedQuery(TimetableParams(limit=1)).url(client.timetable_endpoint)
+    assert "api_key" not in url
+    assert cache.get(url) is not None
+
+
+def test_client_does_not_cache_errors(requests_mock):
+    requests_mock.get(re.compile(r".*/v1/dataset/"), status_code=500, text="error")
+    client = BODSClient(api_key="apikey", cache=MemoryCache())
+    assert isinstance(client.get_timetable_datasets(), APIError)
+    assert isinstance(client.get_timetable_datasets(), APIError)
+    assert requests_mock.call_count == 2
+    assert len(client.cache) == 0
+
+
+def test_client_cache_ttls():
+    clock = Clock()
+    cache = MemoryCache(clock=clock)
+    client = BODSClient(api_key="apikey", cache=cache, cache_ttls={FARES: 5})
+    assert client.cache_ttls[FARES] == 5
+    assert client._cache_ttl(client.fares_endpoint, b"") == 5
+    assert client._cache_ttl(client.timetable_endpoint + "1/", b"") == (
+        DEFAULT_CACHE_TTLS["timetables"]
+    )
+    assert client._cache_ttl(client.gtfs_rt_endpoint, b"") == (
+        DEFAULT_CACHE_TTLS["gtfs_rt"]
+    )
+    assert client._cache_ttl(client.siri_vm_endpoint, b"<Siri/>") == (
+        DEFAULT_CACHE_TTLS["siri_vm"]
+    )
+    assert client._cache_ttl("https://example.com/", b"") == 0
+
+
+def test_client_caches_siri_vm_for_shortest_possible_cycle(requests_mock):
+    requests_mock.get(re.compile(r".*/datafeed/"), content=SIRI)
+    clock = Clock()
+    client = BODSClient(api_key="apikey", cache=MemoryCache(clock=clock))
+    client.get_siri_vm_data_feed()
+    clock.now += 4
+    assert client.get_siri_vm_data_feed() == SIRI
+    assert requests_mock.call_count == 1
+    clock.now += 1
+    client.get_siri_vm_data_feed()
+    assert requests_mock.call_count == 2
+
+
+def test_async_client_cache():
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        return httpx.Response(200, text=TIMETABLE)
+
+    async def fetch():
+        client = AsyncBODSClient(
+            api_key="apikey",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            cache=MemoryCache(),
+        )
+        first = await client.get_timetable_dataset(dataset_id=1)
+        second = await client.get_timetable_dataset(dataset_id=1)
+        await client.client.aclose()
+        return first, second
+
+    first, second = asyncio.run(fetch())
+    assert first == second
+    assert len(calls) == 1
@@ -1,15 +1,19 @@
+import re
+from datetime import datetime
 from unittest.mock import MagicMock, patch
+from urllib.parse import urlencode
 
 import pytest
 from google.transit.gtfs_realtime_pb2 import FeedMessage
-from requests import Response
+from requests import Response, Session
 
 from bods_client.client import BODSClient
 from bods_client.constants import V1_FARES_URL, V1_TIMETABLES_URL
 from bods_client.models.avl import GTFSRTParams, SIRIVMParams
-from bods_client.models.base import APIError, BoundingBox
+from bods_client.models.base import APIError, APIRequestError, BoundingBox
 from bods_client.models.fares import FaresParams
 from bods_client.models.timetables import TimetableParams
+from bods_client.query import to_query_params
 
 
 def test_url_with_trailing_slash():
@@ -19,35 +23,80 @@ def test_url_with_trailing_slash():
     assert client.base_url == url[:-1]
 
 
-@patch("bods_client.client.requests")
-def test_client_make_request(mrequests):
+def test_client_make_request():
     key = "apikey"
     url = "http://fakeurl.url/"
-    client = BODSClient(api_key=key)
+    session = MagicMock(spec=Session)
+    client = BODSClient(api_key=key, session=session)
     client._make_request(url)
-    mrequests.get.assert_called_once_with(url, timeout=60, params={"api_key": key})
+    session.get.assert_called_once_with(url, timeout=60, params={"api_key": key})
 
 
-@patch("bods_client.client.requests")
-def test_client_make_request_with_timeout(mrequests):
+def test_client_make_request_with_timeout():
     key = "apikey"
     url = "http://fakeurl.url/"
-    client = BODSClient(api_key=key)
+    session = MagicMock(spec=Session)
+    client = BODSClient(api_key=key, session=session)
     client._make_request(url, timeout=40)
-    mrequests.get.assert_called_once_with(url, timeout=40, params={"api_key": key})
+    session.get.assert_called_once_with(url, timeout=40, params={"api_key": key})
+
+
+def test_client_make_request_with_default_timeout():
+    key = "apikey"
+    url = "http://fakeurl.url/"
+    session = MagicMock(spec=Session)
+    client = BODSClient(api_key=key, session=session, timeout=5)
+    client._make_request(url)
+    session.get.assert_called_once_with(url, timeout=5, params={"api_key": key})
 
 
-@patch("bods_client.client.requests")
-def test_client_make_request_with_params(mrequests):
+def test_client_make_request_with_params():
     key = "apikey"
     url = "http://fakeurl.url/"
     params = {"operatorRef": "NT"}
-    client = BODSClient(api_key=key)
+    session = MagicMock(spec=Session)
+    client = BODSClient(api_key=key, session=session)
     client._make_request(url, params=params)
 
     expected_params = dict(params)
     expected_params["api_key"] = key
-    mrequests.get.assert_called_once_with(url, timeout=60, params=expected_params)
+    session.get.assert_called_once_with(url, timeout=60, params=expected_params)
+
+
+def test_client_session_pool():
+    client = BODSClient(api_key="apikey", pool_maxsize=20, max_retries=3)
+    adapter = client.session.get_adapter("https://data.bus-data.dft.gov.uk")
+    assert adapter._pool_maxsize == 20
+    assert adapter.max_retries.total == 3
+    assert client.session.headers["Connection"] == "keep-alive"
+
+
+def test_client_session_no_keep_alive():
+    client = BODSClient(api_key="apikey", keep_alive=False)
+    assert client.session.headers["Connection"] == "close"
+
+
+def test_client_context_manager_closes_owned_session():
+    with patch("bods_client.client.requests.Session.close") as mclose:
+        with BODSClient(api_key="apikey"):
+            mclose.assert_not_called()
+    mclose.assert_called_once_with()
+
+
+def test_client_does_not_close_shared_session():
+    session = MagicMock(spec=Session)
+    with BODSClient(api_key="apikey", session=session):
+        pass
+    session.close.assert_not_called()
+
+
+@pytest.mark.usefixtures("_bods_requests")
+def test_client_session_shared_across_requests():
+    with BODSClient(api_key="apikey") as client:
+        with patch.object(client.session, "get", wraps=client.session.get) as mget:
+            client.get_siri_vm_data_feed()
+            client.get_gtfs_rt_data_feed()
+        assert mget.call_count == 2
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -60,7 +109,9 @@ def test_get_timetable_datasets_no_params(mrequests):
     client.get_timetable_datasets()
 
     expected_params = {"limit": 25, "offset": 0}
-    mrequests.assert_called_once_with(client.timetable_endpoint, params=expected_params)
+    mrequests.assert_called_once_with(
+        client.timetable_endpoint + "?" + urlencode(expected_params)
+    )
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -73,8 +124,16 @@ def test_get_timetable_datasets_with_params(mrequests):
     params = TimetableParams(limit=10, nocs=["NT", "PT"])
     client.get_timetable_datasets(params=params)
 
-    expected_params = {"limit": 10, "offset": 0, "noc": "NT,PT"}
-    mrequests.assert_called_once_with(client.timetable_endpoint, params=expected_params)
+    expected_params = {"noc": "NT,PT", "limit": 10, "offset": 0}
+    mrequests.assert_called_once_with(
+        client.timetable_endpoint + "?" + urlencode(expected_params)
+    )
+
+
+def test_timetable_params_serializes_dates():
+    params = TimetableParams(modified_date=datetime(2022, 1, 29, 19, 49, 42))
+    query = to_query_params(params)
+    assert query["modifiedDate"] == "2022-01-29T19:49:42"
 
 
 @pytest.mark.parametrize(
@@ -116,7 +175,9 @@ def test_get_timetable_list_200(timetable_list_response):
         mrequests.return_value = timetable_list_response
         client.get_timetable_datasets()
         expected_params = {"limit": 25, "offset": 0}
-        mrequests.assert_called_once_with(expected_url, params=expected_params)
+        mrequests.assert_called_once_with(
+            expected_url + "?" + urlencode(expected_params)
+        )
 
 
 def test_get_fare_200(fare_response):
@@ -140,7 +201,9 @@ def test_get_fare_list_200(fare_list_response):
         mrequests.return_value = fare_list_response
         client.get_fares_datasets()
         expected_params = {"limit": 25, "offset": 0}
-        mrequests.assert_called_once_with(expected_url, params=expected_params)
+        mrequests.assert_called_once_with(
+            expected_url + "?" + urlencode(expected_params)
+        )
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -153,7 +216,9 @@ def test_get_fares_datasets_no_params(mrequests):
     client.get_fares_datasets()
 
     expected_params = {"limit": 25, "offset": 0}
-    mrequests.assert_called_once_with(client.fares_endpoint, params=expected_params)
+    mrequests.assert_called_once_with(
+        client.fares_endpoint + "?" + urlencode(expected_params)
+    )
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -173,8 +238,10 @@ def test_get_fares_datasets_bounding_box(mrequests):
     params = FaresParams(limit=10, bounding_box=bounding_box)
     client.get_fares_datasets(params=params)
 
-    expected_params = {"limit": 10, "offset": 0, "boundingBox": bounding_box.csv()}
-    mrequests.assert_called_once_with(client.fares_endpoint, params=expected_params)
+    expected_params = {"boundingBox": bounding_box.csv(), "limit": 10, "offset": 0}
+    mrequests.assert_called_once_with(
+        client.fares_endpoint + "?" + urlencode(expected_params)
+    )
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -194,7 +261,9 @@ def test_get_siri_vm_bounding_box(mrequests):
     params = SIRIVMParams(bounding_box=bounding_box)
     client.get_siri_vm_data_feed(params=params)
     expected_params = {"boundingBox": bounding_box.csv()}
-    mrequests.assert_called_once_with(client.siri_vm_endpoint, params=expected_params)
+    mrequests.assert_called_once_with(
+        client.siri_vm_endpoint + "?" + urlencode(expected_params)
+    )
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -204,7 +273,7 @@ def test_get_siri_vm_no_params(mrequests):
     key = "apikey"
     client = BODSClient(api_key=key)
     client.get_siri_vm_data_feed()
-    mrequests.assert_called_once_with(client.siri_vm_endpoint, params={})
+    mrequests.assert_called_once_with(client.siri_vm_endpoint)
 
 
 @pytest.mark.usefixtures("_bods_requests")
@@ -238,7 +307,7 @@ def test_get_gtfs_rt_no_params(mrequests):
     key = "apikey"
     client = BODSClient(api_key=key)
     client.get_gtfs_rt_data_feed()
-    mrequests.assert_called_once_with(client.gtfs_rt_endpoint, params={})
+    mrequests.assert_called_once_with(client.gtfs_rt_endpoint)
 
 
 @patch("bods_client.client.BODSClient._make_request")
@@ -258,7 +327,9 @@ def test_get_gtfs_rt_bounding_box(mrequests):
     params = GTFSRTParams(bounding_box=bounding_box, route_id="51")
     client.get_gtfs_rt_data_feed(params=params)
     expected_params = {"boundingBox": bounding_box.csv(), "routeId": "51"}
-    mrequests.assert_called_once_with(client.gtfs_rt_endpoint, params=expected_params)
+    mrequests.assert_called_once_with(
+        client.gtfs_rt_endpoint + "?" + urlencode(expected_params)
+    )
 
 
 @pytest.mark.usefixtures("_bods_requests")
@@ -302,3 +373,53 @@ def test_get_gtfsrt_200_response():
     assert len(message.entity) == 4
     assert message.header.gtfs_realtime_version == "2.0"
     assert message.header.timestamp == 1643658718
+
+
+@pytest.mark.usefixtures("_bods_paginated")
+@pytest.mark.parametrize("method", ["iter_timetable_datasets", "iter_fares_datasets"])
+def test_iter_datasets(method):
+    client = BODSClient(api_key="apikey")
+    datasets = list(getattr(client, method)(max_workers=3))
+    assert [dataset.id for dataset in datasets] == list(range(53))
+
+
+@pytest.mark.usefixtures("_bods_paginated")
+def test_iter_datasets_with_params(requests_mock):
+    client = BODSClient(api_key="apikey")
+    params = TimetableParams(limit=10, offset=20, nocs=["NT"])
+    datasets = list(client.iter_timetable_datasets(params=params))
+    assert [dataset.id for dataset in datasets] == list(range(20, 53))
+    offsets = sorted(int(r.qs["offset"][0]) for r in requests_mock.request_history)
+    assert offsets == [20, 30, 40, 50]
+    assert all(r.qs["noc"] == ["nt"] for r in requests_mock.request_history)
+
+
+@pytest.mark.usefixtures("_bods_paginated")
+def test_iter_datasets_stops_early(requests_mock):
+    client = BODSClient(api_key="apikey")
+    params = FaresParams(limit=5)
+    datasets = client.iter_fares_datasets(params=params, max_workers=2)
+    first = [next(datasets) for _ in range(7)]
+    datasets.close()
+    assert [dataset.id for dataset in first] == list(range(7))
+    assert len(requests_mock.request_history) <= 4
+
+
+def test_iter_datasets_first_page_error(requests_mock):
+    requests_mock.get(re.compile(r".*/v1/dataset/"), status_code=500, text="Error")
+    client = BODSClient(api_key="apikey")
+    with pytest.raises(APIRequestError) as excinfo:
+        list(client.iter_timetable_datasets())
+    assert excinfo.value.error.status_code == 500
+
+
+def test_iter_datasets_page_error(requests_mock, fare_list_response):
+    first_page = fare_list_response.json.return_value
+    requests_mock.get(
+        re.compile(r".*/v1/fares/dataset/"),
+        [{"json": first_page}, {"status_code": 503, "text": "Unavailable"}],
+    )
+    client = BODSClient(api_key="apikey")
+    datasets = client.iter_fares_datasets(max_workers=1)
+    with pytest.raises(APIRequestError, match="503"):
+        list(datasets)
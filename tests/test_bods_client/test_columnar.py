@@ -0,0 +1,195 @@
+import math
+from datetime import datetime, timezone
+from unittest.mock import patch
+
+import pytest
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from bods_client.columnar import (
+    NAT,
+    DictionaryColumn,
+    VehiclePositions,
+    _import_optional,
+    _to_epoch_us,
+)
+from bods_client.models import Siri, SIRIVMParams
+from bods_client.models.siri import SiriParsingError
+
+from .conftest import DATA_DIR
+
+GOOD_PACKET = DATA_DIR / "good_packet.xml"
+
+
+def test_dictionary_column():
+    column = DictionaryColumn()
+    for value in ["a", "b", None, "a"]:
+        column.append(value)
+    assert list(column.codes) == [0, 1, -1, 0]
+    assert column.values == ["a", "b"]
+    assert len(column) == 4
+    assert column[2] is None
+    assert column[3] == "a"
+    assert column.to_list() == ["a", "b", None, "a"]
+
+
+def test_dictionary_column_extend():
+    column, other = DictionaryColumn(), DictionaryColumn()
+    for value in ["a", None, "b"]:
+        column.append(value)
+    for value in ["c", "a", None, "c", "d"]:
+        other.append(value)
+    column.extend(other)
+
+    expected = DictionaryColumn()
+    for value in ["a", None, "b", "c", "a", None, "c", "d"]:
+        expected.append(value)
+    assert (column.codes, column.values) == (expected.codes, expected.values)
+
+
+def test_to_epoch_us():
+    aware = datetime(2022, 1, 29, 16, 9, 19, 5, tzinfo=timezone.utc)
+    assert _to_epoch_us(aware) == int(aware.timestamp()) * 1_000_000 + 5
+    assert _to_epoch_us(aware.replace(tzinfo=None)) == _to_epoch_us(aware)
+    assert _to_epoch_us(None) == NAT
+
+
+def test_from_siri_matches_models():
+    positions = VehiclePositions.from_siri(GOOD_PACKET)
+    activities = list(Siri.iter_vehicle_activities(GOOD_PACKET))
+    expected = VehiclePositions.from_vehicle_activities(activities)
+
+    assert len(positions) == 4
+    for name, column in positions.columns.items():
+        other = expected.columns[name]
+        if name in VehiclePositions.REF_COLUMNS:
+            assert column.to_list() == other.to_list(), name
+        else:
+            assert str(list(column)) == str(list(other)), name
+
+
+def test_from_siri_with_params():
+    params = SIRIVMParams(operator_refs=["AKSS"], line_ref="177")
+    positions = VehiclePositions.from_siri(GOOD_PACKET, params=params)
+    assert positions.vehicle_ref.to_list() == ["4315"]
+
+
+def test_from_siri_values():
+    positions = VehiclePositions.from_siri(GOOD_PACKET.read_bytes())
+    assert positions.longitude[0] == 0.557191
+    assert positions.latitude[0] == 51.277118
+    assert math.isnan(positions.bearing[0])
+    assert positions.bearing[1] == 149.0
+    recorded_at = datetime(2022, 1, 29, 16, 9, 19, tzinfo=timezone.utc)
+    assert positions.recorded_at_time[0] == int(recorded_at.timestamp() * 1_000_000)
+    assert positions.operator_ref[0] == "AKSS"
+    assert positions.vehicle_ref[0] == "6409"
+    assert positions.origin_ref[0] is None
+
+
+def test_from_siri_empty_elements():
+    packet = GOOD_PACKET.read_bytes()
+    packet = packet.replace(b"<Bearing>149.0</Bearing>", b"<Bearing/>")
+    packet = packet.replace(
+        b"<ValidUntilTime>2022-01-29T19:54:42.367946</ValidUntilTime>",
+        b"<ValidUntilTime></ValidUntilTime>",
+    )
+    positions = VehiclePositions.from_siri(packet)
+    assert len(positions) == 4
+    assert math.isnan(positions.bearing[1])
+    assert positions.valid_until_time[1] == NAT
+    assert positions.bearing[3] == 90.0
+
+
+@pytest.mark.parametrize("name", ["missing_mvj.xml", "missing_vehicle_location.xml"])
+def test_from_siri_missing_elements(name):
+    with pytest.raises(SiriParsingError):
+        VehiclePositions.from_siri(DATA_DIR / name)
+
+
+def test_to_numpy():
+    np = pytest.importorskip("numpy")
+    positions = VehiclePositions.from_siri(GOOD_PACKET)
+    arrays = positions.to_numpy()
+    assert arrays["longitude"].dtype == np.float64
+    assert arrays["longitude"][0] == 0.557191
+    assert arrays["recorded_at_time"].dtype == np.dtype("datetime64[us]")
+    assert arrays["recorded_at_time"][0] == np.datetime64("2022-01-29T16:09:19")
+    assert arrays["operator_ref"].dtype == np.int32
+    assert positions.operator_ref.values[arrays["operator_ref"][0]] == "AKSS"
+
+
+def test_to_numpy_nat():
+    np = pytest.importorskip("numpy")
+    positions = VehiclePositions()
+    positions.recorded_at_time.append(NAT)
+    assert np.isnat(positions.to_numpy()["recorded_at_time"][0])
+
+
+def test_to_arrow():
+    pa = pytest.importorskip("pyarrow")
+    positions = VehiclePositions.from_siri(GOOD_PACKET)
+    positions.recorded_at_time[1] = NAT
+    table = positions.to_arrow()
+    assert table.num_rows == 4
+    assert pa.types.is_dictionary(table.schema.field("operator_ref").type)
+    assert table.column("operator_ref").to_pylist()[0] == "AKSS"
+    assert table.column("origin_ref").null_count == 4
+    assert table.column("recorded_at_time").null_count == 1
+    assert table.schema.field("recorded_at_time").type == pa.timestamp("us", "UTC")
+
+
+def test_to_pandas():
+    pd = pytest.importorskip("pandas")
+    positions = VehiclePositions.from_siri(GOOD_PACKET)
+    frame = positions.to_pandas()
+    assert len(frame) == 4
+    assert frame["operator_ref"].dtype == "category"
+    assert frame["operator_ref"][0] == "AKSS"
+    assert frame["recorded_at_time"][0] == pd.Timestamp("2022-01-29T16:09:19Z")
+
+
+def test_import_optional_missing():
+    with patch("importlib.import_module", side_effect=ImportError):
+        with pytest.raises(ImportError, match=r"bods-client\[arrow\]"):
+            _import_optional("pyarrow", "arrow")
+
+
+def test_from_gtfs_rt_bytes():
+    positions = VehiclePositions.from_gtfs_rt((DATA_DIR / "gtfsrt.bin").read_bytes())
+    assert len(positions) == 4
+    assert positions.item_identifier[0] == "5988548390748957547"
+    assert positions.vehicle_ref[0] == "SN61DFZ"
+    assert positions.latitude[0] == pytest.approx(51.282772)
+    assert positions.longitude[0] == pytest.approx(-0.077688)
+    assert positions.bearing[0] == 315.0
+    assert positions.recorded_at_time[0] == 1643646311 * 1_000_000
+    assert positions.valid_until_time[0] == NAT
+    assert positions.line_ref[0] == ""
+    assert positions.direction_ref[0] is None
+    assert positions.operator_ref.to_list() == [None] * 4
+
+
+def test_from_gtfs_rt_message():
+    message = FeedMessage()
+    message.header.gtfs_realtime_version = "2.0"
+    message.entity.add(id="trip-update").trip_update.trip.trip_id = "T1"
+    message.entity.add(id="no-position").vehicle.vehicle.id = "V0"
+    vehicle = message.entity.add(id="vehicle").vehicle
+    vehicle.position.latitude = 51.5
+    vehicle.position.longitude = -0.1
+    vehicle.trip.route_id = "R1"
+    vehicle.trip.trip_id = "T1"
+    vehicle.trip.direction_id = 1
+    bare = message.entity.add(id="bare").vehicle
+    bare.position.latitude = 52.0
+
+    positions = VehiclePositions.from_gtfs_rt(message)
+    assert positions.item_identifier.to_list() == ["vehicle", "bare"]
+    assert positions.line_ref.to_list() == ["R1", None]
+    assert positions.vehicle_journey_ref.to_list() == ["T1", None]
+    assert positions.direction_ref.to_list() == ["1", None]
+    assert positions.vehicle_ref.to_list() == [None, None]
+    assert math.isnan(positions.bearing[0])
+    assert list(positions.recorded_at_time) == [NAT, NAT]
+    for column in positions.columns.values():
+        assert len(column) == 2
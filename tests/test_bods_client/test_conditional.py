@@ -0,0 +1,128 @@
+import asyncio
+import re
+
+import httpx
+
+from bods_client.async_client import AsyncBODSClient
+from bods_client.client import BODSClient
+from bods_client.conditional import ValidatorCache
+from bods_client.models import APIError, TimetableResponse
+
+from .conftest import DATA_DIR
+
+TIMETABLE = (DATA_DIR / "timetable.json").read_text()
+SIRI = (DATA_DIR / "good_packet.xml").read_bytes()
+
+
+def test_conditional_requests_disabled_by_default(requests_mock):
+    requests_mock.get(re.compile(r".*/datafeed/"), content=SIRI, headers={"ETag": "1"})
+    client = BODSClient(api_key="apikey")
+    client.get_siri_vm_data_feed()
+    client.get_siri_vm_data_feed()
+    assert client.validators is None
+    assert "If-None-Match" not in requests_mock.last_request.headers
+
+
+def test_conditional_etag(requests_mock):
+    requests_mock.get(
+        re.compile(r".*/v1/dataset/5/"),
+        [
+            {"text": TIMETABLE, "headers": {"ETag": '"v1"'}},
+            {"status_code": 304},
+        ],
+    )
+    client = BODSClient(api_key="apikey", conditional_requests=True)
+    first = client.get_timetable_dataset(dataset_id=5)
+    assert isinstance(first, TimetableResponse)
+    assert not client.not_modified
+
+    second = client.get_timetable_dataset(dataset_id=5)
+    assert second is first
+    assert client.not_modified
+    assert requests_mock.last_request.headers["If-None-Match"] == '"v1"'
+
+
+def test_conditional_last_modified_per_params(requests_mock):
+    last_modified = "Sat, 29 Jan 2022 19:49:42 GMT"
+    requests_mock.get(
+        re.compile(r".*/datafeed/"),
+        content=SIRI,
+        headers={"Last-Modified": last_modified},
+    )
+    client = BODSClient(api_key="apikey", conditional_requests=True)
+    client.get_siri_vm_data_feed()
+    assert "If-Modified-Since" not in requests_mock.last_request.headers
+    client.get_siri_vm_data_feed()
+    assert requests_mock.last_request.headers["If-Modified-Since"] == last_modified
+    assert "If-None-Match" not in requests_mock.last_request.headers
+    assert len(client.validators) == 1
+
+
+def test_conditional_response_without_validators_is_forgotten(requests_mock):
+    requests_mock.get(
+        re.compile(r".*/datafeed/"),
+        [
+            {"content": SIRI, "headers": {"ETag": "1"}},
+            {"content": SIRI},
+            {"status_code": 304, "text": ""},
+        ],
+    )
+    client = BODSClient(api_key="apikey", conditional_requests=True)
+    client.get_siri_vm_data_feed()
+    client.get_siri_vm_data_feed()
+    assert len(client.validators) == 0
+
+    result = client.get_siri_vm_data_feed()
+    assert isinstance(result, APIError)
+    assert result.status_code == 304
+    assert not client.not_modified
+
+
+def test_async_conditional_requests():
+    responses = iter(
+        [
+            httpx.Response(200, content=SIRI, headers={"ETag": "abc"}),
+            httpx.Response(304),
+        ]
+    )
+    seen = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        seen.append(request.headers.get("If-None-Match"))
+        return next(responses)
+
+    async def run():
+        transport = httpx.MockTransport(handler)
+        async with AsyncBODSClient(
+            api_key="apikey",
+            client=httpx.AsyncClient(transport=transport),
+            conditional_requests=True,
+        ) as client:
+            first = await client.get_siri_vm_data_feed_by_id(10)
+            second = await client.get_siri_vm_data_feed_by_id(10)
+            return first, second, client.not_modified
+
+    first, second, not_modified = asyncio.run(run())
+    assert first == second == SIRI
+    assert not_modified
+    assert seen == [None, "abc"]
+
+
+def test_validator_cache_clear():
+    cache = ValidatorCache()
+    cache.store("url", httpx.Response(200, headers={"ETag": "1"}), b"")
+    assert len(cache) == 1
+    cache.clear()
+    assert len(cache) == 0
+
+
+def test_validator_cache_evicts_least_recently_used():
+    cache = ValidatorCache(max_entries=2)
+    for url in ("a", "b"):
+        cache.store(url, httpx.Response(200, headers={"ETag": url}), url)
+    assert cache.headers("a") == {"If-None-Match": "a"}
+    cache.store("c", httpx.Response(200, headers={"ETag": "c"}), "c")
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a").result == "a"
+    assert cache.get("c").result == "c"
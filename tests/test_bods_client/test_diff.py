@@ -0,0 +1,150 @@
+from pathlib import Path
+
+import pytest
+
+from bods_client.diff import SnapshotDiffer, item_key, vehicle_key
+from bods_client.geo import haversine
+from bods_client.models import Siri
+
+DATA = Path(__file__).parent / "data"
+PACKET = (DATA / "good_packet.xml").read_bytes()
+
+
+def activities():
+    siri = Siri.from_bytes(PACKET)
+    return siri.service_delivery.vehicle_monitoring_delivery.vehicle_activities
+
+
+def snapshot(items):
+    siri = Siri.from_bytes(PACKET)
+    delivery = siri.service_delivery.vehicle_monitoring_delivery
+    return siri.model_copy(
+        update={
+            "service_delivery": siri.service_delivery.model_copy(
+                update={
+                    "vehicle_monitoring_delivery": delivery.model_copy(
+                        update={"vehicle_activities": items}
+                    )
+                }
+            )
+        }
+    )
+
+
+def changed(activity, location=None, **journey):
+    mvj = activity.monitored_vehicle_journey
+    if location is not None:
+        journey["vehicle_location"] = mvj.vehicle_location.model_copy(update=location)
+    return activity.model_copy(
+        update={"monitored_vehicle_journey": mvj.model_copy(update=journey)}
+    )
+
+
+def test_haversine():
+    assert haversine(0, 0, 0, 0) == 0
+    assert haversine(-0.1278, 51.5074, -2.2426, 53.4808) == pytest.approx(
+        262_000, rel=0.01
+    )
+
+
+def test_first_snapshot_adds_everything():
+    differ = SnapshotDiffer()
+    diff = differ.update(PACKET)
+    assert len(diff.added) == 4
+    assert diff.updated == diff.removed == []
+    assert diff.unchanged == 0
+    assert len(differ) == 4
+
+
+def test_same_snapshot_is_unchanged():
+    differ = SnapshotDiffer()
+    differ.update(PACKET)
+    diff = differ.update(Siri.from_bytes(PACKET))
+    assert diff.added == diff.updated == diff.removed == []
+    assert diff.unchanged == 4
+
+
+def test_added_updated_and_removed():
+    first = activities()
+    differ = SnapshotDiffer()
+    differ.update(snapshot(first[:3]))
+
+    moved = changed(first[0], location={"latitude": 52.0})
+    diff = differ.update(snapshot([moved, first[1], first[3]]))
+    assert diff.added == [first[3]]
+    assert diff.updated == [moved]
+    assert diff.removed == [vehicle_key(first[2])]
+    assert diff.unchanged == 1
+
+
+def test_journey_change_is_an_update():
+    first = activities()
+    differ = SnapshotDiffer(distance_threshold=1000, bearing_threshold=90)
+    differ.update(snapshot(first))
+    diff = differ.update(snapshot([changed(first[0], line_ref="10")] + first[1:]))
+    assert len(diff.updated) == 1
+    assert diff.unchanged == 3
+
+
+def test_distance_threshold_accumulates():
+    activity = activities()[0]
+    latitude = activity.monitored_vehicle_journey.vehicle_location.latitude
+    # 0.0001 degrees of latitude is about 11 metres.
+    step = 0.0001
+    differ = SnapshotDiffer(distance_threshold=20)
+    differ.update(snapshot([activity]))
+    first = differ.update(
+        snapshot([changed(activity, location={"latitude": latitude + step})])
+    )
+    second = differ.update(
+        snapshot([changed(activity, location={"latitude": latitude + 2 * step})])
+    )
+    assert first.unchanged == 1
+    assert len(second.updated) == 1
+
+
+@pytest.mark.parametrize(
+    ("old", "new", "is_updated"),
+    [
+        (10.0, 20.0, False),
+        (10.0, 40.0, True),
+        (350.0, 5.0, False),
+        (None, 5.0, True),
+        (5.0, None, True),
+        (None, None, False),
+    ],
+)
+def test_bearing_threshold(old, new, is_updated):
+    activity = activities()[0]
+    differ = SnapshotDiffer(bearing_threshold=20)
+    differ.update(snapshot([changed(activity, bearing=old)]))
+    diff = differ.update(snapshot([changed(activity, bearing=new)]))
+    assert bool(diff.updated) is is_updated
+
+
+def test_missing_location_is_an_update():
+    activity = activities()[0]
+    differ = SnapshotDiffer()
+    differ.update(snapshot([activity]))
+    diff = differ.update(snapshot([changed(activity, vehicle_location=None)]))
+    assert len(diff.updated) == 1
+    diff = differ.update(snapshot([changed(activity, vehicle_location=None)]))
+    assert diff.unchanged == 1
+
+
+def test_duplicate_keys_use_first_activity():
+    first = activities()
+    differ = SnapshotDiffer()
+    diff = differ.update(snapshot([first[0], first[0]]))
+    assert diff.added == [first[0]]
+
+
+def test_item_key_and_reset():
+    differ = SnapshotDiffer(key=item_key)
+    differ.update(PACKET)
+    assert {activity.item_identifier for activity in activities()} == set(
+        differ._states
+    )
+    differ.reset()
+    assert len(differ) == 0
+    assert len(differ.update(PACKET).added) == 4
@@ -0,0 +1,262 @@
+import errno
+import hashlib
+import json
+import os
+import re
+import threading
+from datetime import datetime, timezone
+
+import pytest
+import requests
+
+from bods_client import download
+from bods_client.client import BODSClient
+from bods_client.download import DOWNLOADED, FAILED, RESUMED, SKIPPED, DatasetDownloader
+from bods_client.models import APIError, Fares, Timetable, TimetableResponse
+
+from .conftest import DATA_DIR
+
+TIMETABLE = json.loads((DATA_DIR / "timetable.json").read_text())
+FARE = json.loads((DATA_DIR / "fare.json").read_text())
+CONTENT = bytes(range(256)) * 40
+DATASET_URL = re.compile(r".*/dataset/\d+/download/")
+
+
+def make_timetable(id_, **kwargs):
+    url = f"https://data.bus-data.dft.gov.uk/timetable/dataset/{id_}/download/"
+    return Timetable(**dict(TIMETABLE, id=id_, url=url, **kwargs))
+
+
+class FileServer:
+    """
+    Serves CONTENT for every data set, honouring Range headers unless told not to.
+    """
+
+    def __init__(self, requests_mock, content=CONTENT):
+        self.content = content
+        self.honour_range = True
+        self.content_range_offset = 0
+        self.ranges = []
+        self.lock = threading.Lock()
+        requests_mock.get(DATASET_URL, content=self.callback)
+
+    def callback(self, request, context):
+        header = request.headers.get("Range")
+        with self.lock:
+            self.ranges.append(header)
+        if header is None or not self.honour_range:
+            return self.content
+        start = int(header.removeprefix("bytes=").rstrip("-"))
+        if start >= len(self.content):
+            context.status_code = 416
+            return b""
+        context.status_code = 206
+        end = len(self.content) - 1
+        offset = start + self.content_range_offset
+        context.headers["Content-Range"] = f"bytes {offset}-{end}/{len(self.content)}"
+        return self.content[start:]
+
+
+@pytest.fixture
+def server(requests_mock):
+    return FileServer(requests_mock)
+
+
+@pytest.fixture
+def downloader(tmp_path):
+    return DatasetDownloader(BODSClient(api_key="apikey"), tmp_path, max_workers=3)
+
+
+def read_manifest(path):
+    return json.loads(path.with_name(path.name + ".json").read_text())
+
+
+def test_download(server, downloader, tmp_path):
+    datasets = [make_timetable(id_) for id_ in range(5)] + [Fares(**FARE)]
+    results = list(downloader.download(iter(datasets)))
+
+    assert [result.dataset for result in results] == datasets
+    assert {result.status for result in results} == {DOWNLOADED}
+    expected_sha = hashlib.sha256(CONTENT).hexdigest()
+    for result in results:
+        assert result.path.read_bytes() == CONTENT
+        assert result.size == len(CONTENT)
+        assert result.sha256 == expected_sha
+        assert result.error is None
+        manifest = read_manifest(result.path)
+        assert manifest["sha256"] == expected_sha
+        assert manifest["modified"] == result.dataset.modified.isoformat()
+    assert results[0].path == tmp_path / "timetables" / "0.zip"
+    assert results[-1].path == tmp_path / "fares" / "4395.zip"
+    assert server.ranges == [None] * 6
+
+
+def test_download_response(server, downloader):
+    response = TimetableResponse(count=1, results=[make_timetable(1)])
+    (result,) = downloader.download(response)
+    assert result.status == DOWNLOADED
+
+
+def test_download_skips_current_files(server, downloader):
+    datasets = [make_timetable(1), make_timetable(2)]
+    list(downloader.download(datasets))
+    results = list(downloader.download(datasets))
+    assert [result.status for result in results] == [SKIPPED, SKIPPED]
+    assert results[0].sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert len(server.ranges) == 2
+
+
+def test_download_modified_dataset(server, downloader):
+    downloader.download_one(make_timetable(1))
+    modified = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    result = downloader.download_one(make_timetable(1, modified=modified))
+    assert result.status == DOWNLOADED
+    assert read_manifest(result.path)["modified"] == modified.isoformat()
+    assert len(server.ranges) == 2
+
+
+def test_download_skips_without_hashing(server, downloader, monkeypatch):
+    downloader.download_one(make_timetable(1))
+
+    def fail(*args):
+        raise AssertionError("hashed an unchanged file")
+
+    monkeypatch.setattr(download, "_sha256_file", fail)
+    assert downloader.download_one(make_timetable(1)).status == SKIPPED
+
+
+def test_download_rehashes_touched_file(server, downloader, monkeypatch):
+    path = downloader.download_one(make_timetable(1)).path
+    os.utime(path, ns=(0, 0))
+    hashed = []
+    sha256_file = download._sha256_file
+    monkeypatch.setattr(
+        download,
+        "_sha256_file",
+        lambda *args: hashed.append(args) or sha256_file(*args),
+    )
+    assert downloader.download_one(make_timetable(1)).status == SKIPPED
+    assert read_manifest(path)["mtime_ns"] == 0
+    assert downloader.download_one(make_timetable(1)).status == SKIPPED
+    assert len(hashed) == 1
+    assert len(server.ranges) == 1
+
+
+def test_download_corrupt_file(server, downloader):
+    path = downloader.download_one(make_timetable(1)).path
+    path.write_bytes(b"corrupt")
+    result = downloader.download_one(make_timetable(1))
+    assert result.status == DOWNLOADED
+    assert path.read_bytes() == CONTENT
+
+
+def interrupt(downloader, dataset, size):
+    """
+    Leaves a download of dataset as if it was interrupted after size bytes.
+    """
+    result = downloader.download_one(dataset)
+    part = result.path.with_name(result.path.name + ".part")
+    result.path.replace(part)
+    part.write_bytes(CONTENT[:size])
+    manifest = result.path.with_name(result.path.name + ".json")
+    manifest.write_text(json.dumps(dict(read_manifest(result.path), sha256=None)))
+    return part
+
+
+def test_download_resumes(server, downloader):
+    dataset = make_timetable(1)
+    part = interrupt(downloader, dataset, 1000)
+    result = downloader.download_one(dataset)
+    assert result.status == RESUMED
+    assert server.ranges[-1] == "bytes=1000-"
+    assert result.path.read_bytes() == CONTENT
+    assert result.sha256 == hashlib.sha256(CONTENT).hexdigest()
+    assert read_manifest(result.path)["sha256"] == result.sha256
+    assert not part.exists()
+
+
+def test_download_range_ignored(server, downloader):
+    dataset = make_timetable(1)
+    interrupt(downloader, dataset, 1000)
+    server.honour_range = False
+    result = downloader.download_one(dataset)
+    assert result.status == DOWNLOADED
+    assert result.path.read_bytes() == CONTENT
+
+
+@pytest.mark.parametrize(("size", "content_range_offset"), [(len(CONTENT), 0), (10, 5)])
+def test_download_restarts_mismatched_part(
+    server, downloader, size, content_range_offset
+):
+    dataset = make_timetable(1)
+    interrupt(downloader, dataset, size)
+    server.content_range_offset = content_range_offset
+    result = downloader.download_one(dataset)
+    assert result.status == DOWNLOADED
+    assert server.ranges[-2:] == [f"bytes={size}-", None]
+    assert result.path.read_bytes() == CONTENT
+
+
+def test_download_discards_stale_part(server, downloader):
+    dataset = make_timetable(1)
+    part = interrupt(downloader, dataset, 1000)
+    modified = datetime(2022, 1, 1, tzinfo=timezone.utc)
+    result = downloader.download_one(make_timetable(1, modified=modified))
+    assert result.status == DOWNLOADED
+    assert server.ranges[-1] is None
+    assert not part.exists()
+
+
+def test_download_errors(requests_mock, downloader):
+    requests_mock.get(re.compile(r".*/1/download/"), status_code=404, text="Missing")
+    requests_mock.get(re.compile(r".*/2/download/"), exc=requests.ConnectionError)
+    requests_mock.get(re.compile(r".*/3/download/"), content=CONTENT)
+    datasets = [make_timetable(id_) for id_ in (1, 2, 3)]
+    first, second, third = downloader.download(datasets)
+
+    assert first.status == FAILED
+    assert first.error == APIError(status_code=404, reason="Missing")
+    assert not first.path.exists()
+    assert second.status == FAILED
+    assert isinstance(second.error, requests.ConnectionError)
+    assert third.status == DOWNLOADED
+
+    requests_mock.get(re.compile(r".*/1/download/"), content=CONTENT)
+    assert downloader.download_one(datasets[0]).status == DOWNLOADED
+
+
+def test_download_keeps_part_on_error(requests_mock, server, downloader):
+    dataset = make_timetable(1)
+    part = interrupt(downloader, dataset, 1000)
+    requests_mock.get(DATASET_URL, status_code=503, text="Busy")
+    assert downloader.download_one(dataset).status == FAILED
+    assert part.read_bytes() == CONTENT[:1000]
+
+
+def test_open_dataset_file(server):
+    client = BODSClient(api_key="apikey")
+    with client.open_dataset_file(make_timetable(1), offset=10) as response:
+        assert response.status_code == 206
+        assert response.content == CONTENT[10:]
+    assert server.ranges == ["bytes=10-"]
+
+
+def test_download_write_errors(server, downloader, monkeypatch):
+    error = OSError(errno.ENOSPC, "No space left on device")
+
+    def write_manifest(*args):
+        raise error
+
+    monkeypatch.setattr(DatasetDownloader, "_write_manifest", write_manifest)
+    result = downloader.download_one(make_timetable(1))
+    assert result.status == FAILED
+    assert result.error is error
+    assert server.ranges == []
+
+
+def test_download_directory_errors(server, tmp_path):
+    (tmp_path / "timetables").write_text("not a directory")
+    downloader = DatasetDownloader(BODSClient(api_key="apikey"), tmp_path)
+    result = downloader.download_one(make_timetable(1))
+    assert result.status == FAILED
+    assert isinstance(result.error, OSError)
@@ -0,0 +1,65 @@
+import io
+import zipfile
+from datetime import datetime, timezone
+
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from bods_client.columnar import VehiclePositions
+from bods_client.models import FaresResponse, Siri, TimetableResponse
+from bods_client.testing import (
+    fares_datasets,
+    gtfs_rt_archive,
+    gtfs_rt_feed,
+    siri_vm_archive,
+    siri_vm_packet,
+    timetable_datasets,
+)
+
+
+def test_siri_vm_packet():
+    packet = siri_vm_packet(25)
+    assert packet == siri_vm_packet(25)
+    siri = Siri.from_bytes(packet)
+    activities = siri.service_delivery.vehicle_monitoring_delivery.vehicle_activities
+    assert len(activities) == 25
+    journey = activities[7].monitored_vehicle_journey
+    assert journey.vehicle_ref == "7"
+    assert journey.operator_ref == "OP7"
+
+
+def test_siri_vm_packet_timestamp():
+    timestamp = datetime(2023, 5, 1, 8, tzinfo=timezone.utc)
+    siri = Siri.from_bytes(siri_vm_packet(1, timestamp=timestamp))
+    assert siri.service_delivery.response_timestamp == timestamp
+
+
+def test_gtfs_rt_feed_matches_siri_vm():
+    message = FeedMessage()
+    message.ParseFromString(gtfs_rt_feed(25))
+    assert len(message.entity) == 25
+
+    siri = VehiclePositions.from_siri(siri_vm_packet(25))
+    gtfs_rt = VehiclePositions.from_gtfs_rt(message)
+    for name in ("longitude", "latitude", "bearing", "recorded_at_time"):
+        expected = [round(value, 4) for value in getattr(siri, name)]
+        assert [round(value, 4) for value in getattr(gtfs_rt, name)] == expected
+
+
+def test_archives():
+    with zipfile.ZipFile(io.BytesIO(siri_vm_archive(3))) as archive:
+        assert archive.read("siri.xml") == siri_vm_packet(3)
+    with zipfile.ZipFile(io.BytesIO(gtfs_rt_archive(3))) as archive:
+        assert archive.read("gtfsrt.bin") == gtfs_rt_feed(3)
+
+
+def test_datasets():
+    timetables = timetable_datasets(5, start=10, host="http://localhost:8000")
+    response = TimetableResponse(count=5, results=timetables)
+    assert [timetable.id for timetable in response.results] == list(range(10, 15))
+    assert response.results[0].url == (
+        "http://localhost:8000/timetable/dataset/10/download/"
+    )
+
+    response = FaresResponse(count=3, results=fares_datasets(3))
+    assert [fares.id for fares in response.results] == [1, 2, 3]
+    assert response.results[0].url.startswith("https://data.bus-data.dft.gov.uk/")
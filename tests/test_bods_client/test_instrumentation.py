@@ -0,0 +1,272 @@
+import logging
+
+import pytest
+import requests
+
+from bods_client import client as client_module
+from bods_client.cache import MemoryCache
+from bods_client.client import BODSClient
+from bods_client.instrumentation import (
+    CallMetrics,
+    Counter,
+    Histogram,
+    LoggingHook,
+    PrometheusHook,
+)
+from bods_client.models import APIError, APIRequestError, TimetableParams
+from bods_client.testing import StubBODSServer, gtfs_rt_archive
+from bods_client.throttle import RetryPolicy
+
+VEHICLES = 20
+
+
+@pytest.fixture
+def server():
+    with StubBODSServer(timetables=30, fares=5, vehicles=VEHICLES) as server:
+        yield server
+
+
+@pytest.fixture
+def calls():
+    return []
+
+
+@pytest.fixture
+def client(server, calls):
+    with BODSClient(
+        api_key="key", base_url=server.api_url, hooks=[calls.append]
+    ) as client:
+        yield client
+
+
+def test_get_records_every_phase(client, calls):
+    response = client.get_timetable_datasets(TimetableParams(limit=10))
+    assert len(calls) == 1
+    call = calls[0]
+    assert call.endpoint == "timetables"
+    assert call.url == client.timetable_endpoint
+    assert call.params == {"limit": 10, "offset": 0}
+    assert call.status == 200
+    assert call.cached is False
+    assert call.bytes_received > 0
+    assert call.time_to_first_byte >= 0
+    assert call.download_time >= 0
+    assert call.decompress_time is None
+    assert call.parse_time > 0
+    assert call.duration >= call.parse_time
+    assert call.objects == len(response.results) == 10
+    assert call.retries == 0
+    assert call.error is None
+
+
+def test_retries_are_counted(server, calls):
+    retry = RetryPolicy(backoff=0, jitter=False)
+    with BODSClient(
+        api_key="key", base_url=server.api_url, retry=retry, hooks=[calls.append]
+    ) as client:
+        server.fail_next(2)
+        feed = client.get_gtfs_rt_data_feed()
+    assert [call.retries for call in calls] == [2]
+    assert calls[0].endpoint == "gtfs_rt"
+    assert calls[0].objects == len(feed.entity) == VEHICLES
+
+
+def test_failed_call_records_the_error(calls):
+    client = BODSClient(
+        api_key="key", base_url="http://127.0.0.1:1/api", hooks=[calls.append]
+    )
+    with pytest.raises(requests.ConnectionError):
+        client.get_siri_vm_data_feed()
+    assert isinstance(calls[0].error, requests.ConnectionError)
+    assert calls[0].status is None
+
+
+def test_cached_calls(server, calls):
+    with BODSClient(
+        api_key="key",
+        base_url=server.api_url,
+        cache=MemoryCache(),
+        hooks=[calls.append],
+    ) as client:
+        client.get_timetable_dataset(3)
+        client.get_timetable_dataset(3)
+    assert [(call.cached, call.status) for call in calls] == [
+        (False, 200),
+        (True, None),
+    ]
+    assert calls[1].bytes_received is None
+    assert calls[1].objects == 1
+
+
+def test_each_page_is_a_call(client, calls):
+    timetables = list(client.iter_timetable_datasets(TimetableParams(limit=7)))
+    assert len(timetables) == 30
+    assert sorted(call.params["offset"] for call in calls) == [0, 7, 14, 21, 28]
+    assert sum(call.objects for call in calls) == 30
+
+
+def test_archive_records_download_and_decompression(client, calls):
+    feed = client.get_gtfs_rt_from_archive()
+    assert len(calls) == 1
+    call = calls[0]
+    assert call.endpoint == "gtfs_rt_archive"
+    assert call.status == 200
+    assert call.bytes_received == len(gtfs_rt_archive(VEHICLES))
+    assert call.download_time >= 0
+    assert call.decompress_time >= 0
+    assert call.parse_time >= 0
+    assert call.objects == len(feed.entity) == VEHICLES
+
+    calls.clear()
+    assert client.get_siri_vm_from_archive().startswith(b"<?xml")
+    assert [call.endpoint for call in calls] == ["siri_vm_archive"]
+    assert calls[0].objects is None
+
+    calls.clear()
+    with client.open_siri_vm_archive() as member:
+        assert calls[0].decompress_time is None
+        assert member.read(5) == b"<?xml"
+
+
+def test_iter_archive_is_one_call(client, calls):
+    activities = client.iter_siri_vm_from_archive()
+    next(activities)
+    # Calls made while iterating are measured separately.
+    client.get_timetable_dataset(1)
+    assert [call.endpoint for call in calls] == ["timetables"]
+    assert sum(1 for _ in activities) == VEHICLES - 1
+
+    assert [call.endpoint for call in calls] == ["timetables", "siri_vm_archive"]
+    call = calls[1]
+    assert call.objects == VEHICLES
+    assert call.bytes_received > 0
+    assert call.decompress_time > 0
+    assert call.parse_time > 0
+    assert call.error is None
+
+
+def test_iter_archive_records_api_errors(server, client, calls):
+    server.fail_next(status=404)
+    with pytest.raises(APIRequestError):
+        list(client.iter_siri_vm_from_archive())
+    assert calls[0].status == 404
+    assert isinstance(calls[0].error, APIRequestError)
+
+    server.fail_next(status=404)
+    assert isinstance(client.get_gtfs_rt_from_archive(), APIError)
+    assert (calls[1].status, calls[1].error, calls[1].objects) == (404, None, None)
+
+
+def test_failing_hook_is_logged(server, caplog):
+    def broken(call: CallMetrics) -> None:
+        raise ValueError("broken")
+
+    with BODSClient(api_key="key", base_url=server.api_url, hooks=[broken]) as client:
+        assert client.get_timetable_dataset(1).results[0].id == 1
+    assert "Instrumentation hook" in caplog.text
+
+
+def test_no_hooks_measures_nothing(server, monkeypatch):
+    def unexpected(*args, **kwargs):
+        raise AssertionError("CallMetrics created without hooks")
+
+    monkeypatch.setattr(client_module, "CallMetrics", unexpected)
+    with BODSClient(api_key="key", base_url=server.api_url) as client:
+        assert client.hooks == ()
+        assert client.get_timetable_dataset(1).results[0].id == 1
+        assert len(list(client.iter_siri_vm_from_archive())) == VEHICLES
+
+
+def test_logging_hook(client, caplog, server):
+    logger = logging.getLogger("test_instrumentation")
+    client.hooks = (LoggingHook(logger),)
+    with caplog.at_level(logging.INFO, logger="test_instrumentation"):
+        client.get_timetable_dataset(1)
+        server.fail_next(status=500)
+        client.get_timetable_dataset(1)
+    info, warning = caplog.records
+    assert info.levelno == logging.INFO
+    assert info.getMessage().startswith(
+        f"timetables {client.timetable_endpoint}1/ status=200"
+    )
+    assert "decompress=- " in info.getMessage()
+    assert warning.levelno == logging.WARNING
+    assert warning.bods_metrics.status == 500
+
+    caplog.clear()
+    with caplog.at_level(logging.ERROR, logger="test_instrumentation"):
+        client.get_timetable_dataset(1)
+    assert caplog.records == []
+
+
+def test_prometheus_hook(client, server):
+    hook = PrometheusHook(buckets=(0.5, 1.0))
+    client.hooks = (hook,)
+    client.get_timetable_datasets(TimetableParams(limit=10))
+    server.fail_next(status=503)
+    client.get_timetable_dataset(1)
+
+    assert hook.calls.get(("timetables", "200")) == 1
+    assert hook.calls.get(("timetables", "503")) == 1
+    assert hook.objects.get(("timetables",)) == 10
+    assert hook.histograms["parse_time"].count(("timetables",)) == 2
+    assert hook.histograms["decompress_time"].count(("timetables",)) == 0
+
+    text = hook.render()
+    assert "# TYPE bods_client_calls_total counter" in text
+    assert 'bods_client_calls_total{endpoint="timetables",status="200"} 1.0' in text
+    assert "# TYPE bods_client_parse_seconds histogram" in text
+    assert 'bods_client_duration_seconds_count{endpoint="timetables"} 2' in text
+    assert 'bods_client_duration_seconds_bucket{endpoint="timetables",le="+Inf"} 2' in (
+        text
+    )
+    assert text.endswith("\n")
+
+
+def test_prometheus_hook_statuses():
+    hook = PrometheusHook(namespace="bods")
+    failed = CallMetrics("siri_vm", "url")
+    failed.error = ValueError()
+    failed.retries = 3
+    failed.finish()
+    cached = CallMetrics("siri_vm", "url")
+    cached.cached = True
+    hook(failed)
+    hook(cached)
+    assert hook.calls.values == {("siri_vm", "error"): 1.0, ("siri_vm", "cached"): 1.0}
+    assert hook.retries.get(("siri_vm",)) == 3
+    assert hook.histograms["duration"].count(("siri_vm",)) == 1
+    assert hook.bytes_received.values == {}
+
+
+def test_counter_and_histogram():
+    counter = Counter("requests_total", "Requests.")
+    counter.inc()
+    counter.inc(amount=2)
+    assert counter.render() == [
+        "# HELP requests_total Requests.",
+        "# TYPE requests_total counter",
+        "requests_total 3.0",
+    ]
+
+    histogram = Histogram("latency_seconds", "Latency.", ("path",), buckets=(1, 0.1))
+    histogram.observe(0.25, ('a"b',))
+    histogram.observe(0.1, ('a"b',))
+    histogram.observe(5, ('a"b',))
+    assert histogram.count(('a"b',)) == 3
+    assert histogram.sum(('a"b',)) == 5.35
+    assert histogram.sum(("c",)) == 0.0
+    assert histogram.render()[2:] == [
+        'latency_seconds_bucket{path="a\\"b",le="0.1"} 1',
+        'latency_seconds_bucket{path="a\\"b",le="1"} 2',
+        'latency_seconds_bucket{path="a\\"b",le="+Inf"} 3',
+        'latency_seconds_sum{path="a\\"b"} 5.35',
+        'latency_seconds_count{path="a\\"b"} 3',
+    ]
+
+
+def test_call_metrics_repr():
+    call = CallMetrics("fares", "url", {"limit": 1})
+    assert call.as_dict()["params"] == {"limit": 1}
+    assert "_started" not in call.as_dict()
+    assert repr(call).startswith("CallMetrics(endpoint='fares', url='url'")
@@ -0,0 +1,61 @@
+import json
+import subprocess
+import sys
+
+import pytest
+
+from bods_client import models
+
+HEAVY_MODULES = ("lxml", "google.protobuf", "dateutil", "bods_client.models.siri")
+
+
+def _imported(code: str):
+    """
+    Runs code in a fresh interpreter and returns the heavy modules it imported.
+    """
+    report = (
+        "\nimport json, sys\n"
+        f"print(json.dumps([m for m in {HEAVY_MODULES!r} if m in sys.modules]))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code + report],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout)
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "import bods_client.client",
+        "import bods_client.async_client",
+        "import bods_client.models",
+        (
+            "from bods_client.models import TimetableParams\n"
+            "from bods_client.query import to_query_params\n"
+            "to_query_params(TimetableParams(nocs=['AKSS']))"
+        ),
+    ],
+)
+def test_heavy_modules_are_not_imported(code):
+    assert _imported(code) == []
+
+
+def test_heavy_modules_are_imported_on_first_use():
+    assert _imported("from bods_client.models import Siri") == [
+        "lxml",
+        "dateutil",
+        "bods_client.models.siri",
+    ]
+    code = "from bods_client.client import _feed_message\n_feed_message(b'')"
+    assert _imported(code) == ["google.protobuf"]
+
+
+def test_models_getattr():
+    from bods_client.models.siri import Siri
+
+    assert models.Siri is Siri
+    with pytest.raises(AttributeError, match="has no attribute 'Missing'"):
+        models.Missing
@@ -0,0 +1,163 @@
+import io
+import subprocess
+import sys
+import zipfile
+from decimal import Decimal
+
+import pytest
+
+from bods_client.models.netex import (
+    _NS_PREFIX,
+    _RECORD_MODELS,
+    FareProduct,
+    FareTable,
+    FareZone,
+    UserProfile,
+    iter_netex,
+)
+
+from .conftest import DATA_DIR
+
+NETEX_PATH = DATA_DIR / "netex.xml"
+NETEX = NETEX_PATH.read_bytes()
+FARE_PRICE = "fxc:UK:DFT:TypeOfFrame_UK_PI_FARE_PRICE:FXCP"
+
+
+def test_iter_netex():
+    records = list(iter_netex(NETEX))
+    assert [type(record) for record in records] == [
+        FareZone,
+        FareZone,
+        UserProfile,
+        UserProfile,
+        FareProduct,
+        FareProduct,
+        FareTable,
+        FareTable,
+        FareTable,
+    ]
+    zone = records[0]
+    assert (zone.id, zone.name) == ("fs@Maidstone", "Maidstone")
+    assert zone.members == ["atco:2400A001770A", "atco:2400A001780A"]
+    assert zone.frame_id == "epd:UK:AKSS:FareFrame_UK_PI_FARE_NETWORK:9@Line:op"
+    assert zone.file_name is None
+
+    adult, child = records[2:4]
+    assert (adult.user_type, adult.minimum_age, adult.maximum_age) == (
+        "adult",
+        16,
+        None,
+    )
+    assert (child.minimum_age, child.maximum_age) == (5, 15)
+
+    single, carnet = records[4:6]
+    assert single.product_kind == "PreassignedFareProduct"
+    assert (single.name, single.product_type) == ("Single", "singleTrip")
+    assert single.charging_moment_type == "beforeTravel"
+    assert single.type_of_fare_product_ref == "fxc:standard_product@trip@single"
+    assert single.operator_ref == "noc:AKSS"
+    assert carnet.product_kind == "AmountOfPriceUnitProduct"
+    assert carnet.operator_ref is None
+
+    adult_table, child_table, table = records[6:]
+    assert table.id == "Trip@single-SOP@p-ticket"
+    assert (table.parent_id, table.cells) == (None, [])
+    assert {adult_table.parent_id, child_table.parent_id} == {table.id}
+    cell = adult_table.cells[0]
+    assert cell.id == "Trip@single-SOP@p-ticket@adult@Maidstone+Barming"
+    assert (cell.order, cell.amount) == (1, Decimal("2.50"))
+    assert cell.price_kind == "DistanceMatrixElementPrice"
+    assert cell.price_refs == {"DistanceMatrixElementRef": "Maidstone+Barming"}
+    assert cell.column_ref == "Trip@single-SOP@p-ticket@adult@c1@Maidstone"
+    assert cell.row_ref == "Trip@single-SOP@p-ticket@adult@r1@Barming"
+    assert [cell.amount for cell in child_table.cells] == [Decimal("1.25")]
+
+
+FARE_FRAMES = [FareZone] * 2 + [UserProfile] * 2 + [FareProduct] * 2 + [FareTable] * 3
+
+
+@pytest.mark.parametrize(
+    ("frame_types", "expected"),
+    [
+        ([FARE_PRICE], [FareTable] * 3),
+        (["FareFrame"], FARE_FRAMES),
+        (["CompositeFrame"], FARE_FRAMES),
+        (["ServiceFrame"], []),
+        ([], []),
+    ],
+)
+def test_iter_netex_frame_types(frame_types, expected):
+    records = iter_netex(NETEX, frame_types=frame_types)
+    assert [type(record) for record in records] == expected
+
+
+def test_iter_netex_skips_unselected_records(monkeypatch):
+    built = []
+
+    class Spy(FareZone):
+        @classmethod
+        def from_lxml_element(cls, element, **kwargs):
+            built.append(element.get("id"))
+            return FareZone.from_lxml_element(element, **kwargs)
+
+    monkeypatch.setitem(_RECORD_MODELS, f"{_NS_PREFIX}FareZone", Spy)
+    assert list(iter_netex(NETEX, frame_types=[FARE_PRICE]))
+    assert built == []
+    assert len(list(iter_netex(NETEX))) == 9
+    assert built == ["fs@Maidstone", "fs@Barming"]
+
+
+def test_iter_netex_without_frames():
+    document = (
+        b'<PublicationDelivery xmlns="http://www.netex.org.uk/netex">'
+        b'<TypeOfFrameRef ref="profiles"/>'
+        b'<UserProfile id="adult"><Name>Adult</Name></UserProfile>'
+        b"</PublicationDelivery>"
+    )
+    (profile,) = iter_netex(document)
+    assert (profile.id, profile.frame_id) == ("adult", None)
+    assert list(iter_netex(document, frame_types=["profiles"])) == []
+
+
+def test_iter_netex_zip():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("AKSS_9.xml", NETEX)
+        archive.writestr("AKSS_10.xml", NETEX)
+    records = list(iter_netex(buffer, frame_types=[FARE_PRICE]))
+    names = [record.file_name for record in records]
+    assert names == ["AKSS_9.xml"] * 3 + ["AKSS_10.xml"] * 3
+
+
+def test_iter_netex_path():
+    records = list(iter_netex(NETEX_PATH))
+    assert {record.file_name for record in records} == {"netex.xml"}
+
+
+def test_iter_netex_does_not_import_transxchange():
+    code = (
+        "import sys\n"
+        "import bods_client.models.netex\n"
+        "assert 'bods_client.models.transxchange' not in sys.modules\n"
+    )
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+class ForwardOnly(io.RawIOBase):
+    def __init__(self, content):
+        self._stream = io.BytesIO(content)
+
+    def readinto(self, buffer):
+        return self._stream.readinto(buffer)
+
+    def readable(self):
+        return True
+
+
+def test_iter_netex_forward_only_stream():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("AKSS_9.xml", NETEX)
+    for content, name in ((NETEX, None), (buffer.getvalue(), "AKSS_9.xml")):
+        records = list(iter_netex(ForwardOnly(content), frame_types=[FARE_PRICE]))
+        assert [record.file_name for record in records] == [name] * 3
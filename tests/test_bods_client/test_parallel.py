@@ -0,0 +1,108 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from bods_client.columnar import VehiclePositions
+from bods_client.models import Siri, SIRIVMParams
+from bods_client.models.siri import SiriParsingError
+from bods_client.parallel import (
+    _split,
+    parse_siri_parallel,
+    parse_vehicle_positions_parallel,
+)
+
+from .conftest import DATA_DIR
+
+GOOD_PACKET = (DATA_DIR / "good_packet.xml").read_bytes()
+EMPTY = re.sub(rb"<VehicleActivity>.*</VehicleActivity>", b"", GOOD_PACKET, flags=re.S)
+
+
+def prefixed(packet):
+    packet = re.sub(rb"<(/?)(\w)", rb"<\1siri:\2", packet)
+    return packet.replace(b"xmlns=", b"xmlns:siri=")
+
+
+def assert_same_positions(positions, expected):
+    assert len(positions) == len(expected)
+    for name in VehiclePositions.FLOAT_COLUMNS + VehiclePositions.TIME_COLUMNS:
+        assert str(list(getattr(positions, name))) == str(list(getattr(expected, name)))
+    for name in VehiclePositions.REF_COLUMNS:
+        column, other = getattr(positions, name), getattr(expected, name)
+        assert (column.codes, column.values) == (other.codes, other.values), name
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        yield executor
+
+
+@pytest.mark.parametrize("packet", [GOOD_PACKET, prefixed(GOOD_PACKET)])
+@pytest.mark.parametrize(("chunk_size", "count"), [(1, 4), (10**9, 1)])
+def test_split(packet, chunk_size, count):
+    header, chunks, footer = _split(packet, chunk_size)
+    assert header + b"".join(chunks) + footer == packet
+    assert b"VehicleActivity" not in header + footer
+    assert len(chunks) == count
+    for chunk in chunks:
+        assert chunk.lstrip().startswith(
+            (b"<VehicleActivity>", b"<siri:VehicleActivity>")
+        )
+
+
+def test_split_chunk_size():
+    _, chunks, _ = _split(GOOD_PACKET, 1500)
+    assert [chunk.count(b"</VehicleActivity>") for chunk in chunks] == [2, 2]
+
+
+def test_split_without_activities():
+    assert _split(EMPTY, 1) == (EMPTY, [], b"")
+
+
+@pytest.mark.parametrize(
+    "params", [None, SIRIVMParams(operator_refs=["AKSS"]), SIRIVMParams(line_ref="X")]
+)
+def test_parse_siri_parallel_matches_serial(executor, params):
+    expected = Siri.from_bytes(GOOD_PACKET, params=params)
+    siri = parse_siri_parallel(
+        GOOD_PACKET, chunk_size=1, params=params, executor=executor
+    )
+    assert siri == expected
+
+
+@pytest.mark.parametrize("packet", [EMPTY, prefixed(GOOD_PACKET)])
+def test_parse_siri_parallel_single_chunk(packet):
+    assert parse_siri_parallel(packet) == Siri.from_bytes(packet)
+
+
+def test_parse_siri_parallel_processes():
+    siri = parse_siri_parallel(GOOD_PACKET, max_workers=2, chunk_size=1)
+    assert siri == Siri.from_bytes(GOOD_PACKET)
+
+
+def test_parse_siri_parallel_errors(executor):
+    packet = (DATA_DIR / "missing_mvj.xml").read_bytes()
+    with pytest.raises(SiriParsingError, match="MonitoredVehicleJourney"):
+        parse_siri_parallel(packet, chunk_size=1, executor=executor)
+
+
+@pytest.mark.parametrize("params", [None, SIRIVMParams(operator_refs=["AMTM"])])
+def test_parse_vehicle_positions_parallel(executor, params):
+    positions = parse_vehicle_positions_parallel(
+        GOOD_PACKET, chunk_size=1, params=params, executor=executor
+    )
+    assert_same_positions(
+        positions, VehiclePositions.from_siri(GOOD_PACKET, params=params)
+    )
+
+
+def test_parse_vehicle_positions_parallel_processes():
+    positions = parse_vehicle_positions_parallel(
+        GOOD_PACKET, max_workers=2, chunk_size=1
+    )
+    assert_same_positions(positions, VehiclePositions.from_siri(GOOD_PACKET))
+
+
+def test_parse_vehicle_positions_parallel_without_activities():
+    assert len(parse_vehicle_positions_parallel(EMPTY)) == 0
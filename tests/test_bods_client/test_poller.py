@@ -0,0 +1,262 @@
+import asyncio
+import re
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+import requests
+from pydantic import ValidationError
+
+from bods_client.diff import SnapshotDiffer
+from bods_client.models import APIError
+from bods_client.models.avl import SIRIVMParams
+from bods_client.poller import AsyncSiriVMPoller, PollStats, SiriVMPoller
+from bods_client.query import PreparedQuery
+
+DATA = Path(__file__).parent / "data"
+PACKET = (DATA / "good_packet.xml").read_bytes()
+EMPTY = re.sub(rb"<VehicleActivity>.*</VehicleActivity>", b"", PACKET, flags=re.S)
+VALID_UNTIL = datetime(2022, 1, 29, 19, 54, 42, 330795, tzinfo=timezone.utc)
+ERROR = APIError(status_code=500, reason="Error")
+MALFORMED = [
+    PACKET.replace(b"<OperatorRef>AKSS</OperatorRef>", b"", 1),
+    PACKET.replace(b"<Bearing>149.0</Bearing>", b"<Bearing>north</Bearing>"),
+]
+
+
+class FakeTime:
+    def __init__(self):
+        self.monotonic = 100.0
+        self.oversleep = 0.0
+        self.sleeps = []
+
+    def clock(self):
+        return self.monotonic
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.monotonic += seconds + self.oversleep
+
+    async def async_sleep(self, seconds):
+        self.sleep(seconds)
+
+
+class FakeClient:
+    def __init__(self, time, responses, latency=0.0):
+        self.time = time
+        self.responses = list(responses)
+        self.latency = latency
+        self.params = []
+
+    def get_siri_vm_data_feed(self, params=None):
+        self.params.append(params)
+        self.time.monotonic += self.latency
+        response = self.responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+class AsyncFakeClient(FakeClient):
+    async def get_siri_vm_data_feed(self, params=None):
+        return super().get_siri_vm_data_feed(params)
+
+
+def make_poller(responses, now=VALID_UNTIL - timedelta(minutes=5), **kwargs):
+    time = FakeTime()
+    client = FakeClient(time, responses, latency=kwargs.pop("latency", 0.0))
+    kwargs.setdefault("min_interval", 1.0)
+    poller = SiriVMPoller(
+        client, clock=time.clock, sleep=time.sleep, now=lambda: now, **kwargs
+    )
+    return poller, time
+
+
+def test_poller_uses_shortest_possible_cycle():
+    poller, time = make_poller([PACKET] * 3)
+    results = list(poller.poll(max_polls=3))
+    assert len(results) == 3
+    assert time.sleeps == [5.0, 5.0]
+    assert poller.stats.polls == 3
+    assert poller.stats.mean_drift == 0.0
+
+
+def test_poller_passes_params():
+    params = SIRIVMParams(line_ref="9")
+    poller, _ = make_poller([PACKET], params=params)
+    next(iter(poller))
+    assert poller.client.params == [poller.query]
+    assert poller.query.params == params
+
+    query = PreparedQuery(params)
+    poller, _ = make_poller([PACKET], params=query)
+    next(iter(poller))
+    assert poller.client.params == [query]
+
+
+@pytest.mark.parametrize(
+    ("now", "expected"),
+    [
+        (VALID_UNTIL - timedelta(seconds=2), 2.0),
+        (VALID_UNTIL - timedelta(seconds=0.5), 1.0),
+        (VALID_UNTIL + timedelta(seconds=10), 5.0),
+        (VALID_UNTIL.replace(tzinfo=None) - timedelta(minutes=5), 5.0),
+    ],
+)
+def test_poller_respects_valid_until(now, expected):
+    poller, time = make_poller([PACKET] * 2, now=now.replace(tzinfo=timezone.utc))
+    list(poller.poll(max_polls=2))
+    assert time.sleeps == [expected]
+
+
+def test_poller_naive_valid_until():
+    packet = PACKET.replace(
+        b"19:54:42.330795+00:00</ValidUntil>", b"19:49:44.330795</ValidUntil>"
+    )
+    poller, time = make_poller([packet] * 2)
+    list(poller.poll(max_polls=2))
+    assert time.sleeps == [2.0]
+
+
+def test_poller_invalid_cycle_uses_min_interval():
+    packet = PACKET.replace(b"PT5S", b"soon")
+    poller, time = make_poller([packet] * 2, min_interval=3.0)
+    list(poller.poll(max_polls=2))
+    assert time.sleeps == [3.0]
+
+
+def test_poller_backs_off_on_errors():
+    poller, time = make_poller(
+        [ERROR, requests.ConnectionError("down"), b"not xml", EMPTY, PACKET, PACKET],
+        max_interval=10.0,
+    )
+    results = list(poller.poll(max_polls=6))
+    assert len(results) == 2
+    assert time.sleeps == [2.0, 4.0, 8.0, 10.0, 5.0]
+    assert poller.stats.errors == 3
+    assert poller.stats.empty == 1
+    assert poller.stats.polls == 2
+    assert poller.failures == 0
+
+
+def test_poller_records_parse_errors():
+    poller, _ = make_poller([(DATA / "missing_vmd.xml").read_bytes()])
+    assert list(poller.poll(max_polls=1)) == []
+    assert "VehicleMonitoringDelivery" in str(poller.stats.last_error)
+
+
+def test_poller_backs_off_on_malformed_activities():
+    poller, time = make_poller([*MALFORMED, PACKET], max_interval=10.0)
+    results = list(poller.poll(max_polls=3))
+    assert len(results) == 1
+    assert time.sleeps == [2.0, 4.0]
+    assert poller.stats.errors == 2
+    assert isinstance(poller.stats.last_error, ValidationError)
+
+
+def test_poller_skips_overdue_fetches():
+    poller, time = make_poller([PACKET] * 3, latency=12.0)
+    results = list(poller.poll(max_polls=3))
+    assert poller.stats.skipped == 4
+    assert time.sleeps == [3.0, 3.0]
+    assert [result.latency for result in results] == [12.0] * 3
+    assert poller.stats.max_latency == 12.0
+
+
+def test_poller_records_drift():
+    poller, time = make_poller([PACKET] * 3)
+    time.oversleep = 0.25
+    results = list(poller.poll(max_polls=3))
+    assert [result.drift for result in results] == [0.0, 0.25, 0.25]
+    assert time.sleeps == [5.0, 4.75]
+    assert poller.stats.max_drift == 0.25
+
+
+def test_poller_yields_diffs():
+    poller, _ = make_poller([PACKET] * 2, differ=SnapshotDiffer())
+    first, second = poller.poll(max_polls=2)
+    assert len(first.diff.added) == 4
+    assert second.diff.unchanged == 4
+    assert first.siri.service_delivery.producer_ref == "ItoWorld"
+
+
+def test_poll_stats():
+    stats = PollStats()
+    assert stats.mean_latency == stats.mean_drift == 0.0
+    stats.record(latency=1.0, drift=0.5)
+    stats.record(latency=3.0, drift=0.5)
+    assert stats.mean_latency == 2.0
+    assert repr(stats) == (
+        "PollStats(polls=2, errors=0, empty=0, skipped=0, "
+        "mean_latency=2.000, mean_drift=0.500)"
+    )
+
+
+def test_async_poller():
+    time = FakeTime()
+    client = AsyncFakeClient(
+        time, [PACKET, httpx.ConnectError("down"), PACKET], latency=0.5
+    )
+    poller = AsyncSiriVMPoller(
+        client,
+        min_interval=1.0,
+        clock=time.clock,
+        sleep=time.async_sleep,
+        now=lambda: VALID_UNTIL - timedelta(minutes=5),
+        differ=SnapshotDiffer(),
+    )
+
+    async def collect():
+        return [result async for result in poller]
+
+    async def collect_some():
+        return [result async for result in poller.poll(max_polls=3)]
+
+    results = asyncio.run(collect_some())
+    assert len(results) == 2
+    assert time.sleeps == [4.5, 1.5]
+    assert isinstance(poller.stats.last_error, httpx.ConnectError)
+    assert results[1].diff.unchanged == 4
+
+    client.responses = [ERROR]
+    with pytest.raises(IndexError):
+        asyncio.run(collect())
+
+
+def test_async_poller_backs_off_on_malformed_activities():
+    time = FakeTime()
+    poller = AsyncSiriVMPoller(
+        AsyncFakeClient(time, [*MALFORMED, PACKET]),
+        min_interval=1.0,
+        clock=time.clock,
+        sleep=time.async_sleep,
+        now=lambda: VALID_UNTIL - timedelta(minutes=5),
+    )
+
+    async def collect():
+        return [result async for result in poller.poll(max_polls=3)]
+
+    assert len(asyncio.run(collect())) == 1
+    assert time.sleeps == [2.0, 4.0]
+    assert poller.stats.errors == 2
+    assert isinstance(poller.stats.last_error, ValidationError)
+
+
+@pytest.mark.parametrize("poller_class", [SiriVMPoller, AsyncSiriVMPoller])
+@pytest.mark.parametrize("min_interval", [0, -1.0])
+def test_poller_rejects_non_positive_min_interval(poller_class, min_interval):
+    with pytest.raises(ValueError, match="min_interval"):
+        poller_class(client=None, min_interval=min_interval)
+
+
+@pytest.mark.parametrize("poller_class", [SiriVMPoller, AsyncSiriVMPoller])
+def test_poller_rejects_max_interval_below_min_interval(poller_class):
+    with pytest.raises(ValueError, match="max_interval"):
+        poller_class(client=None, min_interval=5.0, max_interval=0)
+
+
+def test_poller_defaults():
+    poller = SiriVMPoller(client=None)
+    assert poller.now().tzinfo is timezone.utc
+    assert poller.min_interval == 5.0
@@ -0,0 +1,139 @@
+import asyncio
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+
+from bods_client.async_client import AsyncBODSClient
+from bods_client.client import BODSClient
+from bods_client.models import (
+    BoundingBox,
+    FaresParams,
+    GTFSRTParams,
+    SIRIVMParams,
+    TimetableParams,
+)
+from bods_client.query import PreparedQuery, encode_query, to_query_params
+from bods_client.testing import StubBODSServer
+
+BOUNDING_BOX = BoundingBox(
+    min_longitude=-0.54, min_latitude=51.26, max_longitude=0.27, max_latitude=51.7
+)
+
+
+@pytest.mark.parametrize(
+    ("params", "path", "query_string"),
+    [
+        (
+            SIRIVMParams(operator_refs=["AKSS", "AMTM"], line_ref="9"),
+            "datafeed",
+            "operatorRef=AKSS&operatorRef=AMTM&lineRef=9",
+        ),
+        (
+            GTFSRTParams(
+                bounding_box=BOUNDING_BOX,
+                start_time_after=datetime(2022, 1, 29, 19, 49, tzinfo=timezone.utc),
+            ),
+            "gtfsrtdatafeed",
+            "boundingBox=-0.54%2C51.26%2C0.27%2C51.7"
+            "&startTimeAfter=2022-01-29T19%3A49%3A00Z",
+        ),
+        (
+            TimetableParams(nocs=["NT", "PT"], bods_compliance=True),
+            "dataset",
+            "noc=NT%2CPT&limit=25&offset=0&bodsCompliance=True",
+        ),
+        (FaresParams(limit=5), "fares/dataset", "limit=5&offset=0"),
+    ],
+)
+def test_prepared_query(params, path, query_string):
+    query = PreparedQuery(params)
+    assert query.path == path
+    assert query.query == to_query_params(params)
+    assert query.query_string == query_string
+    url = query.url("https://host/api/v1/endpoint/")
+    assert url == f"https://host/api/v1/endpoint/?{query_string}"
+    assert query.url("https://host/api/v1/endpoint/") is url
+    assert repr(query) == f"PreparedQuery({path!r}, {query_string!r})"
+
+
+def test_prepared_query_without_params():
+    query = PreparedQuery(SIRIVMParams())
+    assert query.query == {}
+    assert query.url("https://host/datafeed/") == "https://host/datafeed/"
+
+
+def test_prepared_query_copies_params():
+    params = SIRIVMParams(operator_refs=["AKSS"])
+    query = PreparedQuery(params)
+    params.operator_refs.append("AMTM")
+    params.line_ref = "9"
+    assert query.params.operator_refs == ["AKSS"]
+    assert query.query_string == "operatorRef=AKSS"
+
+
+def test_prepared_query_rejects_other_models():
+    with pytest.raises(TypeError, match="from BoundingBox"):
+        PreparedQuery(BOUNDING_BOX)
+
+
+def test_to_query_params_of_plain_models():
+    assert to_query_params(BOUNDING_BOX) == {
+        "min_longitude": -0.54,
+        "min_latitude": 51.26,
+        "max_longitude": 0.27,
+        "max_latitude": 51.7,
+    }
+    assert encode_query({"a": ["b c", "d"], "e": 1}) == "a=b+c&a=d&e=1"
+
+
+def test_params_model_dump_json():
+    params = GTFSRTParams(
+        bounding_box=BOUNDING_BOX, start_time_before=datetime(2022, 1, 29, 19, 49)
+    )
+    assert params.model_dump_json(by_alias=True, exclude_none=True) == (
+        '{"boundingBox": "-0.54,51.26,0.27,51.7", '
+        '"startTimeBefore": "2022-01-29T19:49:00"}'
+    )
+    params = TimetableParams(nocs=["NT", "PT"], admin_areas=["040"])
+    assert params.model_dump_json(by_alias=True, exclude_none=True) == (
+        '{"noc": "NT,PT", "limit": 25, "offset": 0, "adminArea": "040"}'
+    )
+
+
+def test_clients_send_prepared_queries(monkeypatch):
+    query = PreparedQuery(SIRIVMParams(line_ref="9"))
+    gtfs_query = PreparedQuery(GTFSRTParams(route_id="45"))
+
+    def unexpected(*args, **kwargs):
+        raise AssertionError("Prepared params were serialized again")
+
+    monkeypatch.setattr(SIRIVMParams, "_query_dict", unexpected)
+    monkeypatch.setattr(GTFSRTParams, "_query_dict", unexpected)
+
+    async def run_async(url):
+        async with AsyncBODSClient(api_key="key", base_url=url) as client:
+            await client.get_siri_vm_data_feed(query)
+            await client.get_gtfs_rt_data_feed(gtfs_query)
+
+    with StubBODSServer(vehicles=2) as server:
+        with BODSClient(api_key="key", base_url=server.api_url) as client:
+            for _ in range(2):
+                assert client.get_siri_vm_data_feed(query).startswith(b"<?xml")
+            assert len(client.get_gtfs_rt_data_feed(gtfs_query).entity) == 2
+        asyncio.run(run_async(server.api_url))
+
+    siri_vm = "/api/v1/datafeed/?lineRef=9&api_key=key"
+    gtfs_rt = "/api/v1/gtfsrtdatafeed/?routeId=45&api_key=key"
+    assert server.requests == [siri_vm, siri_vm, gtfs_rt, siri_vm, gtfs_rt]
+
+
+def test_clients_reject_queries_for_other_endpoints():
+    query = PreparedQuery(SIRIVMParams(line_ref="9"))
+    client = BODSClient(api_key="key")
+    with pytest.raises(TypeError, match="from GTFSRTParams, not SIRIVMParams"):
+        client.get_gtfs_rt_data_feed(query)
+
+    async_client = AsyncBODSClient(api_key="key", client=httpx.AsyncClient())
+    with pytest.raises(TypeError, match="from FaresParams"):
+        asyncio.run(async_client.get_fares_datasets(query))
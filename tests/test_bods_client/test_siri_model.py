@@ -1,10 +1,20 @@
-from datetime import datetime
+from datetime import date, datetime, timezone
 from pathlib import Path
 
 import pytest
+from pydantic import ValidationError
 
-from bods_client.models import Siri
-from bods_client.models.siri import SiriParsingError, VehicleActivity
+from bods_client.models import BoundingBox, Siri, SIRIVMParams
+from bods_client.models.siri import (
+    SiriParsingError,
+    VehicleActivity,
+    _parse_datetime,
+    compile_activity_filter,
+    iter_vehicle_activity_elements,
+    iter_vehicle_activity_records,
+    parse_duration,
+    read_shortest_possible_cycle,
+)
 
 DATA = Path(__file__).parent / "data"
 
@@ -73,3 +83,228 @@ def test_missing_vehicle_journey_refs():
     mvj = vehicles[0].monitored_vehicle_journey
     assert mvj.framed_vehicle_journey_ref is None
     assert mvj.vehicle_journey_ref is None
+
+
+@pytest.mark.parametrize("source_type", ["bytes", "file", "path", "str"])
+def test_iter_vehicle_activities(source_type):
+    good = DATA / "good_packet.xml"
+    siri = Siri.from_bytes(good.read_bytes())
+    expected = siri.service_delivery.vehicle_monitoring_delivery.vehicle_activities
+
+    if source_type == "bytes":
+        activities = list(Siri.iter_vehicle_activities(good.read_bytes()))
+    elif source_type == "file":
+        with good.open("rb") as f:
+            activities = list(Siri.iter_vehicle_activities(f))
+    elif source_type == "path":
+        activities = list(Siri.iter_vehicle_activities(good))
+    else:
+        activities = list(Siri.iter_vehicle_activities(str(good)))
+
+    assert activities == expected
+
+
+def test_iter_vehicle_activity_elements_clears_consumed():
+    good = DATA / "good_packet.xml"
+    elements = iter_vehicle_activity_elements(good.read_bytes())
+    first = next(elements)
+    assert len(first) > 0
+    second = next(elements)
+    assert len(first) == 0
+    next(elements)
+    assert first.getparent() is None
+    assert len(second) == 0
+
+
+def test_iter_vehicle_activities_missing_monitored_vehicle_journey():
+    missing = DATA / "missing_mvj.xml"
+    activities = Siri.iter_vehicle_activities(missing)
+    with pytest.raises(SiriParsingError):
+        next(activities)
+
+
+def test_iter_vehicle_activities_matches_from_bytes():
+    good = DATA / "good_packet.xml"
+    vmd = Siri.from_bytes(
+        good.read_bytes()
+    ).service_delivery.vehicle_monitoring_delivery
+    activities = list(Siri.iter_vehicle_activities(good))
+    assert activities == vmd.vehicle_activities
+    mvj = activities[1].monitored_vehicle_journey
+    assert mvj.bearing == 149.0
+    assert mvj.framed_vehicle_journey_ref.data_frame_ref == date(2022, 1, 29)
+
+
+def test_iter_vehicle_activities_validates_activities():
+    packet = (DATA / "good_packet.xml").read_bytes()
+    packet = packet.replace(b"<OperatorRef>AKSS</OperatorRef>", b"", 1)
+    activities = Siri.iter_vehicle_activities(packet)
+    with pytest.raises(ValidationError, match="operator_ref"):
+        next(activities)
+
+
+def _record_dict(record):
+    if isinstance(record, tuple):
+        return {name: _record_dict(value) for name, value in record._asdict().items()}
+    return record
+
+
+def test_iter_vehicle_activity_records_matches_models():
+    good = DATA / "good_packet.xml"
+    activities = list(Siri.iter_vehicle_activities(good))
+    records = list(iter_vehicle_activity_records(good.read_bytes()))
+    assert [_record_dict(record) for record in records] == [
+        activity.model_dump() for activity in activities
+    ]
+
+
+def test_iter_vehicle_activity_records_are_not_validated():
+    packet = (DATA / "good_packet.xml").read_bytes()
+    packet = packet.replace(b"<OperatorRef>AKSS</OperatorRef>", b"", 1)
+    packet = packet.replace(b"<Bearing>149.0</Bearing>", b"<Bearing/>")
+    first, second = list(iter_vehicle_activity_records(packet))[:2]
+    assert first.monitored_vehicle_journey.operator_ref is None
+    assert second.monitored_vehicle_journey.bearing is None
+
+    (record,) = iter_vehicle_activity_records(DATA / "missing_mvj.xml")
+    assert record.monitored_vehicle_journey is None
+
+
+def test_iter_vehicle_activity_records_with_params():
+    good = DATA / "good_packet.xml"
+    params = SIRIVMParams(operator_refs=["AKSS"], line_ref="9")
+    records = iter_vehicle_activity_records(good, params=params)
+    expected = Siri.iter_vehicle_activities(good, params=params)
+    assert [record.item_identifier for record in records] == [
+        activity.item_identifier for activity in expected
+    ]
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        (
+            "2022-01-29T16:09:19+00:00",
+            datetime(2022, 1, 29, 16, 9, 19, 0, timezone.utc),
+        ),
+        ("2022-01-29T16:09:19Z", datetime(2022, 1, 29, 16, 9, 19, 0, timezone.utc)),
+        ("2022-01-29T16:09:19.1234", datetime(2022, 1, 29, 16, 9, 19, 123400)),
+    ],
+)
+def test_parse_datetime(text, expected):
+    assert _parse_datetime(text) == expected
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("PT5S", 5.0),
+        ("PT0.5S", 0.5),
+        ("PT1M30S", 90.0),
+        ("P1DT1H", 90000.0),
+        (" PT10S ", 10.0),
+    ],
+)
+def test_parse_duration(text, expected):
+    assert parse_duration(text) == expected
+
+
+@pytest.mark.parametrize("text", ["P", "PT", "P1DT", "5S", "P1Y"])
+def test_parse_duration_invalid(text):
+    with pytest.raises(ValueError, match="invalid duration"):
+        parse_duration(text)
+
+
+def test_read_shortest_possible_cycle():
+    packet = (DATA / "good_packet.xml").read_bytes()
+    assert read_shortest_possible_cycle(packet) == 5.0
+    assert read_shortest_possible_cycle(b"<Siri/>") is None
+    invalid = b"<ShortestPossibleCycle>soon</ShortestPossibleCycle>"
+    assert read_shortest_possible_cycle(invalid) is None
+
+
+def vehicle_refs(activities):
+    return [activity.monitored_vehicle_journey.vehicle_ref for activity in activities]
+
+
+@pytest.mark.parametrize(
+    ("params", "expected"),
+    [
+        (SIRIVMParams(operator_refs=["AKSS"]), ["6409", "4315", "1657"]),
+        (SIRIVMParams(operator_refs=["AMTM", "TFLO"]), ["4103"]),
+        (SIRIVMParams(operator_refs=["AKSS"], line_ref="177"), ["4315"]),
+        (SIRIVMParams(vehicle_ref="1657"), ["1657"]),
+        (SIRIVMParams(destinaton_ref="2400A070000A"), ["4103"]),
+        (SIRIVMParams(origin_ref="missing"), []),
+        (
+            SIRIVMParams(
+                bounding_box=BoundingBox(
+                    min_longitude=0.275075,
+                    min_latitude=51.0,
+                    max_longitude=0.6,
+                    max_latitude=51.374961,
+                )
+            ),
+            ["6409", "4315", "1657"],
+        ),
+        (
+            SIRIVMParams(
+                bounding_box=BoundingBox(
+                    min_longitude=0.5,
+                    min_latitude=51.0,
+                    max_longitude=0.6,
+                    max_latitude=52.0,
+                )
+            ),
+            ["6409", "4315"],
+        ),
+    ],
+)
+def test_iter_vehicle_activities_with_params(params, expected):
+    packet = (DATA / "good_packet.xml").read_bytes()
+    activities = list(Siri.iter_vehicle_activities(packet, params=params))
+    assert vehicle_refs(activities) == expected
+
+    siri = Siri.from_bytes(packet, params=params)
+    vmd = siri.service_delivery.vehicle_monitoring_delivery
+    assert vmd.vehicle_activities == activities
+
+
+def test_iter_vehicle_activities_with_predicate():
+    def predicate(element):
+        return element.findtext(".//{*}LineRef") in ("9", "A")
+
+    good = DATA / "good_packet.xml"
+    activities = Siri.iter_vehicle_activities(good, params=predicate)
+    assert vehicle_refs(activities) == ["6409", "4103"]
+
+
+def test_activity_filter_without_filters():
+    assert compile_activity_filter(SIRIVMParams()) is None
+    assert compile_activity_filter(SIRIVMParams(producer_ref="ItoWorld")) is None
+
+
+@pytest.mark.parametrize("name", ["missing_mvj.xml", "missing_vehicle_location.xml"])
+def test_activity_filter_rejects_missing_fields(name):
+    box = BoundingBox(
+        min_longitude=-180, min_latitude=-90, max_longitude=180, max_latitude=90
+    )
+    params = SIRIVMParams(vehicle_ref="6409", bounding_box=box)
+    packet = (DATA / name).read_bytes()
+    assert list(Siri.iter_vehicle_activities(packet, params=params)) == []
+
+
+@pytest.mark.parametrize("longitude", [b"", b"east"])
+def test_activity_filter_rejects_invalid_location(longitude):
+    packet = (DATA / "good_packet.xml").read_bytes()
+    packet = packet.replace(
+        b"<Longitude>0.557191</Longitude>", b"<Longitude>" + longitude + b"</Longitude>"
+    )
+    packet = packet.replace(b"<Latitude>51.374961</Latitude>", b"")
+    box = BoundingBox(
+        min_longitude=-180, min_latitude=-90, max_longitude=180, max_latitude=90
+    )
+    activities = Siri.iter_vehicle_activities(
+        packet, params=SIRIVMParams(bounding_box=box)
+    )
+    assert vehicle_refs(activities) == ["4103", "1657"]
@@ -0,0 +1,144 @@
+import math
+import random
+
+import pytest
+from google.transit.gtfs_realtime_pb2 import FeedMessage
+
+from bods_client.columnar import VehiclePositions
+from bods_client.geo import haversine
+from bods_client.models import Siri
+from bods_client.models.base import BoundingBox
+from bods_client.spatial import SpatialIndex
+
+from .conftest import DATA_DIR
+
+GOOD_PACKET = DATA_DIR / "good_packet.xml"
+
+
+def random_points(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        (rng.uniform(-3.0, -1.0), rng.uniform(52.0, 54.0), name)
+        for name in range(count)
+    ]
+
+
+def brute_force(points, longitude, latitude):
+    return sorted(
+        (haversine(longitude, latitude, lon, lat), item) for lon, lat, item in points
+    )
+
+
+@pytest.fixture(scope="module")
+def points():
+    return random_points(2000)
+
+
+@pytest.fixture(scope="module")
+def index(points):
+    return SpatialIndex(points, cell_size=0.05)
+
+
+@pytest.mark.parametrize(
+    "box",
+    [
+        (-2.5, 52.5, -1.5, 53.5),
+        (-2.01, 53.01, -2.0, 53.02),
+        (-10.0, 40.0, 10.0, 60.0),
+        (5.0, 5.0, 6.0, 6.0),
+    ],
+)
+def test_within_matches_brute_force(points, index, box):
+    min_lon, min_lat, max_lon, max_lat = box
+    bounding_box = BoundingBox(
+        min_longitude=min_lon,
+        min_latitude=min_lat,
+        max_longitude=max_lon,
+        max_latitude=max_lat,
+    )
+    expected = [
+        item
+        for lon, lat, item in points
+        if min_lon <= lon <= max_lon and min_lat <= lat <= max_lat
+    ]
+    assert index.within(bounding_box) == expected
+
+
+def test_within_includes_edges():
+    index = SpatialIndex([(0.0, 0.0, "a"), (1.0, 1.0, "b"), (1.5, 1.0, "c")], 0.1)
+    box = BoundingBox(
+        min_longitude=0.0, min_latitude=0.0, max_longitude=1.0, max_latitude=1.0
+    )
+    assert index.within(box) == ["a", "b"]
+
+
+@pytest.mark.parametrize("radius", [0.0, 500.0, 5_000.0, 50_000.0])
+def test_within_radius_matches_brute_force(points, index, radius):
+    expected = [
+        (item, distance)
+        for distance, item in brute_force(points, -2.0, 53.0)
+        if distance <= radius
+    ]
+    assert index.within_radius(-2.0, 53.0, radius) == expected
+
+
+@pytest.mark.parametrize(
+    ("longitude", "latitude"), [(-2.0, 53.0), (-1.0, 52.0), (0.5, 55.0), (-2.9, 53.9)]
+)
+@pytest.mark.parametrize("k", [1, 5, 50])
+def test_nearest_matches_brute_force(points, index, longitude, latitude, k):
+    expected = brute_force(points, longitude, latitude)[:k]
+    nearest = index.nearest(longitude, latitude, k=k)
+    assert [item for item, _ in nearest] == [item for _, item in expected]
+    assert [distance for _, distance in nearest] == [d for d, _ in expected]
+
+
+def test_nearest_far_from_points():
+    index = SpatialIndex([(0.0, 0.0, "a"), (0.001, 0.0, "b")], cell_size=0.01)
+    assert [item for item, _ in index.nearest(1.0, 1.0, k=1)] == ["b"]
+    assert [item for item, _ in index.nearest(1.0, 1.0, k=5)] == ["b", "a"]
+
+
+def test_nearest_edge_cases():
+    assert SpatialIndex([]).nearest(0.0, 0.0) == []
+    index = SpatialIndex([(0.0, 0.0, "a")])
+    assert index.nearest(0.0, 0.0, k=0) == []
+    assert index.nearest(0.0, 0.0) == [("a", 0.0)]
+    assert len(index) == 1
+
+
+def test_from_siri():
+    siri = Siri.from_bytes(GOOD_PACKET.read_bytes())
+    activities = siri.service_delivery.vehicle_monitoring_delivery.vehicle_activities
+    activities[1].monitored_vehicle_journey.vehicle_location = None
+    index = SpatialIndex.from_siri(siri)
+    assert len(index) == len(activities) - 1
+    location = activities[0].monitored_vehicle_journey.vehicle_location
+    (activity, distance), *_ = index.nearest(location.longitude, location.latitude)
+    assert activity is activities[0]
+    assert distance == 0.0
+
+
+def test_from_gtfs_rt():
+    message = FeedMessage()
+    message.ParseFromString((DATA_DIR / "gtfsrt.bin").read_bytes())
+    message.entity.add(id="no-vehicle")
+    expected = [
+        entity
+        for entity in message.entity
+        if entity.HasField("vehicle") and entity.vehicle.HasField("position")
+    ]
+    index = SpatialIndex.from_gtfs_rt(message)
+    assert len(index) == len(expected) == len(message.entity) - 1
+    position = expected[0].vehicle.position
+    (entity, _), *_ = index.nearest(position.longitude, position.latitude)
+    assert entity.vehicle.position == position
+
+
+def test_from_vehicle_positions():
+    positions = VehiclePositions.from_siri(GOOD_PACKET)
+    positions.longitude[2] = math.nan
+    index = SpatialIndex.from_vehicle_positions(positions)
+    assert index.items == [row for row in range(len(positions)) if row != 2]
+    row, distance = index.nearest(positions.longitude[0], positions.latitude[0])[0]
+    assert (row, distance) == (0, 0.0)
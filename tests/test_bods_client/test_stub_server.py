@@ -0,0 +1,124 @@
+import json
+import time
+
+import pytest
+
+from bods_client.client import BODSClient
+from bods_client.models import APIError, Siri, TimetableParams
+from bods_client.models.fares import FaresParams
+from bods_client.testing import StubBODSServer, gtfs_rt_feed, siri_vm_packet
+from bods_client.throttle import RetryPolicy
+
+
+@pytest.fixture
+def server():
+    with StubBODSServer(timetables=30, fares=5, vehicles=20) as server:
+        yield server
+
+
+@pytest.fixture
+def client(server):
+    with BODSClient(api_key="key", base_url=server.api_url) as client:
+        yield client
+
+
+def test_timetable_datasets(server, client):
+    response = client.get_timetable_datasets(TimetableParams(limit=10, offset=5))
+    assert response.count == 30
+    assert [timetable.id for timetable in response.results] == list(range(6, 16))
+    assert response.next.startswith(f"{server.api_url}/v1/dataset/?")
+    assert "offset=15" in response.next
+    assert "offset=0" in response.previous
+
+    timetables = client.iter_timetable_datasets(TimetableParams(limit=7))
+    assert [timetable.id for timetable in timetables] == list(range(1, 31))
+
+    last = client.get_timetable_datasets(TimetableParams(limit=10, offset=20))
+    assert last.next is None
+
+    assert client.get_timetable_dataset(3).results[0].id == 3
+    assert client.get_timetable_dataset(99) == APIError(
+        status_code=404, reason=json.dumps({"detail": "Not found."})
+    )
+
+
+def test_fares_datasets(client):
+    fares = client.iter_fares_datasets(FaresParams(limit=2))
+    assert [dataset.id for dataset in fares] == [1, 2, 3, 4, 5]
+    assert client.get_fares_dataset(5).results[0].id == 5
+
+
+def test_feeds(client):
+    packet = client.get_siri_vm_data_feed()
+    assert packet == siri_vm_packet(20)
+    assert client.get_siri_vm_data_feed_by_id(1) == packet
+    assert client.get_siri_vm_from_archive() == packet
+    activities = list(client.iter_siri_vm_from_archive())
+    siri = Siri.from_bytes(packet)
+    delivery = siri.service_delivery.vehicle_monitoring_delivery
+    assert activities == delivery.vehicle_activities
+
+    message = client.get_gtfs_rt_data_feed()
+    assert message.SerializeToString() == gtfs_rt_feed(20)
+    assert client.get_gtfs_rt_from_archive() == message
+
+
+def test_fail_next(server, client):
+    server.fail_next(2, status=503)
+    first = client.get_timetable_datasets()
+    assert first == APIError(status_code=503, reason="Service Unavailable")
+    assert isinstance(client.get_gtfs_rt_data_feed(), APIError)
+    assert client.get_timetable_datasets().count == 30
+
+    server.fail_next(2, status=429)
+    retry = RetryPolicy(backoff=0, jitter=False)
+    with BODSClient(api_key="key", base_url=server.api_url, retry=retry) as client:
+        assert client.get_timetable_datasets().count == 30
+    assert len(server.requests) == 6
+
+
+def test_requests(server, client):
+    client.get_timetable_datasets(TimetableParams(limit=5))
+    assert server.requests == ["/api/v1/dataset/?limit=5&offset=0&api_key=key"]
+
+
+def test_error_rate():
+    def statuses(seed):
+        server = StubBODSServer(error_rate=0.5, error_status=500, seed=seed)
+        with server:
+            return [server.handle("/api/v1/dataset/")[0] for _ in range(20)]
+
+    first = statuses(1)
+    assert set(first) == {200, 500}
+    assert statuses(1) == first
+
+
+def test_latency():
+    server = StubBODSServer(latency=0.05)
+    started = time.monotonic()
+    status, _, _ = server.handle("/api/v1/datafeed/")
+    assert status == 200
+    assert time.monotonic() - started >= 0.05
+    server.stop()
+
+
+def test_api_key():
+    with StubBODSServer(api_key="secret") as server:
+        assert server.handle("/api/v1/dataset/?api_key=secret")[0] == 200
+        status, content_type, body = server.handle("/api/v1/dataset/?api_key=wrong")
+    assert (status, content_type) == (401, "application/json")
+    assert json.loads(body) == {"detail": "Invalid API key."}
+
+
+@pytest.mark.parametrize(
+    ("target", "status"),
+    [
+        ("/api/v1/unknown/", 404),
+        ("/api/v1/dataset/?limit=many", 400),
+        ("/api/v1/fares/dataset/6/", 404),
+    ],
+)
+def test_errors(target, status):
+    server = StubBODSServer(fares=5)
+    assert server.handle(target)[0] == status
+    server.stop()
@@ -0,0 +1,219 @@
+import json
+import re
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from bods_client.client import BODSClient
+from bods_client.constants import FARES, TIMETABLES
+from bods_client.models import APIRequestError, Fares, Timetable
+from bods_client.sync import CatalogueSync, DatasetStore
+
+from .conftest import DATA_DIR
+
+TIMETABLE = json.loads((DATA_DIR / "timetable.json").read_text())
+FARE = json.loads((DATA_DIR / "fare.json").read_text())
+START = datetime(2022, 1, 1, tzinfo=timezone.utc)
+
+
+class Catalogue:
+    """
+    A fake BODS catalogue supporting the status and modifiedDate filters.
+    """
+
+    def __init__(self, record):
+        self.record = record
+        self.datasets = {}
+        self.requests = []
+
+    def put(self, id_, days=0, status="published", **values):
+        modified = (START + timedelta(days=days)).isoformat()
+        self.datasets[id_] = dict(
+            self.record, id=id_, modified=modified, status=status, **values
+        )
+
+    def __call__(self, request, context):
+        self.requests.append(request.qs)
+        status = request.qs["status"][0]
+        results = [d for d in self.datasets.values() if d["status"] == status]
+        if "modifieddate" in request.qs:
+            since = datetime.fromisoformat(
+                request.qs["modifieddate"][0].upper().replace("Z", "+00:00")
+            )
+            results = [
+                d for d in results if datetime.fromisoformat(d["modified"]) >= since
+            ]
+        results.sort(key=lambda d: d["id"])
+        offset = int(request.qs["offset"][0])
+        end = offset + int(request.qs["limit"][0])
+        return {
+            "count": len(results),
+            "next": None,
+            "previous": None,
+            "results": results[offset:end],
+        }
+
+
+@pytest.fixture
+def timetables(requests_mock):
+    catalogue = Catalogue(TIMETABLE)
+    requests_mock.get(re.compile(r".*/v1/dataset/"), json=catalogue)
+    return catalogue
+
+
+@pytest.fixture
+def fares(requests_mock):
+    catalogue = Catalogue(FARE)
+    requests_mock.get(re.compile(r".*/v1/fares/dataset/"), json=catalogue)
+    return catalogue
+
+
+@pytest.fixture
+def store():
+    with DatasetStore() as store:
+        yield store
+
+
+@pytest.fixture
+def syncer(store):
+    return CatalogueSync(BODSClient(api_key="apikey"), store, page_size=2)
+
+
+def test_store_round_trip(store):
+    timetable = Timetable(**TIMETABLE)
+    assert store.upsert(TIMETABLES, [timetable]) == ([timetable.id], [])
+    assert store.upsert(TIMETABLES, [timetable]) == ([], [])
+    assert store.get(TIMETABLES, timetable.id) == timetable
+    assert store.get(TIMETABLES, 0) is None
+    assert list(store.datasets(TIMETABLES)) == [timetable]
+    assert list(store.datasets(TIMETABLES, operator_name="nobody")) == []
+
+    changed = timetable.model_copy(update={"name": "changed"})
+    assert store.upsert(TIMETABLES, [changed]) == ([], [timetable.id])
+    assert store.get(TIMETABLES, timetable.id).name == "changed"
+    assert store.remove(TIMETABLES, [timetable.id, 0]) == [timetable.id]
+    assert store.count(TIMETABLES) == 0
+
+
+def test_store_fares_and_high_water_mark(tmp_path):
+    path = tmp_path / "catalogue.db"
+    with DatasetStore(path) as store:
+        store.upsert(FARES, [Fares(**FARE)])
+        store.set_high_water_mark(FARES, START)
+    with DatasetStore(path) as store:
+        assert store.ids(FARES) == {FARE["id"]}
+        assert store.high_water_mark(FARES) == START
+        assert store.high_water_mark(TIMETABLES) is None
+
+
+def test_store_unknown_kind(store):
+    with pytest.raises(ValueError, match="unknown data set kind"):
+        store.count("stops")
+
+
+def test_first_sync_is_full_refresh(timetables, syncer, store):
+    for id_ in range(5):
+        timetables.put(id_, days=id_)
+    timetables.put(10, status="expired")
+
+    result = syncer.sync_timetables()
+    assert result.full_refresh
+    assert result.inserted == [0, 1, 2, 3, 4]
+    assert result.high_water_mark == START + timedelta(days=4)
+    assert store.ids(TIMETABLES) == {0, 1, 2, 3, 4}
+    assert store.high_water_mark(TIMETABLES) == START + timedelta(days=4)
+
+
+def test_incremental_sync(timetables, syncer, store):
+    for id_ in range(5):
+        timetables.put(id_, days=id_)
+    syncer.sync_timetables()
+    timetables.requests.clear()
+
+    timetables.put(2, days=5, name="renamed")
+    timetables.put(3, days=6, status="expired")
+    timetables.put(7, days=7)
+    result = syncer.sync_timetables()
+
+    assert not result.full_refresh
+    assert result.inserted == [7]
+    assert result.updated == [2]
+    assert result.expired == [3]
+    assert result.deleted == []
+    assert result.high_water_mark == START + timedelta(days=7)
+    assert store.get(TIMETABLES, 2).name == "renamed"
+    assert store.ids(TIMETABLES) == {0, 1, 2, 4, 7}
+    # Only data sets modified since the mark are listed, plus one count request.
+    listed = [qs for qs in timetables.requests if qs["limit"] != ["1"]]
+    assert all("modifieddate" in qs for qs in listed)
+
+
+def test_incremental_sync_detects_deleted(timetables, syncer, store):
+    for id_ in range(5):
+        timetables.put(id_, days=id_)
+    syncer.sync_timetables()
+
+    del timetables.datasets[1]
+    result = syncer.sync_timetables()
+    assert result.deleted == [1]
+    assert result.inserted == result.updated == result.expired == []
+    assert store.ids(TIMETABLES) == {0, 2, 3, 4}
+
+
+def test_full_refresh_prunes(timetables, syncer, store):
+    for id_ in range(3):
+        timetables.put(id_, days=id_)
+    syncer.sync_timetables()
+    timetables.put(1, days=0, status="inactive")
+
+    result = syncer.sync_timetables(full_refresh=True)
+    assert result.full_refresh
+    assert result.deleted == [1]
+    assert result.high_water_mark == START + timedelta(days=2)
+
+
+def test_sync_fares(fares, syncer, store):
+    fares.put(1, days=1)
+    fares.put(2, days=2)
+    first = syncer.sync_fares()
+    assert first.inserted == [1, 2]
+
+    fares.put(2, days=3, name="renamed")
+    del fares.datasets[1]
+    second = syncer.sync_fares()
+    assert second.inserted == []
+    assert second.updated == [2]
+    assert second.deleted == [1]
+    assert store.high_water_mark(FARES) == START + timedelta(days=3)
+
+
+def test_sync_both_catalogues(timetables, fares, syncer):
+    timetables.put(1)
+    fares.put(1)
+    results = syncer.sync()
+    assert results[TIMETABLES].inserted == [1]
+    assert results[FARES].inserted == [1]
+
+
+def test_sync_error_keeps_high_water_mark(requests_mock, timetables, syncer, store):
+    timetables.put(1)
+    syncer.sync_timetables()
+    requests_mock.get(re.compile(r".*/v1/dataset/"), status_code=500, text="Error")
+    with pytest.raises(APIRequestError):
+        syncer.sync_timetables()
+    assert store.high_water_mark(TIMETABLES) == START
+
+
+def test_sync_count_error(requests_mock, timetables, syncer):
+    timetables.put(1)
+    syncer.sync_timetables()
+
+    def callback(request, context):
+        if request.qs["limit"] == ["1"]:
+            context.status_code = 500
+            return {}
+        return timetables(request, context)
+
+    requests_mock.get(re.compile(r".*/v1/dataset/"), json=callback)
+    with pytest.raises(APIRequestError):
+        syncer.sync_timetables()
@@ -0,0 +1,240 @@
+import asyncio
+import re
+from datetime import datetime, timezone
+
+import httpx
+import pytest
+import requests
+
+from bods_client.async_client import AsyncBODSClient
+from bods_client.client import BODSClient
+from bods_client.constants import ARCHIVE, FARES, SIRI_VM, TIMETABLES
+from bods_client.models import APIError, FaresResponse
+from bods_client.throttle import (
+    RateLimiter,
+    RequestStats,
+    RetryPolicy,
+    TokenBucket,
+    _parse_retry_after,
+)
+
+from .conftest import DATA_DIR
+
+SIRI = (DATA_DIR / "good_packet.xml").read_bytes()
+FARES_PAGE = {"count": 0, "next": None, "previous": None, "results": []}
+NOW = datetime(2022, 1, 29, 19, 49, 42, tzinfo=timezone.utc)
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    calls = []
+    monkeypatch.setattr("bods_client.client.time.sleep", calls.append)
+    return calls
+
+
+def test_token_bucket():
+    clock = Clock()
+    bucket = TokenBucket(rate=2, capacity=2, clock=clock)
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.5, 1.0]
+    clock.now += 10
+    assert bucket.reserve() == 0.0
+    assert TokenBucket(rate=0.5).capacity == 1.0
+
+
+def test_token_bucket_rate_must_be_positive():
+    with pytest.raises(ValueError, match="rate must be positive"):
+        TokenBucket(rate=0)
+
+
+def test_rate_limiter():
+    clock = Clock()
+    limiter = RateLimiter({SIRI_VM: TokenBucket(1, clock=clock), FARES: 5})
+    assert limiter.buckets[FARES].rate == 5
+    assert limiter.reserve(SIRI_VM) == 0.0
+    assert limiter.reserve(SIRI_VM) == 1.0
+    assert limiter.reserve(TIMETABLES) == 0.0
+    assert limiter.reserve(None) == 0.0
+
+
+@pytest.mark.parametrize(
+    ("value", "expected"),
+    [
+        ("2", 2.0),
+        ("-1", 0.0),
+        ("Sat, 29 Jan 2022 19:49:52 GMT", 10.0),
+        ("Sat, 29 Jan 2022 19:49:52 -0000", 10.0),
+        ("Sat, 29 Jan 2022 19:49:32 GMT", 0.0),
+        ("soon", 0.0),
+    ],
+)
+def test_parse_retry_after(value, expected):
+    assert _parse_retry_after(value, lambda: NOW) == expected
+
+
+def test_retry_policy_delay():
+    policy = RetryPolicy(backoff=1, max_backoff=5, jitter=False)
+    assert [policy.delay(attempt) for attempt in range(4)] == [1, 2, 4, 5]
+    assert policy.delay(0, retry_after="3") == 3.0
+    assert policy.delay(0, retry_after="Sat, 01 Jan 2000 00:00:00 GMT") == 0.0
+    jittered = RetryPolicy(backoff=1)
+    assert all(0 <= jittered.delay(2) <= 4 for _ in range(20))
+
+
+def test_request_stats_repr():
+    stats = RequestStats()
+    stats.record_request(0.5)
+    stats.record_retry(1.0)
+    assert repr(stats) == (
+        "RequestStats(requests=1, retries=1, throttled_time=0.500, "
+        "backoff_time=1.000)"
+    )
+
+
+def test_endpoint_family():
+    client = BODSClient(api_key="apikey")
+    assert client._endpoint_family(client.siri_vm_endpoint) == SIRI_VM
+    assert client._endpoint_family(client.fares_endpoint + "1/") == FARES
+    assert client._endpoint_family(client.siri_vm_zip_endpoint) == ARCHIVE
+    assert client._endpoint_family(client.gtfs_rt_zip_endpoint) == ARCHIVE
+    assert client._endpoint_family("https://example.com/") is None
+
+
+def test_no_retries_by_default(requests_mock, sleeps):
+    requests_mock.get(re.compile(r".*/datafeed/"), status_code=503, text="busy")
+    client = BODSClient(api_key="apikey")
+    assert isinstance(client.get_siri_vm_data_feed(), APIError)
+    assert requests_mock.call_count == 1
+    assert client.request_stats.requests == 1
+    assert sleeps == []
+
+
+def test_retries_with_backoff(requests_mock, sleeps):
+    requests_mock.get(
+        re.compile(r".*/fares/dataset/"),
+        [{"status_code": 503}, {"status_code": 500}, {"json": FARES_PAGE}],
+    )
+    retry = RetryPolicy(backoff=1, jitter=False)
+    client = BODSClient(api_key="apikey", retry=retry)
+    assert isinstance(client.get_fares_datasets(), FaresResponse)
+    assert sleeps == [1, 2]
+    assert client.request_stats.retries == 2
+    assert client.request_stats.backoff_time == 3
+    assert client.request_stats.requests == 3
+
+
+def test_retries_honour_retry_after(requests_mock, sleeps):
+    requests_mock.get(
+        re.compile(r".*/datafeed/"),
+        [{"status_code": 429, "headers": {"Retry-After": "7"}}, {"content": SIRI}],
+    )
+    client = BODSClient(api_key="apikey", retry=RetryPolicy())
+    assert client.get_siri_vm_data_feed() == SIRI
+    assert sleeps == [7.0]
+
+
+def test_retries_stop_at_deadline(requests_mock, sleeps):
+    requests_mock.get(
+        re.compile(r".*/datafeed/"),
+        status_code=429,
+        headers={"Retry-After": "120"},
+        text="slow down",
+    )
+    client = BODSClient(api_key="apikey", retry=RetryPolicy(deadline=60))
+    error = client.get_siri_vm_data_feed()
+    assert error.status_code == 429
+    assert requests_mock.call_count == 1
+    assert sleeps == []
+
+
+def test_retries_are_limited(requests_mock, sleeps):
+    requests_mock.get(re.compile(r".*/datafeed/"), status_code=503, text="busy")
+    client = BODSClient(api_key="apikey", retry=RetryPolicy(max_retries=2))
+    assert isinstance(client.get_siri_vm_data_feed(), APIError)
+    assert requests_mock.call_count == 3
+    assert len(sleeps) == 2
+
+
+def test_client_errors_are_not_retried(requests_mock, sleeps):
+    requests_mock.get(re.compile(r".*/datafeed/"), status_code=404, text="missing")
+    client = BODSClient(api_key="apikey", retry=RetryPolicy())
+    assert isinstance(client.get_siri_vm_data_feed(), APIError)
+    assert requests_mock.call_count == 1
+
+
+def test_connection_errors_are_retried(requests_mock, sleeps):
+    requests_mock.get(
+        re.compile(r".*/datafeed/"),
+        [{"exc": requests.ConnectionError}, {"content": SIRI}],
+    )
+    client = BODSClient(api_key="apikey", retry=RetryPolicy())
+    assert client.get_siri_vm_data_feed() == SIRI
+    assert client.request_stats.retries == 1
+
+
+def test_connection_errors_are_raised_when_retries_run_out(requests_mock, sleeps):
+    requests_mock.get(re.compile(r".*/datafeed/"), exc=requests.ConnectTimeout)
+    client = BODSClient(api_key="apikey", retry=RetryPolicy(max_retries=1))
+    with pytest.raises(requests.ConnectTimeout):
+        client.get_siri_vm_data_feed()
+    assert requests_mock.call_count == 2
+
+
+def test_rate_limiter_throttles_requests(requests_mock, sleeps):
+    requests_mock.get(re.compile(r".*/datafeed/"), content=SIRI)
+    clock = Clock()
+    limiter = RateLimiter({SIRI_VM: TokenBucket(rate=2, capacity=1, clock=clock)})
+    client = BODSClient(api_key="apikey", rate_limiter=limiter)
+    for _ in range(3):
+        client.get_siri_vm_data_feed()
+    assert sleeps == [0.5, 1.0]
+    assert client.request_stats.throttled_time == 1.5
+
+
+def test_async_client_retries(monkeypatch):
+    responses = [
+        httpx.ConnectError("down"),
+        httpx.Response(503),
+        httpx.Response(200, content=SIRI),
+    ]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    async def fetch():
+        client = AsyncBODSClient(
+            api_key="apikey",
+            client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+            retry=RetryPolicy(backoff=0.001),
+            rate_limiter=RateLimiter({SIRI_VM: TokenBucket(rate=1000, capacity=1)}),
+        )
+        result = await client.get_siri_vm_data_feed()
+        await client.client.aclose()
+        return client, result
+
+    client, result = asyncio.run(fetch())
+    assert result == SIRI
+    assert client.request_stats.retries == 2
+    assert client.request_stats.requests == 3
+
+
+def test_async_client_raises_when_retries_run_out():
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise httpx.ConnectError("down")
+
+    client = AsyncBODSClient(
+        api_key="apikey",
+        client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    with pytest.raises(httpx.ConnectError):
+        asyncio.run(client.get_siri_vm_data_feed())
@@ -0,0 +1,170 @@
+import io
+import zipfile
+from datetime import date, time
+
+import pytest
+
+from bods_client.archive import ArchiveMember
+from bods_client.models.transxchange import (
+    _NS_PREFIX,
+    _PARSERS,
+    JourneyPattern,
+    JourneyPatternSection,
+    Line,
+    Service,
+    StopPoint,
+    VehicleJourney,
+    iter_transxchange,
+)
+
+from .conftest import DATA_DIR
+
+TXC_PATH = DATA_DIR / "transxchange.xml"
+TXC = TXC_PATH.read_bytes()
+
+
+def zipped(files):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        for name, content in files.items():
+            archive.writestr(name, content)
+    return buffer.getvalue()
+
+
+def test_iter_transxchange():
+    records = list(iter_transxchange(TXC))
+    assert [type(record) for record in records] == [
+        StopPoint,
+        StopPoint,
+        StopPoint,
+        JourneyPatternSection,
+        JourneyPatternSection,
+        Service,
+        Line,
+        Line,
+        JourneyPattern,
+        JourneyPattern,
+        VehicleJourney,
+        VehicleJourney,
+        VehicleJourney,
+    ]
+    first, second, third = records[:3]
+    assert first.atco_code == "2400A001770A"
+    assert (first.common_name, first.indicator) == ("Bus Station", "Stop A")
+    assert (first.longitude, first.latitude) == (0.520372, 51.274544)
+    assert second.longitude is None
+    assert second.indicator is None
+    assert third.atco_code == "2400A034340A"
+    assert (third.common_name, third.indicator) == ("Hospital", "opp")
+    assert third.locality_name == "Barming"
+    assert (third.longitude, third.latitude) == (0.539068, 51.374961)
+
+    section = records[3]
+    assert section.id == "JPS1"
+    link = section.timing_links[1]
+    assert (link.from_stop_ref, link.to_stop_ref) == ("2400A001780A", "2400A034340A")
+    assert (link.from_sequence_number, link.to_sequence_number) == (2, 3)
+    assert (link.from_timing_status, link.to_timing_status) == ("OTH", "PTP")
+    assert (link.route_link_ref, link.run_time) == ("RL2", "PT5M30S")
+    assert records[4].timing_links[0].from_sequence_number is None
+
+    service = records[5]
+    assert service.service_code == "PK0000001:9"
+    assert (service.origin, service.destination) == ("Maidstone", "Barming")
+    assert service.start_date == date(2021, 9, 5)
+    assert service.end_date == date(2022, 1, 31)
+    assert [(line.id, line.line_name) for line in records[6:8]] == [
+        ("SL1", "9"),
+        ("SL2", "9X"),
+    ]
+    assert {line.service_code for line in records[6:10]} == {"PK0000001:9"}
+    assert records[8].route_ref == "R1"
+    assert records[9].section_refs == ["JPS2", "JPS1"]
+
+    journey = records[10]
+    assert journey.vehicle_journey_code == "VJ1"
+    assert (journey.private_code, journey.operator_ref) == ("9-0700", "O1")
+    assert (journey.line_ref, journey.journey_pattern_ref) == ("SL1", "JP1")
+    assert journey.departure_time == time(7)
+    assert records[12].vehicle_journey_ref == "VJ1"
+    assert {record.file_name for record in records} == {None}
+
+
+@pytest.mark.parametrize("source", [TXC_PATH, str(TXC_PATH)])
+def test_iter_transxchange_path(source):
+    records = list(iter_transxchange(source))
+    assert len(records) == 13
+    assert {record.file_name for record in records} == {"transxchange.xml"}
+
+
+def test_iter_transxchange_file():
+    with TXC_PATH.open("rb") as f:
+        f.read(10)
+        records = list(iter_transxchange(f))
+    assert len(records) == 13
+    assert records[0].file_name == str(TXC_PATH)
+
+
+def test_iter_transxchange_zip(tmp_path):
+    content = zipped({"b/AKSS_9.xml": TXC, "readme.txt": b"", "AKSS_10.XML": TXC})
+    path = tmp_path / "timetable.zip"
+    path.write_bytes(content)
+    for source in (content, path, io.BytesIO(content)):
+        records = list(iter_transxchange(source))
+        assert len(records) == 26
+        names = [record.file_name for record in records]
+        assert names == ["b/AKSS_9.xml"] * 13 + ["AKSS_10.XML"] * 13
+
+
+def test_iter_transxchange_clears_elements(monkeypatch):
+    tag = f"{_NS_PREFIX}VehicleJourney"
+    parse = _PARSERS[tag]
+    sizes = []
+
+    def spy(element, file_name):
+        preceding = list(element.itersiblings(preceding=True))
+        for section in element.getparent().itersiblings(preceding=True):
+            preceding.extend(section)
+        sizes.append([len(other) for other in preceding])
+        return parse(element, file_name)
+
+    monkeypatch.setitem(_PARSERS, tag, spy)
+    assert len(list(iter_transxchange(TXC))) == 13
+    # Only the last record of each earlier section is left, and it is empty.
+    assert sizes == [[0] * 6, [0] * 7, [0] * 7]
+
+
+class ForwardOnly:
+    """
+    A stream that can only be read forwards, like an HTTP response body.
+    """
+
+    def __init__(self, content):
+        self._stream = io.BytesIO(content)
+
+    def read(self, size=-1):
+        return self._stream.read(size)
+
+    def seekable(self):
+        return False
+
+
+@pytest.mark.parametrize(
+    ("content", "expected"),
+    [
+        (TXC, [None] * 13),
+        (zipped({"AKSS_9.xml": TXC}), ["AKSS_9.xml"] * 13),
+    ],
+)
+def test_iter_transxchange_forward_only_stream(content, expected):
+    records = list(iter_transxchange(ForwardOnly(content)))
+    assert [record.file_name for record in records] == expected
+
+
+def test_iter_transxchange_archive_member():
+    bulk = zipped({"AKSS.zip": zipped({"AKSS_9.xml": TXC}), "AKSS_10.xml": TXC})
+    with ArchiveMember(io.BytesIO(bulk), "AKSS.zip") as member:
+        records = list(iter_transxchange(member.file))
+    assert [record.file_name for record in records] == ["AKSS_9.xml"] * 13
+    with ArchiveMember(io.BytesIO(bulk), "AKSS_10.xml") as member:
+        assert len(list(iter_transxchange(member.file))) == 13
@@ -0,0 +1,18 @@
+import io
+
+import pytest
+
+from bods_client.models._xml import _PrefixedStream
+
+
+@pytest.mark.parametrize(
+    ("sizes", "expected"),
+    [
+        ([-1], [b"<xml/>"]),
+        ([2, 2, -1], [b"<x", b"m", b"l/>"]),
+        ([3, 3, 3], [b"<xm", b"l/>", b""]),
+    ],
+)
+def test_prefixed_stream(sizes, expected):
+    stream = _PrefixedStream(b"<xm", io.BytesIO(b"l/>"))
+    assert [stream.read(size) for size in sizes] == expected